@@ -1,4 +1,8 @@
 from django.contrib import admin
+
+from db_carte.fulltext import FullTextSearchAdminMixin
+
+from .fulltext import BONUS_MALUS_EFFECT_INDEX, PLAYER_ABILITIES_INDEX
 from .models import PlayerCard, GoalkeeperCard, CoachCard, BonusMalusCard, CardRarity
 
 @admin.register(CardRarity)
@@ -7,9 +11,11 @@ class CardRarityAdmin(admin.ModelAdmin):
     search_fields = ['name']  # Aggiunge un campo di ricerca
 
 @admin.register(PlayerCard)
-class PlayerCardAdmin(admin.ModelAdmin):
+class PlayerCardAdmin(FullTextSearchAdminMixin, admin.ModelAdmin):
     list_display = ('name', 'team', 'rarity', 'attack', 'defense')
     list_filter = ('rarity',)
+    search_fields = ('name', 'abilities')
+    fulltext_index = PLAYER_ABILITIES_INDEX
 
 
 @admin.register(GoalkeeperCard)
@@ -25,8 +31,10 @@ class CoachCardAdmin(admin.ModelAdmin):
 
 
 @admin.register(BonusMalusCard)
-class BonusMalusCardAdmin(admin.ModelAdmin):
+class BonusMalusCardAdmin(FullTextSearchAdminMixin, admin.ModelAdmin):
     list_display = ('name', 'effect', 'duration', 'rarity')
     list_filter = ('rarity',)
+    search_fields = ('name', 'effect')
+    fulltext_index = BONUS_MALUS_EFFECT_INDEX
 
 
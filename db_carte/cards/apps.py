@@ -7,7 +7,18 @@ class CardsConfig(AppConfig):
     name = 'cards'
 
     def ready(self):
-        from .models import CardRarity
+        from db_carte.versioning import CATALOG, connect_version_signals
+
+        from .models import BonusMalusCard, CardRarity, CoachCard, GoalkeeperCard, PlayerCard
+
+        connect_version_signals(
+            CATALOG, CardRarity, PlayerCard, GoalkeeperCard, CoachCard, BonusMalusCard
+        )
+
+        from .fulltext import BONUS_MALUS_EFFECT_INDEX, PLAYER_ABILITIES_INDEX
+
+        PLAYER_ABILITIES_INDEX.connect(PlayerCard)
+        BONUS_MALUS_EFFECT_INDEX.connect(BonusMalusCard)
 
         def create_default_card_rarities(sender, **kwargs):
             default_rarities = [
@@ -0,0 +1,13 @@
+from db_carte.fulltext import FullTextIndex
+
+PLAYER_ABILITIES_INDEX = FullTextIndex(
+    table="cards_playercard_fts",
+    source_table="cards_playercard",
+    columns=("name", "abilities"),
+)
+
+BONUS_MALUS_EFFECT_INDEX = FullTextIndex(
+    table="cards_bonusmaluscard_fts",
+    source_table="cards_bonusmaluscard",
+    columns=("name", "effect"),
+)
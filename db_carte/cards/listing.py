@@ -0,0 +1,245 @@
+"""
+Query building for the per-type card list endpoints.
+
+Every card type is described by a ``CardListSpec``: the response fields with
+the model columns they need (so ``?fields=`` can be pushed down to
+``.only()``), the numeric stats that accept range filters and whether the type
+has a team. ``build_card_list`` turns the query string into a filtered,
+keyset-paginated queryset and the serialized rows.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Tuple, Type
+
+from django.db.models import Model, Q
+
+from .models import TEAMS, BonusMalusCard, CoachCard, GoalkeeperCard, PlayerCard
+
+MAX_PAGE_LIMIT = 500
+
+TEAM_CODES = {code for code, _ in TEAMS}
+
+
+class CardListError(ValueError):
+    """Raised when the list query string contains invalid values."""
+
+
+@dataclass(frozen=True)
+class CardField:
+    columns: Tuple[str, ...]
+    getter: Callable[[Any, Any], Any]
+
+
+@dataclass(frozen=True)
+class CardListSpec:
+    key: str
+    model: Type[Model]
+    fields: Dict[str, CardField]
+    # response name -> model column for the ``min_<name>``/``max_<name>`` filters
+    stats: Dict[str, str]
+    has_team: bool = True
+
+
+def _column(name: str) -> CardField:
+    return CardField(columns=(name,), getter=lambda card, request: getattr(card, name))
+
+
+def _image_url(card, request) -> Optional[str]:
+    return request.build_absolute_uri(f"/media/{card.image}") if card.image else None
+
+
+def _rarity_name(card, request) -> Optional[str]:
+    return card.rarity.name if card.rarity else None
+
+
+ID_FIELD = _column("id")
+NAME_FIELD = _column("name")
+TEAM_FIELD = _column("team")
+SEASON_FIELD = _column("season")
+IMAGE_FIELD = CardField(columns=("image",), getter=_image_url)
+RARITY_FIELD = CardField(columns=("rarity__name",), getter=_rarity_name)
+
+
+PLAYER_SPEC = CardListSpec(
+    key="player_cards",
+    model=PlayerCard,
+    fields={
+        "id": ID_FIELD,
+        "name": NAME_FIELD,
+        "team": TEAM_FIELD,
+        "attack": _column("attack"),
+        "defense": _column("defense"),
+        "abilities": _column("abilities"),
+        "image_url": IMAGE_FIELD,
+        "rarity": RARITY_FIELD,
+        "season": SEASON_FIELD,
+    },
+    stats={"attack": "attack", "defense": "defense"},
+)
+
+GOALKEEPER_SPEC = CardListSpec(
+    key="goalkeeper_cards",
+    model=GoalkeeperCard,
+    fields={
+        "id": ID_FIELD,
+        "name": NAME_FIELD,
+        "team": TEAM_FIELD,
+        "save": CardField(columns=("saves",), getter=lambda card, request: card.saves),
+        "abilities": _column("abilities"),
+        "image_url": IMAGE_FIELD,
+        "rarity": RARITY_FIELD,
+        "season": SEASON_FIELD,
+    },
+    stats={"save": "saves"},
+)
+
+COACH_SPEC = CardListSpec(
+    key="coach_cards",
+    model=CoachCard,
+    fields={
+        "id": ID_FIELD,
+        "name": NAME_FIELD,
+        "team": TEAM_FIELD,
+        "attack_bonus": _column("attack_bonus"),
+        "defense_bonus": _column("defense_bonus"),
+        "image_url": IMAGE_FIELD,
+        "rarity": RARITY_FIELD,
+        "season": SEASON_FIELD,
+    },
+    stats={"attack_bonus": "attack_bonus", "defense_bonus": "defense_bonus"},
+)
+
+BONUS_MALUS_SPEC = CardListSpec(
+    key="bonus_malus_cards",
+    model=BonusMalusCard,
+    fields={
+        "id": ID_FIELD,
+        "name": NAME_FIELD,
+        "effect": _column("effect"),
+        "duration": _column("duration"),
+        "image_url": IMAGE_FIELD,
+        "rarity": RARITY_FIELD,
+        "season": SEASON_FIELD,
+    },
+    stats={"duration": "duration"},
+    has_team=False,
+)
+
+CARD_LIST_SPECS: Tuple[CardListSpec, ...] = (
+    PLAYER_SPEC,
+    GOALKEEPER_SPEC,
+    COACH_SPEC,
+    BONUS_MALUS_SPEC,
+)
+
+
+def _split(value: Optional[str]) -> List[str]:
+    if not value:
+        return []
+    return [item.strip() for item in value.split(",") if item.strip()]
+
+
+def _parse_number(name: str, value: str) -> float:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        raise CardListError(f"'{name}' must be a number.")
+
+
+def _parse_int(name: str, value: Optional[str], default: Optional[int] = None) -> Optional[int]:
+    if value in (None, ""):
+        return default
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        raise CardListError(f"'{name}' must be an integer.")
+
+
+def resolve_fields(spec: CardListSpec, raw: Optional[str]) -> List[str]:
+    requested = _split(raw)
+    if not requested:
+        return list(spec.fields)
+    unknown = [name for name in requested if name not in spec.fields]
+    if unknown:
+        raise CardListError(f"Unknown fields: {', '.join(unknown)}.")
+    # The id is the pagination key, so it is always part of the response.
+    return ["id", *[name for name in requested if name != "id"]]
+
+
+def base_queryset(spec: CardListSpec, fields: List[str]):
+    columns = {column for name in fields for column in spec.fields[name].columns}
+    queryset = spec.model.objects.all()
+    if "rarity__name" in columns:
+        queryset = queryset.select_related("rarity")
+    return queryset.only(*columns).order_by("id")
+
+
+def apply_filters(spec: CardListSpec, queryset, params):
+    teams = [team.upper() for team in _split(params.get("team"))]
+    if teams and spec.has_team:
+        invalid = [team for team in teams if team not in TEAM_CODES]
+        if invalid:
+            raise CardListError(f"Unknown teams: {', '.join(invalid)}.")
+        queryset = queryset.filter(team__in=teams)
+
+    rarities = _split(params.get("rarity"))
+    if rarities:
+        # Rarity names are stored with mixed casing ("Common" and "common").
+        rarity_filter = Q()
+        for rarity in rarities:
+            rarity_filter |= Q(rarity__name__iexact=rarity)
+        queryset = queryset.filter(rarity_filter)
+
+    seasons = _split(params.get("season"))
+    if seasons:
+        queryset = queryset.filter(season__in=seasons)
+
+    for name, column in spec.stats.items():
+        minimum = params.get(f"min_{name}")
+        if minimum not in (None, ""):
+            queryset = queryset.filter(**{f"{column}__gte": _parse_number(f"min_{name}", minimum)})
+        maximum = params.get(f"max_{name}")
+        if maximum not in (None, ""):
+            queryset = queryset.filter(**{f"{column}__lte": _parse_number(f"max_{name}", maximum)})
+
+    return queryset
+
+
+def serialize_cards(spec: CardListSpec, cards, request, fields: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+    fields = fields or list(spec.fields)
+    getters = [(name, spec.fields[name].getter) for name in fields]
+    return [{name: getter(card, request) for name, getter in getters} for card in cards]
+
+
+def build_card_list(spec: CardListSpec, request) -> Dict[str, Any]:
+    """
+    Builds the payload of a per-type list endpoint. Without ``limit`` every
+    matching row is returned (the historical behaviour); with ``limit`` the
+    response also carries ``next_after``, the id to pass as ``after`` to get
+    the following page.
+    """
+
+    params = request.GET
+    fields = resolve_fields(spec, params.get("fields"))
+    queryset = apply_filters(spec, base_queryset(spec, fields), params)
+
+    after = _parse_int("after", params.get("after"))
+    if after is not None:
+        queryset = queryset.filter(id__gt=after)
+
+    limit = _parse_int("limit", params.get("limit"))
+    if limit is None:
+        return {spec.key: serialize_cards(spec, queryset, request, fields)}
+
+    if limit <= 0:
+        raise CardListError("'limit' must be positive.")
+    limit = min(limit, MAX_PAGE_LIMIT)
+    cards = list(queryset[: limit + 1])
+    has_more = len(cards) > limit
+    cards = cards[:limit]
+    return {
+        spec.key: serialize_cards(spec, cards, request, fields),
+        "next_after": cards[-1].id if has_more else None,
+    }
@@ -0,0 +1,26 @@
+from django.db import migrations
+
+from cards.fulltext import BONUS_MALUS_EFFECT_INDEX, PLAYER_ABILITIES_INDEX
+
+INDEXES = (PLAYER_ABILITIES_INDEX, BONUS_MALUS_EFFECT_INDEX)
+
+
+def create_fulltext_tables(apps, schema_editor):
+    for index in INDEXES:
+        index.create(schema_editor)
+
+
+def drop_fulltext_tables(apps, schema_editor):
+    for index in INDEXES:
+        index.drop(schema_editor)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cards', '0006_alter_goalkeepercard_saves'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_fulltext_tables, drop_fulltext_tables),
+    ]
@@ -0,0 +1,337 @@
+"""
+In-memory faceted search over the card catalog.
+
+The catalog is small enough to live in process memory, so the search endpoint
+never scans the card tables. ``CardSearchIndex`` keeps:
+
+- a prefix index and a trigram index over normalized card names;
+- one bitmap (a Python ``int``, bit ``i`` = document ``i``) per facet value
+  for type, team, rarity and season;
+- sorted value arrays for the numeric stats, turned into bitmaps by bisection.
+
+Queries are answered with bitwise operations, and facet counts are popcounts
+of the result bitmap intersected with each facet value. The index is rebuilt
+lazily whenever the catalog version token changes.
+"""
+
+from __future__ import annotations
+
+import threading
+import unicodedata
+from bisect import bisect_left, bisect_right
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from db_carte.versioning import CATALOG, get_version
+
+from .models import BonusMalusCard, CoachCard, GoalkeeperCard, PlayerCard
+
+FACETS = ("type", "team", "rarity", "season")
+# query parameter name -> model column
+NUMERIC_STATS = {"attack": "attack", "defense": "defense", "save": "saves"}
+
+MAX_PREFIX_LENGTH = 12
+DEFAULT_LIMIT = 20
+MAX_LIMIT = 100
+
+SEARCH_MODELS = (
+    ("player", PlayerCard),
+    ("goalkeeper", GoalkeeperCard),
+    ("coach", CoachCard),
+    ("bonus", BonusMalusCard),
+)
+
+
+class CardSearchError(ValueError):
+    """Raised when the search query string contains invalid values."""
+
+
+def normalize_text(value: str) -> str:
+    decomposed = unicodedata.normalize("NFKD", value or "")
+    stripped = "".join(char for char in decomposed if not unicodedata.combining(char))
+    return " ".join(stripped.lower().split())
+
+
+def _trigrams(text: str) -> Iterable[str]:
+    padded = f"  {text} "
+    return {padded[index:index + 3] for index in range(len(padded) - 2)}
+
+
+def _bitmap(indices: Iterable[int]) -> int:
+    bitmap = 0
+    for index in indices:
+        bitmap |= 1 << index
+    return bitmap
+
+
+def _iter_bits(bitmap: int) -> Iterable[int]:
+    while bitmap:
+        low = bitmap & -bitmap
+        yield low.bit_length() - 1
+        bitmap ^= low
+
+
+@dataclass
+class SearchDocument:
+    card_id: int
+    card_type: str
+    name: str
+    normalized_name: str
+    team: Optional[str]
+    rarity: Optional[str]
+    season: Optional[str]
+    image: str
+    stats: Dict[str, Optional[int]]
+
+
+@dataclass
+class SearchResult:
+    total: int
+    documents: List[Tuple[SearchDocument, int]]
+    facets: Dict[str, Dict[str, int]]
+
+
+class CardSearchIndex:
+    def __init__(self, documents: List[SearchDocument], version: Optional[str] = None):
+        self.version = version
+        self.documents = documents
+        self.all_bits = (1 << len(documents)) - 1
+        self.numeric: Dict[str, Tuple[List[int], List[int]]] = {}
+
+        prefixes: Dict[str, List[int]] = {}
+        trigrams: Dict[str, List[int]] = {}
+        facets: Dict[str, Dict[str, List[int]]] = {facet: {} for facet in FACETS}
+        numeric: Dict[str, List[Tuple[int, int]]] = {stat: [] for stat in NUMERIC_STATS}
+
+        for index, document in enumerate(documents):
+            for token in document.normalized_name.split():
+                for length in range(1, min(len(token), MAX_PREFIX_LENGTH) + 1):
+                    prefixes.setdefault(token[:length], []).append(index)
+            for trigram in _trigrams(document.normalized_name):
+                trigrams.setdefault(trigram, []).append(index)
+            for facet in FACETS:
+                value = getattr(document, "card_type" if facet == "type" else facet)
+                if value:
+                    facets[facet].setdefault(value, []).append(index)
+            for stat, value in document.stats.items():
+                if value is not None:
+                    numeric[stat].append((value, index))
+
+        self.prefixes = {key: _bitmap(indices) for key, indices in prefixes.items()}
+        self.trigrams = {key: _bitmap(indices) for key, indices in trigrams.items()}
+        self.facets = {
+            facet: {value: _bitmap(indices) for value, indices in values.items()}
+            for facet, values in facets.items()
+        }
+        for stat, pairs in numeric.items():
+            pairs.sort()
+            self.numeric[stat] = ([value for value, _ in pairs], [index for _, index in pairs])
+
+    @classmethod
+    def build(cls, version: Optional[str] = None) -> "CardSearchIndex":
+        documents: List[SearchDocument] = []
+        for card_type, model in SEARCH_MODELS:
+            columns = ["id", "name", "season", "image", "rarity__name"]
+            columns += [field for field in ("team", "attack", "defense", "saves") if _has_field(model, field)]
+            for card in model.objects.select_related("rarity").only(*columns).order_by("id"):
+                documents.append(
+                    SearchDocument(
+                        card_id=card.pk,
+                        card_type=card_type,
+                        name=card.name,
+                        normalized_name=normalize_text(card.name),
+                        team=getattr(card, "team", None),
+                        rarity=card.rarity.name.lower() if card.rarity else None,
+                        season=card.season,
+                        image=card.image.name if card.image else "",
+                        stats={stat: getattr(card, column, None) for stat, column in NUMERIC_STATS.items()},
+                    )
+                )
+        return cls(documents, version=version)
+
+    def _text_bitmap(self, tokens: List[str]) -> int:
+        bitmap = self.all_bits
+        for token in tokens:
+            token_bits = self.prefixes.get(token, 0) if len(token) <= MAX_PREFIX_LENGTH else 0
+            if len(token) >= 3:
+                # Infix matches: every trigram of the fragment must be present.
+                infix = self.all_bits
+                for index in range(len(token) - 2):
+                    infix &= self.trigrams.get(token[index:index + 3], 0)
+                    if not infix:
+                        break
+                token_bits |= infix
+            bitmap &= token_bits
+            if not bitmap:
+                break
+        return bitmap
+
+    def _range_bitmap(self, stat: str, minimum: Optional[float], maximum: Optional[float]) -> int:
+        values, indices = self.numeric[stat]
+        start = 0 if minimum is None else bisect_left(values, minimum)
+        end = len(values) if maximum is None else bisect_right(values, maximum)
+        return _bitmap(indices[start:end])
+
+    def _facet_bitmap(self, facet: str, values: List[str]) -> int:
+        bitmap = 0
+        for value in values:
+            bitmap |= self.facets[facet].get(value, 0)
+        return bitmap
+
+    def _score(self, document: SearchDocument, phrase: str, tokens: List[str]) -> int:
+        if not phrase:
+            return 0
+        name = document.normalized_name
+        if name == phrase:
+            return 100
+        score = 50 if name.startswith(phrase) else 0
+        words = name.split()
+        for token in tokens:
+            if any(word == token for word in words):
+                score += 20
+            elif any(word.startswith(token) for word in words):
+                score += 10
+            else:
+                score += 2
+        return score
+
+    def search(
+        self,
+        text: str = "",
+        facet_filters: Optional[Dict[str, List[str]]] = None,
+        ranges: Optional[Dict[str, Tuple[Optional[float], Optional[float]]]] = None,
+        limit: int = DEFAULT_LIMIT,
+        offset: int = 0,
+    ) -> SearchResult:
+        phrase = normalize_text(text)
+        tokens = phrase.split()
+        facet_filters = {facet: values for facet, values in (facet_filters or {}).items() if values}
+
+        base = self._text_bitmap(tokens) if tokens else self.all_bits
+        for stat, (minimum, maximum) in (ranges or {}).items():
+            base &= self._range_bitmap(stat, minimum, maximum)
+
+        facet_bits = {facet: self._facet_bitmap(facet, values) for facet, values in facet_filters.items()}
+        matched = base
+        for bits in facet_bits.values():
+            matched &= bits
+
+        # Disjunctive facet counts: each facet is counted without its own filter
+        # so clients can show how many results picking another value would give.
+        facets: Dict[str, Dict[str, int]] = {}
+        for facet in FACETS:
+            scope = base
+            for other, bits in facet_bits.items():
+                if other != facet:
+                    scope &= bits
+            counts = {
+                value: (scope & bits).bit_count()
+                for value, bits in self.facets[facet].items()
+            }
+            facets[facet] = {value: count for value, count in sorted(counts.items()) if count}
+
+        ranked = sorted(
+            (
+                (self.documents[index], self._score(self.documents[index], phrase, tokens))
+                for index in _iter_bits(matched)
+            ),
+            key=lambda entry: (-entry[1], entry[0].normalized_name, entry[0].card_type, entry[0].card_id),
+        )
+        return SearchResult(
+            total=len(ranked),
+            documents=ranked[offset:offset + limit],
+            facets=facets,
+        )
+
+
+def _has_field(model, name: str) -> bool:
+    return any(field.name == name for field in model._meta.get_fields())
+
+
+_index: Optional[CardSearchIndex] = None
+_index_lock = threading.Lock()
+
+
+def get_search_index() -> CardSearchIndex:
+    global _index
+    version = get_version(CATALOG)
+    index = _index
+    if index is not None and index.version == version:
+        return index
+    with _index_lock:
+        if _index is None or _index.version != version:
+            _index = CardSearchIndex.build(version=version)
+        return _index
+
+
+def _parse_number(name: str, value: Optional[str]) -> Optional[float]:
+    if value in (None, ""):
+        return None
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        raise CardSearchError(f"'{name}' must be a number.")
+
+
+def _parse_int(name: str, value: Optional[str], default: int) -> int:
+    if value in (None, ""):
+        return default
+    try:
+        parsed = int(value)
+    except (TypeError, ValueError):
+        raise CardSearchError(f"'{name}' must be an integer.")
+    if parsed < 0:
+        raise CardSearchError(f"'{name}' must not be negative.")
+    return parsed
+
+
+def search_cards(params, request=None) -> Dict[str, Any]:
+    facet_filters: Dict[str, List[str]] = {}
+    for facet in FACETS:
+        values = [value.strip() for value in (params.get(facet) or "").split(",") if value.strip()]
+        if facet == "team":
+            values = [value.upper() for value in values]
+        elif facet in ("rarity", "type"):
+            values = [value.lower() for value in values]
+        facet_filters[facet] = values
+
+    ranges = {}
+    for stat in NUMERIC_STATS:
+        minimum = _parse_number(f"min_{stat}", params.get(f"min_{stat}"))
+        maximum = _parse_number(f"max_{stat}", params.get(f"max_{stat}"))
+        if minimum is not None or maximum is not None:
+            ranges[stat] = (minimum, maximum)
+
+    limit = min(_parse_int("limit", params.get("limit"), DEFAULT_LIMIT), MAX_LIMIT)
+    offset = _parse_int("offset", params.get("offset"), 0)
+
+    result = get_search_index().search(
+        text=params.get("q") or "",
+        facet_filters=facet_filters,
+        ranges=ranges,
+        limit=limit,
+        offset=offset,
+    )
+
+    return {
+        "total": result.total,
+        "results": [
+            {
+                "id": document.card_id,
+                "type": document.card_type,
+                "name": document.name,
+                "team": document.team,
+                "rarity": document.rarity,
+                "season": document.season,
+                **{stat: value for stat, value in document.stats.items() if value is not None},
+                "image_url": (
+                    request.build_absolute_uri(f"/media/{document.image}")
+                    if request is not None and document.image
+                    else None
+                ),
+                "score": score,
+            }
+            for document, score in result.documents
+        ],
+        "facets": result.facets,
+    }
@@ -9,6 +9,8 @@ urlpatterns = [
     path('coach/', views.coach_cards_list, name='coach_cards_list'),  # Carte allenatore
     path('bonus_malus/', views.bonus_malus_cards_list, name='bonus_malus_cards_list'),  # Carte bonus/malus
     path('all/', views.all_cards_list, name='all_cards_list'),  # Tutte le carte
+    path('search/', views.card_search, name='card_search'),  # Ricerca a faccette
+    path('search/text/', views.card_text_search, name='card_text_search'),  # Ricerca full-text
 ]
 
 if settings.DEBUG:
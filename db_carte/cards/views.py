@@ -1,143 +1,93 @@
-from django.http import JsonResponse
-from .models import PlayerCard, GoalkeeperCard, CoachCard, BonusMalusCard
+from django.views.decorators.http import condition
+
+from db_carte.renderers import render_payload
+from db_carte.versioning import CATALOG, versioned_etag
+
+from .fulltext import BONUS_MALUS_EFFECT_INDEX, PLAYER_ABILITIES_INDEX
+from .listing import (
+    BONUS_MALUS_SPEC,
+    CARD_LIST_SPECS,
+    COACH_SPEC,
+    GOALKEEPER_SPEC,
+    PLAYER_SPEC,
+    CardListError,
+    base_queryset,
+    build_card_list,
+    resolve_fields,
+    serialize_cards,
+)
+from .search import CardSearchError, search_cards
 import logging
 
 logger = logging.getLogger(__name__)
 
+catalog_etag = versioned_etag(CATALOG)
+
+
+def _card_list_response(request, spec):
+    try:
+        payload = build_card_list(spec, request)
+    except CardListError as exc:
+        return render_payload(request, {"error": str(exc)}, status=400)
+    return render_payload(request, payload)
+
+
 # Endpoint per tutte le carte giocatore
+@condition(etag_func=catalog_etag)
 def player_cards_list(request):
-    player_cards = PlayerCard.objects.all()
-    data = [
-        {
-            "id": card.id,
-            "name": card.name,
-            "team": card.team,
-            "attack": card.attack,
-            "defense": card.defense,
-            "abilities": card.abilities,
-            "image_url": request.build_absolute_uri(f"/media/{card.image}") if card.image else None,
-            "rarity": card.rarity.name if card.rarity else None,
-            "season": card.season,
-        }
-        for card in player_cards
-    ]
-    return JsonResponse({"player_cards": data})
+    return _card_list_response(request, PLAYER_SPEC)
 
 # Endpoint per tutte le carte allenatore
+@condition(etag_func=catalog_etag)
 def coach_cards_list(request):
-    coach_cards = CoachCard.objects.all()
-    data = [
-        {
-            "id": card.id,
-            "name": card.name,
-            "team": card.team,
-            "attack_bonus": card.attack_bonus,
-            "defense_bonus": card.defense_bonus,
-            "image_url": request.build_absolute_uri(f"/media/{card.image}") if card.image else None,
-            "rarity": card.rarity.name if card.rarity else None,
-            "season": card.season,
-        }
-        for card in coach_cards
-    ]
-    return JsonResponse({"coach_cards": data})
+    return _card_list_response(request, COACH_SPEC)
 
 # Endpoint per tutte le carte bonus/malus
+@condition(etag_func=catalog_etag)
 def bonus_malus_cards_list(request):
-    bonus_malus_cards = BonusMalusCard.objects.all()
-    data = [
-        {
-            "id": card.id,
-            "name": card.name,
-            "effect": card.effect,
-            "duration": card.duration,
-            "image_url": request.build_absolute_uri(f"/media/{card.image}") if card.image else None,
-            "rarity": card.rarity.name if card.rarity else None,
-            "season": card.season,
-        }
-        for card in bonus_malus_cards
-    ]
-    return JsonResponse({"bonus_malus_cards": data})
+    return _card_list_response(request, BONUS_MALUS_SPEC)
 
 # Endpoint generale per tutte le carte
+@condition(etag_func=catalog_etag)
 def all_cards_list(request):
     try:
-        player_cards = PlayerCard.objects.all()
-        goalkeeper_cards = GoalkeeperCard.objects.all()
-        coach_cards = CoachCard.objects.all()
-        bonus_malus_cards = BonusMalusCard.objects.all()
+        data = {
+            spec.key: serialize_cards(spec, base_queryset(spec, list(spec.fields)), request)
+            for spec in CARD_LIST_SPECS
+        }
     except Exception as e:
         logger.error(f"Errore durante il recupero delle carte: {e}")
-        return JsonResponse({"error": "Errore interno del server"}, status=500)
+        return render_payload(request, {"error": "Errore interno del server"}, status=500)
 
-    data = {
-        "player_cards": [
-            {
-                "id": card.id,
-                "name": card.name,
-                "team": card.team,
-                "attack": card.attack,
-                "defense": card.defense,
-                "abilities": card.abilities,
-                "image_url": request.build_absolute_uri(f"/media/{card.image}") if card.image else None,
-                "rarity": card.rarity.name if card.rarity else None,
-                "season": card.season,
-            }
-            for card in player_cards
-        ],
-        "goalkeeper_cards": [
-            {
-                "id": card.id,
-                "name": card.name,
-                "team": card.team,
-                "save": card.saves,
-                "abilities": card.abilities,
-                "image_url": request.build_absolute_uri(f"/media/{card.image}") if card.image else None,
-                "rarity": card.rarity.name if card.rarity else None,
-                "season": card.season,
-            }
-            for card in goalkeeper_cards
-        ],
-        "coach_cards": [
-            {
-                "id": card.id,
-                "name": card.name,
-                "team": card.team,
-                "attack_bonus": card.attack_bonus,
-                "defense_bonus": card.defense_bonus,
-                "image_url": request.build_absolute_uri(f"/media/{card.image}") if card.image else None,
-                "rarity": card.rarity.name if card.rarity else None,
-                "season": card.season,
-            }
-            for card in coach_cards
-        ],
-        "bonus_malus_cards": [
-            {
-                "id": card.id,
-                "name": card.name,
-                "effect": card.effect,
-                "duration": card.duration,
-                "image_url": request.build_absolute_uri(f"/media/{card.image}") if card.image else None,
-                "rarity": card.rarity.name if card.rarity else None,
-                "season": card.season,
-            }
-            for card in bonus_malus_cards
-        ],
-    }
-    return JsonResponse(data)
+    return render_payload(request, data)
 # Endpoint per tutte le carte portiere
+@condition(etag_func=catalog_etag)
 def goalkeeper_cards_list(request):
-    goalkeeper_cards = GoalkeeperCard.objects.all()
-    data = [
-        {
-            "id": card.id,
-            "name": card.name,
-            "team": card.team,
-            "save": card.saves,
-            "abilities": card.abilities,
-            "image_url": request.build_absolute_uri(f"/media/{card.image}") if card.image else None,
-            "rarity": card.rarity.name if card.rarity else None,
-            "season": card.season,
-        }
-        for card in goalkeeper_cards
-    ]
-    return JsonResponse({"goalkeeper_cards": data})
+    return _card_list_response(request, GOALKEEPER_SPEC)
+
+# Ricerca a faccette sul catalogo (indice in memoria)
+@condition(etag_func=catalog_etag)
+def card_search(request):
+    try:
+        payload = search_cards(request.GET, request=request)
+    except CardSearchError as exc:
+        return render_payload(request, {"error": str(exc)}, status=400)
+    return render_payload(request, payload)
+
+# Ricerca full-text su abilità e effetti delle carte
+@condition(etag_func=catalog_etag)
+def card_text_search(request):
+    query = (request.GET.get("q") or "").strip()
+    if not query:
+        return render_payload(request, {"error": "Provide a search query with 'q'."}, status=400)
+    try:
+        limit = min(max(int(request.GET.get("limit", 20)), 1), 100)
+    except (TypeError, ValueError):
+        return render_payload(request, {"error": "'limit' must be an integer."}, status=400)
+
+    payload = {}
+    for spec, index in ((PLAYER_SPEC, PLAYER_ABILITIES_INDEX), (BONUS_MALUS_SPEC, BONUS_MALUS_EFFECT_INDEX)):
+        fields = resolve_fields(spec, None)
+        cards = index.search(base_queryset(spec, fields), query, limit)
+        payload[spec.key] = serialize_cards(spec, cards, request, fields)
+    return render_payload(request, payload)
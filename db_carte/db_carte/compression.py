@@ -0,0 +1,130 @@
+"""
+Response compression with a cache of precompressed bodies.
+
+``CompressionMiddleware`` negotiates ``Accept-Encoding`` (brotli when the
+optional ``brotli`` package is installed, otherwise gzip) and compresses
+bodies larger than ``COMPRESSION_MIN_SIZE``. Responses that carry an ETag are
+versioned, so their compressed bytes are stored in the cache under the ETag
+and reused: a popular payload is compressed once per version instead of once
+per request.
+"""
+
+from __future__ import annotations
+
+import hashlib
+from typing import Optional
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.cache import patch_vary_headers
+from django.utils.regex_helper import _lazy_re_compile
+from django.utils.text import compress_string
+
+try:  # pragma: no cover - optional dependency
+    import brotli
+except ImportError:  # pragma: no cover - optional dependency
+    brotli = None
+
+
+GZIP = "gzip"
+BROTLI = "br"
+
+# Server preference when the client accepts several encodings with the same q.
+_PREFERENCE = (BROTLI, GZIP) if brotli is not None else (GZIP,)
+
+_STRONG_ETAG = _lazy_re_compile(r'^"')
+
+
+def negotiate_encoding(header: str) -> Optional[str]:
+    qualities = {}
+    for item in header.split(","):
+        parts = [part.strip() for part in item.split(";")]
+        coding = parts[0].lower()
+        if not coding:
+            continue
+        quality = 1.0
+        for param in parts[1:]:
+            if param.startswith("q="):
+                try:
+                    quality = float(param[2:])
+                except ValueError:
+                    quality = 0.0
+        qualities[coding] = quality
+
+    wildcard = qualities.get("*", 0.0)
+    best, best_quality = None, 0.0
+    for coding in _PREFERENCE:
+        quality = qualities.get(coding, wildcard)
+        if quality > best_quality:
+            best, best_quality = coding, quality
+    return best
+
+
+def compress_body(content: bytes, encoding: str, cached: bool = False) -> bytes:
+    if encoding == BROTLI:
+        # Cached bodies are compressed once per version, so they can afford
+        # the slowest, densest setting.
+        quality = settings.COMPRESSION_BROTLI_QUALITY_CACHED if cached else settings.COMPRESSION_BROTLI_QUALITY
+        return brotli.compress(content, quality=quality)
+    return compress_string(content)
+
+
+def _cache_key(request, response, etag: str, encoding: str) -> str:
+    fingerprint = "|".join(
+        (
+            request.get_full_path(),
+            response.get("Content-Type", ""),
+            etag,
+        )
+    )
+    digest = hashlib.sha1(fingerprint.encode("utf-8")).hexdigest()
+    return f"compressed-response:{digest}:{encoding}"
+
+
+class CompressionMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        return self.process_response(request, response)
+
+    def process_response(self, request, response):
+        if response.streaming or response.has_header("Content-Encoding"):
+            return response
+
+        patch_vary_headers(response, ("Accept-Encoding",))
+
+        if len(response.content) < settings.COMPRESSION_MIN_SIZE:
+            return response
+
+        encoding = negotiate_encoding(request.META.get("HTTP_ACCEPT_ENCODING", ""))
+        if encoding is None:
+            return response
+
+        etag = response.get("ETag")
+        cacheable = bool(etag) and request.method in ("GET", "HEAD") and response.status_code == 200
+
+        compressed = None
+        cache_key = None
+        if cacheable:
+            cache_key = _cache_key(request, response, etag, encoding)
+            compressed = cache.get(cache_key)
+        if compressed is None:
+            compressed = compress_body(response.content, encoding, cached=cacheable)
+            if cache_key is not None:
+                cache.set(cache_key, compressed, settings.COMPRESSION_CACHE_TIMEOUT)
+
+        if len(compressed) >= len(response.content):
+            return response
+
+        response.content = compressed
+        response["Content-Length"] = str(len(compressed))
+        response["Content-Encoding"] = encoding
+
+        # The compressed body is a different byte sequence, so a strong ETag
+        # must be weakened (same behaviour as Django's GZipMiddleware).
+        if etag and _STRONG_ETAG.match(etag):
+            response["ETag"] = "W/" + etag
+
+        return response
@@ -0,0 +1,66 @@
+"""
+Concurrency-safe counter rows shared by the apps.
+
+``increment_counters`` adds deltas to rows identified by a tuple of key
+fields: one INSERT of the missing rows (ignoring the ones that already
+exist) and one UPDATE adding every delta in place with ``F() + CASE``, so
+concurrent increments never get lost. Keys are processed in chunks of
+``MAX_KEYS_PER_STATEMENT``: every key adds a term to the WHERE clause and a
+branch to the CASE, and SQLite rejects expression trees deeper than 1000.
+"""
+
+from __future__ import annotations
+
+from typing import Callable, Dict, Hashable, Optional, Sequence, Tuple
+
+from django.db import models
+from django.db.models import Case, F, Q, Value, When
+
+MAX_KEYS_PER_STATEMENT = 500
+
+Key = Tuple[Hashable, ...]
+
+
+def _increment_chunk(
+    model,
+    key_field_names: Sequence[str],
+    increments: Dict[Key, Dict[str, int]],
+    defaults: Optional[Callable[[Key], Dict]],
+) -> None:
+    model.objects.bulk_create(
+        [model(**dict(zip(key_field_names, key)), **(defaults(key) if defaults else {})) for key in increments],
+        ignore_conflicts=True,
+    )
+    keys = Q()
+    for key in increments:
+        keys |= Q(**dict(zip(key_field_names, key)))
+    fields = {field for values in increments.values() for field in values}
+    updates = {}
+    for field in fields:
+        whens = [
+            When(Q(**dict(zip(key_field_names, key))), then=Value(values[field]))
+            for key, values in increments.items()
+            if values.get(field)
+        ]
+        if whens:
+            updates[field] = F(field) + Case(*whens, default=Value(0), output_field=models.BigIntegerField())
+    model.objects.filter(keys).update(**updates)
+
+
+def increment_counters(
+    model,
+    key_field_names: Sequence[str],
+    increments: Dict[Key, Dict[str, int]],
+    defaults: Optional[Callable[[Key], Dict]] = None,
+    chunk_size: int = MAX_KEYS_PER_STATEMENT,
+) -> None:
+    """
+    Adds ``increments`` (``{key: {field: delta}}``) to the counter rows of
+    ``model`` identified by ``key_field_names``, creating the missing rows
+    with ``defaults(key)`` for their other columns. ``key_field_names`` must
+    be covered by a unique constraint.
+    """
+
+    items = [(key, values) for key, values in increments.items() if any(values.values())]
+    for start in range(0, len(items), chunk_size):
+        _increment_chunk(model, key_field_names, dict(items[start : start + chunk_size]), defaults)
@@ -0,0 +1,176 @@
+"""
+SQLite FTS5 full-text indexes mirrored from regular model tables.
+
+A ``FullTextIndex`` describes an FTS5 virtual table whose ``rowid`` is the
+primary key of the source row. Migrations create and backfill the table,
+``post_save``/``post_delete`` signals keep it in sync, and searches use the
+FTS5 ``MATCH`` operator ranked by bm25. On other database backends (or SQLite
+builds without FTS5) every method falls back to ``icontains`` filters, so
+callers never need to know which engine answered.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import List, Optional, Tuple
+
+from django.db import DatabaseError, connections, router, transaction
+from django.db.models import Q
+from django.db.models.expressions import RawSQL
+from django.db.models.signals import post_delete, post_migrate, post_save
+
+_availability: dict = {}
+
+
+def _reset_availability(**kwargs) -> None:
+    _availability.clear()
+
+
+post_migrate.connect(_reset_availability, dispatch_uid="fulltext-reset-availability")
+
+
+def build_match_query(text: str) -> str:
+    """
+    Turns free user input into a safe FTS5 expression: every word becomes a
+    quoted prefix term and the terms are implicitly AND-ed.
+    """
+
+    terms = []
+    for word in text.split():
+        cleaned = word.replace('"', '""')
+        terms.append(f'"{cleaned}"*')
+    return " ".join(terms)
+
+
+@dataclass(frozen=True)
+class FullTextIndex:
+    table: str
+    source_table: str
+    columns: Tuple[str, ...]
+
+    # -- schema -----------------------------------------------------------
+
+    def create(self, schema_editor) -> None:
+        """Creates and backfills the FTS table; a no-op without FTS5 support."""
+
+        if schema_editor.connection.vendor != "sqlite":
+            return
+        columns = ", ".join(self.columns)
+        try:
+            with transaction.atomic(using=schema_editor.connection.alias):
+                schema_editor.execute(
+                    f"CREATE VIRTUAL TABLE IF NOT EXISTS {self.table} USING fts5({columns})"
+                )
+        except DatabaseError:
+            # SQLite compiled without FTS5: searches use the icontains fallback.
+            return
+        schema_editor.execute(
+            f"INSERT INTO {self.table} (rowid, {columns}) "
+            f"SELECT id, {columns} FROM {self.source_table}"
+        )
+
+    def drop(self, schema_editor) -> None:
+        if schema_editor.connection.vendor != "sqlite":
+            return
+        schema_editor.execute(f"DROP TABLE IF EXISTS {self.table}")
+
+    def is_available(self, using: str = "default") -> bool:
+        key = (using, self.table)
+        if key not in _availability:
+            connection = connections[using]
+            _availability[key] = (
+                connection.vendor == "sqlite"
+                and self.table in connection.introspection.table_names()
+            )
+        return _availability[key]
+
+    # -- synchronisation --------------------------------------------------
+
+    def sync(self, instance) -> None:
+        using = router.db_for_write(type(instance), instance=instance)
+        if not self.is_available(using):
+            return
+        columns = ", ".join(self.columns)
+        placeholders = ", ".join(["%s"] * (len(self.columns) + 1))
+        values = [getattr(instance, column) or "" for column in self.columns]
+        with connections[using].cursor() as cursor:
+            cursor.execute(f"DELETE FROM {self.table} WHERE rowid = %s", [instance.pk])
+            cursor.execute(
+                f"INSERT INTO {self.table} (rowid, {columns}) VALUES ({placeholders})",
+                [instance.pk, *values],
+            )
+
+    def remove(self, instance) -> None:
+        using = router.db_for_write(type(instance), instance=instance)
+        if not self.is_available(using):
+            return
+        with connections[using].cursor() as cursor:
+            cursor.execute(f"DELETE FROM {self.table} WHERE rowid = %s", [instance.pk])
+
+    def connect(self, model) -> None:
+        def _saved(sender, instance, raw=False, **kwargs):
+            if not raw:
+                self.sync(instance)
+
+        def _deleted(sender, instance, **kwargs):
+            self.remove(instance)
+
+        dispatch_uid = f"fulltext:{self.table}"
+        post_save.connect(_saved, sender=model, weak=False, dispatch_uid=dispatch_uid)
+        post_delete.connect(_deleted, sender=model, weak=False, dispatch_uid=dispatch_uid)
+
+    # -- querying ---------------------------------------------------------
+
+    def _fallback_filter(self, text: str) -> Q:
+        condition = Q()
+        for word in text.split():
+            word_condition = Q()
+            for column in self.columns:
+                word_condition |= Q(**{f"{column}__icontains": word})
+            condition &= word_condition
+        return condition
+
+    def filter(self, queryset, text: str):
+        """Restricts ``queryset`` to rows matching ``text`` (unranked)."""
+
+        match = build_match_query(text)
+        if not match:
+            return queryset
+        if not self.is_available(queryset.db):
+            return queryset.filter(self._fallback_filter(text))
+        return queryset.filter(
+            pk__in=RawSQL(f"SELECT rowid FROM {self.table} WHERE {self.table} MATCH %s", [match])
+        )
+
+    def search(self, queryset, text: str, limit: int) -> List:
+        """Returns up to ``limit`` rows of ``queryset`` ordered by relevance."""
+
+        match = build_match_query(text)
+        if not match:
+            return []
+        if not self.is_available(queryset.db):
+            return list(queryset.filter(self._fallback_filter(text)).order_by("pk")[:limit])
+
+        with connections[queryset.db].cursor() as cursor:
+            cursor.execute(
+                f"SELECT rowid FROM {self.table} WHERE {self.table} MATCH %s ORDER BY rank LIMIT %s",
+                [match, limit],
+            )
+            ranked_ids = [row[0] for row in cursor.fetchall()]
+        rows = queryset.in_bulk(ranked_ids)
+        return [rows[pk] for pk in ranked_ids if pk in rows]
+
+
+class FullTextSearchAdminMixin:
+    """
+    Routes the admin search box through ``fulltext_index`` when FTS5 is
+    available; otherwise the regular ``search_fields`` lookup is used.
+    """
+
+    fulltext_index: Optional[FullTextIndex] = None
+
+    def get_search_results(self, request, queryset, search_term):
+        index = self.fulltext_index
+        if index is None or not search_term.strip() or not index.is_available(queryset.db):
+            return super().get_search_results(request, queryset, search_term)
+        return index.filter(queryset, search_term), False
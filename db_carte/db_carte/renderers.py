@@ -0,0 +1,217 @@
+"""
+Binary content negotiation shared by the card, pack and exchange endpoints.
+
+Clients that send ``Accept: application/msgpack`` (or ``application/cbor``)
+receive the same payload encoded in a compact binary format. Passing
+``?layout=columnar`` turns every list of objects into a columnar table
+(``{"fields": [...], "rows": [[...], ...]}``) so repeated keys are sent once.
+Both encoders are optional dependencies: when a library is not installed the
+corresponding media type is simply not offered and JSON is returned instead.
+"""
+
+from __future__ import annotations
+
+import datetime
+import decimal
+import uuid
+from typing import Any, Callable, Dict, List, Tuple
+
+from django.http import HttpResponse, JsonResponse
+from django.utils.cache import patch_vary_headers
+from rest_framework.renderers import BaseRenderer
+from rest_framework.settings import api_settings
+
+try:  # pragma: no cover - optional dependency
+    import msgpack
+except ImportError:  # pragma: no cover - optional dependency
+    msgpack = None
+
+try:  # pragma: no cover - optional dependency
+    import cbor2
+except ImportError:  # pragma: no cover - optional dependency
+    cbor2 = None
+
+
+MSGPACK_MEDIA_TYPE = "application/msgpack"
+CBOR_MEDIA_TYPE = "application/cbor"
+JSON_MEDIA_TYPE = "application/json"
+
+LAYOUT_PARAM = "layout"
+COLUMNAR_LAYOUT = "columnar"
+
+
+def _encode_default(value: Any) -> Any:
+    if isinstance(value, decimal.Decimal):
+        return float(value)
+    if isinstance(value, (datetime.datetime, datetime.date, datetime.time)):
+        return value.isoformat()
+    if isinstance(value, uuid.UUID):
+        return str(value)
+    raise TypeError(f"Unsupported type for binary encoding: {type(value).__name__}")
+
+
+def _msgpack_dumps(data: Any) -> bytes:
+    return msgpack.packb(data, default=_encode_default, use_bin_type=True)
+
+
+def _cbor_dumps(data: Any) -> bytes:
+    return cbor2.dumps(data, default=lambda _encoder, value: _encoder.encode(_encode_default(value)))
+
+
+BINARY_CODECS: Dict[str, Callable[[Any], bytes]] = {}
+if msgpack is not None:
+    BINARY_CODECS[MSGPACK_MEDIA_TYPE] = _msgpack_dumps
+if cbor2 is not None:
+    BINARY_CODECS[CBOR_MEDIA_TYPE] = _cbor_dumps
+
+
+def _parse_accept(header: str) -> List[Tuple[str, float]]:
+    accepted: List[Tuple[str, float, int]] = []
+    for position, item in enumerate(header.split(",")):
+        parts = [part.strip() for part in item.split(";")]
+        media_type = parts[0].lower()
+        if not media_type:
+            continue
+        quality = 1.0
+        for param in parts[1:]:
+            if param.startswith("q="):
+                try:
+                    quality = float(param[2:])
+                except ValueError:
+                    quality = 0.0
+        accepted.append((media_type, quality, -position))
+    accepted.sort(key=lambda entry: (entry[1], entry[2]), reverse=True)
+    return [(media_type, quality) for media_type, quality, _ in accepted]
+
+
+def negotiate_media_type(request) -> str:
+    """
+    Returns the binary media type preferred by the client, or JSON when the
+    client did not ask for one of the installed binary codecs.
+    """
+
+    header = request.META.get("HTTP_ACCEPT", "")
+    for media_type, quality in _parse_accept(header):
+        if quality <= 0:
+            continue
+        if media_type in BINARY_CODECS:
+            return media_type
+        if media_type in (JSON_MEDIA_TYPE, "application/*", "*/*"):
+            return JSON_MEDIA_TYPE
+    return JSON_MEDIA_TYPE
+
+
+def to_columnar(rows: List[Dict[str, Any]]) -> Dict[str, Any]:
+    fields: List[str] = []
+    seen = set()
+    for row in rows:
+        for key in row:
+            if key not in seen:
+                seen.add(key)
+                fields.append(key)
+    return {
+        "fields": fields,
+        "rows": [[row.get(field) for field in fields] for row in rows],
+    }
+
+
+def _is_object_list(value: Any) -> bool:
+    # Empty lists count too, so an endpoint keeps one shape whether or not it has rows.
+    return isinstance(value, list) and all(isinstance(item, dict) for item in value)
+
+
+def apply_layout(request, payload: Any) -> Any:
+    """
+    Applies the ``?layout=columnar`` option to a payload. Top-level lists of
+    objects (either the payload itself or its values) become columnar tables.
+    """
+
+    if request is None or request.GET.get(LAYOUT_PARAM) != COLUMNAR_LAYOUT:
+        return payload
+    if _is_object_list(payload):
+        return to_columnar(payload)
+    if isinstance(payload, dict):
+        return {
+            key: to_columnar(value) if _is_object_list(value) else value
+            for key, value in payload.items()
+        }
+    return payload
+
+
+def render_payload(request, payload: Any, status: int = 200) -> HttpResponse:
+    """
+    Content-negotiated replacement for ``JsonResponse`` used by the plain
+    Django views.
+    """
+
+    payload = apply_layout(request, payload)
+    media_type = negotiate_media_type(request)
+    if media_type == JSON_MEDIA_TYPE:
+        response = JsonResponse(payload, status=status, safe=False)
+    else:
+        response = HttpResponse(
+            BINARY_CODECS[media_type](payload),
+            status=status,
+            content_type=media_type,
+        )
+    patch_vary_headers(response, ("Accept",))
+    return response
+
+
+class MessagePackRenderer(BaseRenderer):
+    media_type = MSGPACK_MEDIA_TYPE
+    format = "msgpack"
+    charset = None
+    render_style = "binary"
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+        return _msgpack_dumps(data)
+
+
+class CBORRenderer(BaseRenderer):
+    media_type = CBOR_MEDIA_TYPE
+    format = "cbor"
+    charset = None
+    render_style = "binary"
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+        return _cbor_dumps(data)
+
+
+def binary_renderer_classes() -> List[type]:
+    renderers: List[type] = []
+    if msgpack is not None:
+        renderers.append(MessagePackRenderer)
+    if cbor2 is not None:
+        renderers.append(CBORRenderer)
+    return renderers
+
+
+# Renderer list for DRF views: the configured defaults (JSON first, so it stays
+# the fallback) followed by whichever binary encoders are installed.
+NEGOTIATED_RENDERER_CLASSES = [
+    *api_settings.DEFAULT_RENDERER_CLASSES,
+    *binary_renderer_classes(),
+]
+
+
+class NegotiatedRenderersMixin:
+    """
+    Adds the binary renderers and the columnar layout option to an APIView.
+    Views should pass their payload through ``self.layout(request, payload)``.
+    """
+
+    renderer_classes = NEGOTIATED_RENDERER_CLASSES
+
+    @staticmethod
+    def layout(request, payload: Any) -> Any:
+        return apply_layout(request, payload)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        patch_vary_headers(response, ("Accept",))
+        return response
@@ -49,6 +49,7 @@ INSTALLED_APPS = [
     'quiz',
     'packs',
     'exchange',
+    'outbox',
 ]
 
 # --------------------------------------------------------------------------------
@@ -56,6 +57,7 @@ INSTALLED_APPS = [
 # --------------------------------------------------------------------------------
 MIDDLEWARE = [
     'corsheaders.middleware.CorsMiddleware',
+    'db_carte.compression.CompressionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.middleware.security.SecurityMiddleware',
@@ -82,6 +84,26 @@ DATABASES = {
     }
 }
 
+# --------------------------------------------------------------------------------
+# Cache
+# --------------------------------------------------------------------------------
+# Holds content version tokens and precompressed responses. Use a shared backend
+# (e.g. Redis or Memcached) when running more than one server process.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'db-carte',
+    }
+}
+
+# --------------------------------------------------------------------------------
+# Response Compression
+# --------------------------------------------------------------------------------
+COMPRESSION_MIN_SIZE = 1024  # bytes; smaller bodies are sent as-is
+COMPRESSION_CACHE_TIMEOUT = 60 * 60 * 24  # precompressed bodies, keyed by ETag
+COMPRESSION_BROTLI_QUALITY = 5
+COMPRESSION_BROTLI_QUALITY_CACHED = 11
+
 # --------------------------------------------------------------------------------
 # Authentication
 # --------------------------------------------------------------------------------
@@ -134,6 +156,45 @@ REST_FRAMEWORK = {
     ),
 }
 
+# --------------------------------------------------------------------------------
+# Packs
+# --------------------------------------------------------------------------------
+PACK_IDEMPOTENCY_KEY_TTL = 60 * 60 * 24  # seconds a purchase response can be replayed
+PACK_ARCHIVE_HORIZON_DAYS = 180  # purchases older than this leave the hot audit log
+OWNERSHIP_BITSET_CACHE_SECONDS = 60 * 5  # lifetime of a cached per-user ownership bitmap
+
+# --------------------------------------------------------------------------------
+# Exchange
+# --------------------------------------------------------------------------------
+EXCHANGE_OFFER_TTL_DAYS = 14  # open and requested offers are cancelled after this
+EXCHANGE_OFFER_HISTORY_GRACE_HOURS = 24  # terminal offers stay live this long before moving to history
+EXCHANGE_MARKET_CACHE_SECONDS = 30  # lifetime of a cached market depth response
+EXCHANGE_NOTIFICATION_RETENTION_DAYS = 30  # read notifications older than this are purged
+EXCHANGE_ASYNC_MATCHING = True  # new offers are matched by run_outbox_worker instead of in the request; unmatched without it
+EXCHANGE_MATCH_BATCH_SIZE = 100  # offers matched per batch by the asynchronous matcher
+EXCHANGE_MATCH_CANDIDATE_LIMIT = 500  # oldest open offers per rarity (and per wishlist) a batch is matched against
+
+# --------------------------------------------------------------------------------
+# Credits ledger
+# --------------------------------------------------------------------------------
+CREDITS_SNAPSHOT_LAG_SECONDS = 60  # snapshots skip ledger rows younger than this
+
+# Credit rewards and achievement progress are coalesced in memory and written in batches.
+# Buffered updates only live in the process: if it is killed without running its exit
+# hooks (SIGKILL, OOM killer) the last USER_WRITE_BUFFER_FLUSH_SECONDS of rewards (at most
+# USER_WRITE_BUFFER_MAX_PENDING updates) are lost. Disable the buffer where that is unacceptable.
+USER_WRITE_BUFFER_ENABLED = True
+USER_WRITE_BUFFER_FLUSH_SECONDS = 2  # flush interval
+USER_WRITE_BUFFER_MAX_PENDING = 500  # flush early once this many updates are waiting
+
+# --------------------------------------------------------------------------------
+# Outbox (deferred tasks run by `manage.py run_outbox_worker`)
+# --------------------------------------------------------------------------------
+OUTBOX_LEASE_SECONDS = 60 * 5  # a leased task is handed out again after this
+OUTBOX_MAX_ATTEMPTS = 5
+OUTBOX_RETRY_BASE_SECONDS = 10  # first retry delay, doubled on every attempt
+OUTBOX_RETENTION_HOURS = 24 * 7  # completed tasks are purged after this
+
 # --------------------------------------------------------------------------------
 # CORS Configuration
 # --------------------------------------------------------------------------------
@@ -0,0 +1,49 @@
+from datetime import date
+
+from django.contrib.contenttypes.models import ContentType
+from django.db.models import Sum
+from django.test import TestCase
+
+from cards.models import PlayerCard
+from db_carte.counters import MAX_KEYS_PER_STATEMENT, increment_counters
+from packs.models import DailyCardMint
+
+DAY = date(2026, 1, 1)
+
+
+class IncrementCountersTests(TestCase):
+    def setUp(self):
+        self.content_type_id = ContentType.objects.get_for_model(PlayerCard).pk
+
+    def increment(self, counts, **kwargs):
+        increment_counters(
+            DailyCardMint,
+            ("content_type_id", "object_id", "day"),
+            {(self.content_type_id, object_id, DAY): {"count": count} for object_id, count in counts.items()},
+            **kwargs,
+        )
+
+    def counts(self):
+        return dict(DailyCardMint.objects.values_list("object_id", "count"))
+
+    def test_more_keys_than_one_statement_allows(self):
+        # SQLite rejects an expression tree deeper than 1000, i.e. about that many keys at once.
+        keys = 2 * MAX_KEYS_PER_STATEMENT + 200
+        self.increment({object_id: 1 for object_id in range(1, keys + 1)})
+        # The second call updates every existing row and creates one more.
+        self.increment({object_id: 2 for object_id in range(1, keys + 2)})
+
+        self.assertEqual(DailyCardMint.objects.count(), keys + 1)
+        self.assertEqual(DailyCardMint.objects.filter(count=3).count(), keys)
+        self.assertEqual(DailyCardMint.objects.aggregate(total=Sum("count"))["total"], 3 * keys + 2)
+
+    def test_chunks_keep_every_delta(self):
+        self.increment({1: 1, 2: 2, 3: 3, 4: 4, 5: 5}, chunk_size=2)
+        self.increment({1: 1, 5: 1}, chunk_size=1)
+
+        self.assertEqual(self.counts(), {1: 2, 2: 2, 3: 3, 4: 4, 5: 6})
+
+    def test_zero_increments_create_no_rows(self):
+        self.increment({1: 0, 2: 1})
+
+        self.assertEqual(self.counts(), {2: 1})
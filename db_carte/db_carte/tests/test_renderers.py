@@ -0,0 +1,25 @@
+from django.test import RequestFactory, SimpleTestCase
+
+from db_carte.renderers import apply_layout
+
+
+class ColumnarLayoutTests(SimpleTestCase):
+    def setUp(self):
+        self.request = RequestFactory().get("/", {"layout": "columnar"})
+
+    def test_object_list_becomes_table(self):
+        payload = [{"id": 1, "name": "a"}, {"id": 2, "team": "x"}]
+        self.assertEqual(
+            apply_layout(self.request, payload),
+            {"fields": ["id", "name", "team"], "rows": [[1, "a", None], [2, None, "x"]]},
+        )
+
+    def test_empty_list_keeps_the_table_shape(self):
+        self.assertEqual(apply_layout(self.request, []), {"fields": [], "rows": []})
+        self.assertEqual(
+            apply_layout(self.request, {"results": [], "next_after": None}),
+            {"results": {"fields": [], "rows": []}, "next_after": None},
+        )
+
+    def test_default_layout_is_unchanged(self):
+        self.assertEqual(apply_layout(RequestFactory().get("/"), []), [])
@@ -0,0 +1,71 @@
+"""
+Content version tokens for cacheable, rarely changing datasets.
+
+Each namespace (the card catalog, the quiz content, the pack list) has an
+opaque token stored in the Django cache. Saving or deleting any model that
+feeds the dataset replaces the token, so ETags and in-process structures
+derived from it are invalidated without scanning the underlying tables.
+The token lives in the configured cache, so processes only agree on it when
+they share a cache backend.
+"""
+
+from __future__ import annotations
+
+import uuid
+
+from django.core.cache import cache
+from django.db.models.signals import post_delete, post_save
+
+from .renderers import negotiate_media_type
+
+CATALOG = "catalog"
+QUIZ = "quiz"
+PACKS = "packs"
+
+_CACHE_KEY = "content-version:{namespace}"
+
+
+def _new_token() -> str:
+    return uuid.uuid4().hex[:16]
+
+
+def get_version(namespace: str) -> str:
+    key = _CACHE_KEY.format(namespace=namespace)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, _new_token(), timeout=None)
+        version = cache.get(key)
+    return version
+
+
+def bump_version(namespace: str) -> str:
+    version = _new_token()
+    cache.set(_CACHE_KEY.format(namespace=namespace), version, timeout=None)
+    return version
+
+
+def connect_version_signals(namespace: str, *models) -> None:
+    """
+    Replaces the namespace token whenever one of ``models`` is saved or deleted.
+    """
+
+    def _bump(sender, **kwargs):
+        bump_version(namespace)
+
+    for model in models:
+        dispatch_uid = f"content-version:{namespace}:{model._meta.label_lower}"
+        post_save.connect(_bump, sender=model, weak=False, dispatch_uid=dispatch_uid)
+        post_delete.connect(_bump, sender=model, weak=False, dispatch_uid=dispatch_uid)
+
+
+def versioned_etag(namespace: str):
+    """
+    Builds an ``etag_func`` for ``django.views.decorators.http.condition``.
+    The negotiated media type is part of the tag because JSON and binary
+    bodies are different representations of the same version.
+    """
+
+    def etag_func(request, *args, **kwargs) -> str:
+        return f"{namespace}-{get_version(namespace)}-{negotiate_media_type(request)}"
+
+    return etag_func
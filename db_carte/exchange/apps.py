@@ -4,3 +4,8 @@ from django.apps import AppConfig
 class ExchangeConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'exchange'
+
+    def ready(self):
+        from .wishlist import connect_card_signals
+
+        connect_card_signals()
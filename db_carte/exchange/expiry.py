@@ -0,0 +1,144 @@
+"""
+Offer expiry and compaction of the live offer table.
+
+Open and requested offers carry an ``expires_at`` deadline. The sweeper
+cancels the offers past it in batches, with conditional UPDATEs so offers
+claimed by a trade in the meantime are left alone, releases their market
+supply (see ``exchange.market``) and notifies their owners with one bulk
+INSERT. Completed and cancelled offers
+older than ``EXCHANGE_OFFER_HISTORY_GRACE_HOURS`` are then moved to
+``ExchangeOfferHistory``, so the matcher's ``status`` scans only ever see
+live offers and a short tail of recent terminal ones.
+"""
+
+from __future__ import annotations
+
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Dict, Optional, Tuple
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .market import SupplyKey, record_supply
+from .models import ExchangeNotification, ExchangeOffer, ExchangeOfferHistory
+from .notifications import notify
+
+DEFAULT_BATCH_SIZE = 500
+
+LIVE_STATUSES = (ExchangeOffer.Status.OPEN, ExchangeOffer.Status.REQUESTED)
+TERMINAL_STATUSES = (ExchangeOffer.Status.COMPLETED, ExchangeOffer.Status.CANCELLED)
+
+
+def _expire_batch(now: datetime, batch_size: int) -> Tuple[int, int]:
+    offer_ids = list(
+        ExchangeOffer.objects.filter(status__in=LIVE_STATUSES, expires_at__lte=now)
+        .order_by('expires_at')
+        .values_list('id', flat=True)[:batch_size]
+    )
+    if not offer_ids:
+        return 0, 0
+
+    # ``updated_at`` doubles as the marker of the offers this batch cancelled:
+    # any offer a trade claimed after the SELECT no longer matches the UPDATE.
+    # Open offers are cancelled first so their supply can be released.
+    expired = []
+    for previous in LIVE_STATUSES:
+        marker = timezone.now()
+        ExchangeOffer.objects.filter(pk__in=offer_ids, status=previous).update(
+            status=ExchangeOffer.Status.CANCELLED,
+            updated_at=marker,
+        )
+        cancelled = list(
+            ExchangeOffer.objects.filter(
+                pk__in=offer_ids,
+                status=ExchangeOffer.Status.CANCELLED,
+                updated_at=marker,
+            ).values_list('user_id', 'card_type', 'content_type_id', 'object_id', 'required_rarity')
+        )
+        if previous == ExchangeOffer.Status.OPEN:
+            supply: Dict[SupplyKey, int] = defaultdict(int)
+            for _, _, content_type_id, object_id, rarity in cancelled:
+                supply[(content_type_id, object_id, rarity)] -= 1
+            record_supply(supply)
+        expired.extend(cancelled)
+
+    notify(
+        ExchangeNotification(
+            user_id=user_id,
+            title='Offerta scaduta',
+            message=f'La tua offerta di scambio ({card_type} #{object_id}) è scaduta ed è stata annullata.',
+        )
+        for user_id, card_type, _, object_id, _ in expired
+    )
+    return len(offer_ids), len(expired)
+
+
+def expire_offers(now: Optional[datetime] = None, batch_size: int = DEFAULT_BATCH_SIZE) -> int:
+    """Cancels every live offer whose ``expires_at`` has passed; returns how many."""
+
+    now = now or timezone.now()
+    expired = 0
+    while True:
+        with transaction.atomic():
+            selected, cancelled = _expire_batch(now, batch_size)
+        expired += cancelled
+        if selected < batch_size:
+            return expired
+
+
+def _compact_batch(before: datetime, batch_size: int) -> int:
+    offers = list(
+        ExchangeOffer.objects.select_for_update()
+        .filter(status__in=TERMINAL_STATUSES, updated_at__lt=before)
+        .order_by('updated_at')[:batch_size]
+    )
+    if not offers:
+        return 0
+    ExchangeOfferHistory.objects.bulk_create(
+        [
+            ExchangeOfferHistory(
+                id=offer.pk,
+                user_id=offer.user_id,
+                content_type_id=offer.content_type_id,
+                object_id=offer.object_id,
+                card_type=offer.card_type,
+                required_rarity=offer.required_rarity,
+                wants=offer.wants,
+                status=offer.status,
+                requested_by_id=offer.requested_by_id,
+                created_at=offer.created_at,
+                requested_at=offer.requested_at,
+                closed_at=offer.updated_at,
+            )
+            for offer in offers
+        ],
+        batch_size=500,
+        ignore_conflicts=True,
+    )
+    ExchangeOffer.objects.filter(
+        pk__in=[offer.pk for offer in offers],
+        status__in=TERMINAL_STATUSES,
+    ).delete()
+    return len(offers)
+
+
+def compact_offers(before: Optional[datetime] = None, batch_size: int = DEFAULT_BATCH_SIZE) -> int:
+    """Moves terminal offers last changed before ``before`` to the history table; returns how many."""
+
+    before = before or timezone.now() - timedelta(hours=settings.EXCHANGE_OFFER_HISTORY_GRACE_HOURS)
+    moved = 0
+    while True:
+        with transaction.atomic():
+            batch = _compact_batch(before, batch_size)
+        moved += batch
+        if batch < batch_size:
+            return moved
+
+
+def sweep_offers(batch_size: int = DEFAULT_BATCH_SIZE) -> Dict[str, int]:
+    return {
+        'expired': expire_offers(batch_size=batch_size),
+        'archived': compact_offers(batch_size=batch_size),
+    }
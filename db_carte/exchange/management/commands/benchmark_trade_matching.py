@@ -0,0 +1,58 @@
+import random
+import time
+
+from django.core.management.base import BaseCommand
+
+from exchange.matching import DEFAULT_MAX_LENGTH, MarketOffer, find_trade_cycles
+
+RARITIES = ("common", "rare", "epic")
+
+
+def synthetic_market(offers: int, users: int, cards: int, ownership: float, seed: int):
+    """
+    Random market: every user owns each card with probability ``ownership``
+    and offers cards they own; card rarities are skewed towards common.
+    """
+    rng = random.Random(seed)
+    rarity_of = {card: rng.choices(RARITIES, weights=(70, 25, 5))[0] for card in range(cards)}
+    owned = {user: {(1, card) for card in range(cards) if rng.random() < ownership} for user in range(users)}
+    market = []
+    for offer_id in range(offers):
+        user = rng.randrange(users)
+        if not owned[user]:
+            continue
+        content_type_id, card = rng.choice(sorted(owned[user]))
+        market.append(MarketOffer(offer_id=offer_id, user_id=user, card=(content_type_id, card), rarity=rarity_of[card]))
+    return market, owned
+
+
+class Command(BaseCommand):
+    help = "Benchmarks the cyclic trade matcher on synthetic markets of growing size (no database access)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--sizes", default="1000,10000,100000", help="Comma separated numbers of open offers.")
+        parser.add_argument("--users-per-offer", type=float, default=0.5)
+        parser.add_argument("--cards", type=int, default=600)
+        parser.add_argument("--ownership", type=float, default=0.3, help="Probability that a user owns a given card.")
+        parser.add_argument("--max-length", type=int, default=DEFAULT_MAX_LENGTH)
+        parser.add_argument("--seed", type=int, default=7)
+
+    def handle(self, *args, **options):
+        self.stdout.write(f"{'offers':>8} {'cycles':>8} {'matched':>8} {'2-way':>7} {'3+-way':>7} {'seconds':>8} {'us/offer':>9}")
+        for size in [int(value) for value in options["sizes"].split(",") if value.strip()]:
+            market, owned = synthetic_market(
+                offers=size,
+                users=max(2, int(size * options["users_per_offer"])),
+                cards=options["cards"],
+                ownership=options["ownership"],
+                seed=options["seed"],
+            )
+            started = time.perf_counter()
+            cycles = find_trade_cycles(market, owned, max_length=options["max_length"])
+            elapsed = time.perf_counter() - started
+            matched = sum(len(cycle) for cycle in cycles)
+            pairs = sum(1 for cycle in cycles if len(cycle) == 2)
+            self.stdout.write(
+                f"{len(market):>8} {len(cycles):>8} {matched:>8} {pairs:>7} {len(cycles) - pairs:>7} "
+                f"{elapsed:>8.3f} {elapsed / max(1, len(market)) * 1e6:>9.1f}"
+            )
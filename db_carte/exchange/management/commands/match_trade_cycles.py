@@ -0,0 +1,29 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from exchange.matching import DEFAULT_MAX_LENGTH
+from exchange.services import run_cycle_matching
+
+
+class Command(BaseCommand):
+    help = "Completes multi-party trades by finding cycles among the open exchange offers."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--max-length", type=int, default=DEFAULT_MAX_LENGTH, help="Longest cycle to search for.")
+        parser.add_argument("--max-offers", type=int, help="Only consider the oldest N open offers.")
+        parser.add_argument("--loop", action="store_true", help="Keep matching every --interval seconds.")
+        parser.add_argument("--interval", type=float, default=60.0)
+
+    def handle(self, *args, **options):
+        while True:
+            started = time.perf_counter()
+            stats = run_cycle_matching(max_length=options["max_length"], max_offers=options["max_offers"])
+            elapsed = time.perf_counter() - started
+            self.stdout.write(
+                f"{stats['open_offers']} open offers, {stats['cycles_found']} cycles found, "
+                f"{stats['cycles_completed']} completed ({stats['offers_completed']} offers) in {elapsed:.2f}s."
+            )
+            if not options["loop"]:
+                return
+            time.sleep(options["interval"])
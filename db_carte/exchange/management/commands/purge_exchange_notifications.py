@@ -0,0 +1,27 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from exchange.notifications import DEFAULT_PURGE_BATCH_SIZE, purge_read_notifications
+
+
+class Command(BaseCommand):
+    help = "Deletes read exchange notifications older than the retention period."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--days",
+            type=int,
+            default=settings.EXCHANGE_NOTIFICATION_RETENTION_DAYS,
+            help="Keep read notifications newer than this many days.",
+        )
+        parser.add_argument("--batch-size", type=int, default=DEFAULT_PURGE_BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        purged = purge_read_notifications(
+            before=timezone.now() - timedelta(days=options["days"]),
+            batch_size=options["batch_size"],
+        )
+        self.stdout.write(self.style.SUCCESS(f"Purged {purged} read notifications."))
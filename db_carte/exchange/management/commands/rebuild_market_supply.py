@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from exchange.market import rebuild_supply
+
+
+class Command(BaseCommand):
+    help = "Recomputes the exchange open-offer counters from the live offers."
+
+    def handle(self, *args, **options):
+        cards = rebuild_supply()
+        self.stdout.write(self.style.SUCCESS(f"Open supply rebuilt for {cards} cards."))
@@ -0,0 +1,24 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from exchange.expiry import DEFAULT_BATCH_SIZE, sweep_offers
+
+
+class Command(BaseCommand):
+    help = "Cancels expired exchange offers and moves completed or cancelled ones to the history table."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+        parser.add_argument("--loop", action="store_true", help="Keep sweeping every --interval seconds.")
+        parser.add_argument("--interval", type=float, default=300.0)
+
+    def handle(self, *args, **options):
+        while True:
+            stats = sweep_offers(batch_size=options["batch_size"])
+            self.stdout.write(
+                self.style.SUCCESS(f"{stats['expired']} offers expired, {stats['archived']} moved to history.")
+            )
+            if not options["loop"]:
+                return
+            time.sleep(options["interval"])
@@ -0,0 +1,172 @@
+"""
+Exchange market depth counters.
+
+``OfferSupply`` (open offers per card), ``RarityMarketStats`` (open offers,
+matches and total time to match per rarity) and ``DailyTradeStats``
+(completed trades per day) are updated in place by every offer state change:
+publishing, joining, matching, expiring and deleting an offer. Updates are
+an INSERT of the missing rows followed by one ``F()`` UPDATE per table, so
+concurrent changes never lose an increment. ``market_depth`` serves the
+figures from the cache; ``rebuild_supply`` recomputes the supply counters
+from the live offers if they ever drift.
+"""
+
+from __future__ import annotations
+
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count
+from django.utils import timezone
+
+from db_carte.counters import increment_counters
+
+from .models import DailyTradeStats, ExchangeOffer, OfferSupply, RarityMarketStats
+
+SupplyKey = Tuple[int, int, str]  # (content type id, object id, rarity)
+
+TRADE_WINDOWS = {'1d': 1, '7d': 7, '30d': 30}
+TOP_CARDS = 20
+
+_CACHE_KEY = 'exchange-market:{scope}'
+
+
+def supply_key(offer: ExchangeOffer) -> SupplyKey:
+    return offer.content_type_id, offer.object_id, offer.required_rarity
+
+
+def record_supply(deltas: Dict[SupplyKey, int]) -> None:
+    """Applies open-offer deltas per card and per rarity."""
+
+    cards: Dict[Tuple[int, int], Tuple[str, int]] = {}
+    by_rarity: Dict[str, int] = defaultdict(int)
+    for (content_type_id, object_id, rarity), delta in deltas.items():
+        cards[(content_type_id, object_id)] = (rarity, delta)
+        by_rarity[rarity] += delta
+    increment_counters(
+        OfferSupply,
+        ('content_type_id', 'object_id'),
+        {card: {'open_offers': delta} for card, (_, delta) in cards.items()},
+        defaults=lambda card: {'rarity': cards[card][0]},
+    )
+    increment_counters(
+        RarityMarketStats,
+        ('rarity',),
+        {(rarity,): {'open_offers': delta} for rarity, delta in by_rarity.items()},
+    )
+
+
+def record_trade(offers: Iterable[ExchangeOffer], completed_at: datetime) -> None:
+    """
+    Counts one completed trade made of ``offers`` (all previously open):
+    their supply goes away and their time to match is added per rarity.
+    """
+
+    offers = list(offers)
+    supply: Dict[SupplyKey, int] = defaultdict(int)
+    matches: Dict[str, Dict[str, int]] = defaultdict(lambda: {'matched_offers': 0, 'match_seconds': 0})
+    for offer in offers:
+        supply[supply_key(offer)] -= 1
+        matches[offer.required_rarity]['matched_offers'] += 1
+        matches[offer.required_rarity]['match_seconds'] += max(
+            0, int((completed_at - offer.created_at).total_seconds())
+        )
+    record_supply(supply)
+    increment_counters(RarityMarketStats, ('rarity',), {(rarity,): values for rarity, values in matches.items()})
+    increment_counters(
+        DailyTradeStats,
+        ('day',),
+        {(completed_at.date(),): {'trades': 1, 'offers_completed': len(offers)}},
+    )
+
+
+@transaction.atomic
+def rebuild_supply() -> int:
+    """Recomputes the open-offer counters from ``ExchangeOffer``; returns the number of cards with supply."""
+
+    rows = list(
+        ExchangeOffer.objects.filter(status=ExchangeOffer.Status.OPEN)
+        .values('content_type_id', 'object_id', 'required_rarity')
+        .annotate(total=Count('id'))
+        .order_by()
+    )
+    OfferSupply.objects.all().delete()
+    OfferSupply.objects.bulk_create(
+        [
+            OfferSupply(
+                content_type_id=row['content_type_id'],
+                object_id=row['object_id'],
+                rarity=row['required_rarity'],
+                open_offers=row['total'],
+            )
+            for row in rows
+        ],
+        batch_size=500,
+    )
+    by_rarity: Dict[str, int] = defaultdict(int)
+    for row in rows:
+        by_rarity[row['required_rarity']] += row['total']
+    RarityMarketStats.objects.update(open_offers=0)
+    increment_counters(
+        RarityMarketStats,
+        ('rarity',),
+        {(rarity,): {'open_offers': total} for rarity, total in by_rarity.items()},
+    )
+    return len(rows)
+
+
+def _compute_depth(card: Optional[Tuple[int, int]], today: date) -> Dict[str, Any]:
+    rarities = [
+        {
+            'rarity': stats.rarity,
+            'open_offers': stats.open_offers,
+            'matched_offers': stats.matched_offers,
+            'avg_match_seconds': (
+                round(stats.match_seconds / stats.matched_offers) if stats.matched_offers else None
+            ),
+        }
+        for stats in RarityMarketStats.objects.order_by('rarity')
+    ]
+    oldest = today - timedelta(days=max(TRADE_WINDOWS.values()) - 1)
+    daily = dict(
+        DailyTradeStats.objects.filter(day__gte=oldest).values_list('day', 'trades')
+    )
+    trades = {
+        window: sum(count for day, count in daily.items() if day > today - timedelta(days=days))
+        for window, days in TRADE_WINDOWS.items()
+    }
+    supply = OfferSupply.objects.filter(open_offers__gt=0).select_related('content_type')
+    if card is not None:
+        supply = supply.filter(content_type_id=card[0], object_id=card[1])
+    cards = [
+        {
+            'card_type': row.content_type.model,
+            'card_id': row.object_id,
+            'rarity': row.rarity,
+            'open_offers': row.open_offers,
+        }
+        for row in supply.order_by('-open_offers', 'content_type_id', 'object_id')[:TOP_CARDS]
+    ]
+    return {'rarities': rarities, 'trades': trades, 'cards': cards}
+
+
+def market_depth(card: Optional[Tuple[int, int]] = None, today: Optional[date] = None) -> Dict[str, Any]:
+    """
+    Supply per rarity (and for the busiest cards, or only ``card``), average
+    time to match and completed trades per window, cached for
+    ``EXCHANGE_MARKET_CACHE_SECONDS``.
+    """
+
+    today = today or timezone.now().date()
+    scope = f'{card[0]}:{card[1]}' if card else 'all'
+    key = _CACHE_KEY.format(scope=scope)
+    payload = cache.get(key)
+    if payload is None:
+        payload = _compute_depth(card, today)
+        cache.set(key, payload, timeout=settings.EXCHANGE_MARKET_CACHE_SECONDS)
+    return payload
+
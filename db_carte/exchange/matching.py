@@ -0,0 +1,146 @@
+"""
+Multi-party trade matching over open exchange offers.
+
+Every open offer gives away one copy of a card and accepts any card of its
+``required_rarity`` that its owner does not have yet. The market is a
+directed graph with an edge ``a -> b`` when ``b``'s owner lacks ``a``'s card
+(and both offers share the rarity): a cycle ``a -> b -> c -> a`` is a trade
+where every participant gives one card and receives one they are missing.
+
+``find_trade_cycles`` searches each rarity class for disjoint cycles with a
+depth-first search bounded in length, branching and scanned offers per step,
+so the work per offer is constant and a whole pass scales linearly with the
+number of open offers. This module is pure Python (no Django models) so the
+synthetic benchmark can drive it directly.
+"""
+
+from __future__ import annotations
+
+from collections import defaultdict
+from dataclasses import dataclass
+from typing import Dict, Hashable, Iterable, List, Optional, Set, Tuple
+
+CardKey = Tuple[int, int]  # (content type id, object id)
+
+DEFAULT_MAX_LENGTH = 4
+DEFAULT_MAX_BRANCHING = 4
+DEFAULT_MAX_SCAN = 32
+
+
+@dataclass(frozen=True)
+class MarketOffer:
+    offer_id: Hashable
+    user_id: int
+    card: CardKey
+    rarity: str
+
+
+class _RarityMarket:
+    """
+    Open offers of one rarity. Unmatched offers live in ``pool``; removal
+    swaps the last entry into the hole, so removal is O(1) and every scanned
+    slot holds a live offer.
+    """
+
+    def __init__(self, offers: List[MarketOffer]):
+        self.offers = offers
+        self.pool = list(range(len(offers)))
+        self.position = list(range(len(offers)))
+
+    def is_alive(self, index: int) -> bool:
+        return self.position[index] >= 0
+
+    def remove(self, index: int) -> None:
+        hole = self.position[index]
+        last = self.pool.pop()
+        if last != index:
+            self.pool[hole] = last
+            self.position[last] = hole
+        self.position[index] = -1
+
+    def scan(self, offset: int, limit: int) -> Iterable[int]:
+        size = len(self.pool)
+        for step in range(min(limit, size)):
+            yield self.pool[(offset + step) % size]
+
+
+def find_trade_cycles(
+    offers: Iterable[MarketOffer],
+    owned: Dict[int, Set[CardKey]],
+    max_length: int = DEFAULT_MAX_LENGTH,
+    max_branching: int = DEFAULT_MAX_BRANCHING,
+    max_scan: int = DEFAULT_MAX_SCAN,
+) -> List[List[MarketOffer]]:
+    """
+    Returns disjoint trade cycles (lists of offers where each offer's card
+    goes to the owner of the next one, the last wrapping to the first).
+    Offers are tried as cycle starts in the given order, so callers pass the
+    oldest offers first. ``owned`` maps user ids to the cards they own and is
+    updated with the cards received in the returned cycles.
+    """
+
+    by_rarity: Dict[str, List[MarketOffer]] = defaultdict(list)
+    for offer in offers:
+        by_rarity[offer.rarity].append(offer)
+
+    cycles: List[List[MarketOffer]] = []
+    for group in by_rarity.values():
+        market = _RarityMarket(group)
+        for start in range(len(group)):
+            if not market.is_alive(start):
+                continue
+            path = _search(market, owned, start, max_length, max_branching, max_scan)
+            if path is None:
+                continue
+            cycle = [group[index] for index in path]
+            for index in path:
+                market.remove(index)
+            for position, offer in enumerate(cycle):
+                receiver = cycle[(position + 1) % len(cycle)]
+                owned.setdefault(receiver.user_id, set()).add(offer.card)
+            cycles.append(cycle)
+    return cycles
+
+
+def _lacks(owned: Dict[int, Set[CardKey]], user_id: int, card: CardKey) -> bool:
+    return card not in owned.get(user_id, ())
+
+
+def _search(
+    market: _RarityMarket,
+    owned: Dict[int, Set[CardKey]],
+    start: int,
+    max_length: int,
+    max_branching: int,
+    max_scan: int,
+) -> Optional[List[int]]:
+    offers = market.offers
+    origin = offers[start]
+    path = [start]
+    users = {origin.user_id}
+
+    def extend(current: int) -> bool:
+        tail = offers[current]
+        if len(path) >= 2 and _lacks(owned, origin.user_id, tail.card):
+            return True
+        if len(path) >= max_length:
+            return False
+        branches = 0
+        # The scan start rotates with the node so different searches look at
+        # different parts of the market.
+        for candidate in market.scan(current * 7919 + len(path), max_scan):
+            offer = offers[candidate]
+            if offer.user_id in users or not _lacks(owned, offer.user_id, tail.card):
+                continue
+            path.append(candidate)
+            users.add(offer.user_id)
+            if extend(candidate):
+                return True
+            path.pop()
+            users.discard(offer.user_id)
+            branches += 1
+            if branches >= max_branching:
+                break
+        return False
+
+    return path if extend(start) else None
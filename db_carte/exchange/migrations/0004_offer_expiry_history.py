@@ -0,0 +1,68 @@
+# Generated by Django 5.1.1 on 2026-10-19 02:38
+
+import django.db.models.deletion
+import exchange.models
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contenttypes', '0002_remove_content_type_name'),
+        ('exchange', '0003_wishlists'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ExchangeOfferHistory',
+            fields=[
+                ('id', models.UUIDField(editable=False, primary_key=True, serialize=False)),
+                ('object_id', models.PositiveIntegerField()),
+                ('card_type', models.CharField(max_length=20)),
+                ('required_rarity', models.CharField(max_length=32)),
+                ('wants', models.CharField(blank=True, max_length=255)),
+                ('status', models.CharField(choices=[('open', 'Open'), ('requested', 'Requested'), ('completed', 'Completed'), ('cancelled', 'Cancelled')], max_length=20)),
+                ('created_at', models.DateTimeField()),
+                ('requested_at', models.DateTimeField(blank=True, null=True)),
+                ('closed_at', models.DateTimeField()),
+                ('archived_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'ordering': ('-closed_at',),
+            },
+        ),
+        migrations.AddField(
+            model_name='exchangeoffer',
+            name='expires_at',
+            field=models.DateTimeField(default=exchange.models.default_offer_expiry),
+        ),
+        migrations.AddIndex(
+            model_name='exchangeoffer',
+            index=models.Index(fields=['status', 'created_at'], name='exchange_offer_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='exchangeoffer',
+            index=models.Index(fields=['status', 'expires_at'], name='exchange_offer_expiry_idx'),
+        ),
+        migrations.AddField(
+            model_name='exchangeofferhistory',
+            name='content_type',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='contenttypes.contenttype'),
+        ),
+        migrations.AddField(
+            model_name='exchangeofferhistory',
+            name='requested_by',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddField(
+            model_name='exchangeofferhistory',
+            name='user',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='exchange_offer_history', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddIndex(
+            model_name='exchangeofferhistory',
+            index=models.Index(fields=['user', '-closed_at'], name='exchange_history_user_idx'),
+        ),
+    ]
@@ -0,0 +1,84 @@
+# Generated by Django 5.1.1 on 2026-10-19 02:41
+
+import django.db.models.deletion
+from collections import defaultdict
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def count_open_offers(apps, schema_editor):
+    ExchangeOffer = apps.get_model('exchange', 'ExchangeOffer')
+    OfferSupply = apps.get_model('exchange', 'OfferSupply')
+    RarityMarketStats = apps.get_model('exchange', 'RarityMarketStats')
+
+    rows = (
+        ExchangeOffer.objects.filter(status='open')
+        .values('content_type_id', 'object_id', 'required_rarity')
+        .annotate(total=Count('id'))
+        .order_by()
+    )
+    by_rarity = defaultdict(int)
+    supply = []
+    for row in rows:
+        by_rarity[row['required_rarity']] += row['total']
+        supply.append(
+            OfferSupply(
+                content_type_id=row['content_type_id'],
+                object_id=row['object_id'],
+                rarity=row['required_rarity'],
+                open_offers=row['total'],
+            )
+        )
+    OfferSupply.objects.bulk_create(supply, batch_size=500)
+    RarityMarketStats.objects.bulk_create(
+        [RarityMarketStats(rarity=rarity, open_offers=total) for rarity, total in by_rarity.items()]
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contenttypes', '0002_remove_content_type_name'),
+        ('exchange', '0004_offer_expiry_history'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyTradeStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField(unique=True)),
+                ('trades', models.PositiveIntegerField(default=0)),
+                ('offers_completed', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'ordering': ('-day',),
+            },
+        ),
+        migrations.CreateModel(
+            name='RarityMarketStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('rarity', models.CharField(max_length=32, unique=True)),
+                ('open_offers', models.IntegerField(default=0)),
+                ('matched_offers', models.PositiveIntegerField(default=0)),
+                ('match_seconds', models.BigIntegerField(default=0)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='OfferSupply',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('object_id', models.PositiveIntegerField()),
+                ('rarity', models.CharField(max_length=32)),
+                ('open_offers', models.IntegerField(default=0)),
+                ('content_type', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='contenttypes.contenttype')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['rarity', '-open_offers'], name='exchange_supply_rarity_idx')],
+                'unique_together': {('content_type', 'object_id')},
+            },
+        ),
+        migrations.RunPython(count_open_offers, migrations.RunPython.noop),
+    ]
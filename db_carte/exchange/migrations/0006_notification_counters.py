@@ -0,0 +1,49 @@
+# Generated by Django 5.1.1 on 2026-10-19 02:42
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def count_unread(apps, schema_editor):
+    ExchangeNotification = apps.get_model('exchange', 'ExchangeNotification')
+    NotificationCounter = apps.get_model('exchange', 'NotificationCounter')
+    rows = (
+        ExchangeNotification.objects.filter(is_read=False)
+        .values('user_id')
+        .annotate(total=Count('id'))
+        .order_by()
+    )
+    NotificationCounter.objects.bulk_create(
+        [NotificationCounter(user_id=row['user_id'], unread=row['total']) for row in rows],
+        batch_size=500,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('exchange', '0005_market_stats'),
+        ('users', '0003_alter_customuser_achievement_claims_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='NotificationCounter',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='exchange_notification_counter', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('unread', models.IntegerField(default=0)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='exchangenotification',
+            index=models.Index(fields=['user', 'is_read', '-created_at'], name='exchange_notif_unread_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='exchangenotification',
+            index=models.Index(fields=['is_read', 'created_at'], name='exchange_notif_retention_idx'),
+        ),
+        migrations.RunPython(count_unread, migrations.RunPython.noop),
+    ]
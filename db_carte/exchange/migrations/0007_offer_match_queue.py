@@ -0,0 +1,25 @@
+# Generated by Django 5.1.1 on 2026-10-19 02:47
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contenttypes', '0002_remove_content_type_name'),
+        ('exchange', '0006_notification_counters'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='exchangeoffer',
+            name='match_requested_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='exchangeoffer',
+            index=models.Index(fields=['match_requested_at'], name='exchange_offer_match_idx'),
+        ),
+    ]
@@ -0,0 +1,47 @@
+# Generated by Django 5.1.1 on 2026-10-19 03:28
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Min
+
+
+def drop_duplicate_entries(apps, schema_editor):
+    """Keeps the oldest of each user's duplicate entries so the constraints apply."""
+    WishlistEntry = apps.get_model('exchange', 'WishlistEntry')
+    kinds = (
+        (False, ('content_type', 'object_id')),
+        (True, ('card_type', 'rarity', 'team', 'season')),
+    )
+    for is_filter, keys in kinds:
+        entries = WishlistEntry.objects.filter(content_type__isnull=is_filter)
+        groups = (
+            entries.values('user', *keys)
+            .annotate(keep=Min('id'), total=Count('id'))
+            .filter(total__gt=1)
+            .order_by()
+        )
+        for group in groups:
+            keep = group.pop('keep')
+            del group['total']
+            entries.filter(**group).exclude(pk=keep).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contenttypes', '0002_remove_content_type_name'),
+        ('exchange', '0007_offer_match_queue'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RunPython(drop_duplicate_entries, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='wishlistentry',
+            constraint=models.UniqueConstraint(condition=models.Q(('content_type__isnull', False)), fields=('user', 'content_type', 'object_id'), name='exchange_wishlist_unique_card'),
+        ),
+        migrations.AddConstraint(
+            model_name='wishlistentry',
+            constraint=models.UniqueConstraint(condition=models.Q(('content_type__isnull', True)), fields=('user', 'card_type', 'rarity', 'team', 'season'), name='exchange_wishlist_unique_filter'),
+        ),
+    ]
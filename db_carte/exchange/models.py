@@ -1,9 +1,15 @@
 import uuid
+from datetime import timedelta
 
 from django.conf import settings
 from django.contrib.contenttypes.fields import GenericForeignKey
 from django.contrib.contenttypes.models import ContentType
 from django.db import models
+from django.utils import timezone
+
+
+def default_offer_expiry():
+    return timezone.now() + timedelta(days=settings.EXCHANGE_OFFER_TTL_DAYS)
 
 
 class ExchangeOffer(models.Model):
@@ -40,14 +46,64 @@ class ExchangeOffer(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     requested_at = models.DateTimeField(null=True, blank=True)
     updated_at = models.DateTimeField(auto_now=True)
+    expires_at = models.DateTimeField(default=default_offer_expiry)
+    # Set while the offer waits for the asynchronous matcher (FIFO order).
+    match_requested_at = models.DateTimeField(null=True, blank=True)
 
     class Meta:
         ordering = ('-created_at',)
+        indexes = [
+            models.Index(fields=['status', 'created_at'], name='exchange_offer_status_idx'),
+            models.Index(fields=['status', 'expires_at'], name='exchange_offer_expiry_idx'),
+            models.Index(fields=['match_requested_at'], name='exchange_offer_match_idx'),
+        ]
 
     def __str__(self) -> str:  # pragma: no cover - repr utility
         return f'ExchangeOffer({self.id}) for {self.card_type} #{self.object_id}'
 
 
+class ExchangeOfferHistory(models.Model):
+    """
+    Completed and cancelled offers moved out of ``ExchangeOffer`` by the
+    sweeper, so the live table only holds what the matcher can still use.
+    Rows keep the original offer id.
+    """
+
+    id = models.UUIDField(primary_key=True, editable=False)
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='exchange_offer_history',
+    )
+    content_type = models.ForeignKey(ContentType, on_delete=models.CASCADE)
+    object_id = models.PositiveIntegerField()
+    card = GenericForeignKey('content_type', 'object_id')
+    card_type = models.CharField(max_length=20)
+    required_rarity = models.CharField(max_length=32)
+    wants = models.CharField(max_length=255, blank=True)
+    status = models.CharField(max_length=20, choices=ExchangeOffer.Status.choices)
+    requested_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        null=True,
+        blank=True,
+        on_delete=models.SET_NULL,
+        related_name='+',
+    )
+    created_at = models.DateTimeField()
+    requested_at = models.DateTimeField(null=True, blank=True)
+    closed_at = models.DateTimeField()
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ('-closed_at',)
+        indexes = [
+            models.Index(fields=['user', '-closed_at'], name='exchange_history_user_idx'),
+        ]
+
+    def __str__(self) -> str:  # pragma: no cover - repr utility
+        return f'ExchangeOfferHistory({self.id}) {self.status}'
+
+
 class ExchangeNotification(models.Model):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     user = models.ForeignKey(
@@ -62,6 +118,193 @@ class ExchangeNotification(models.Model):
 
     class Meta:
         ordering = ('-created_at',)
+        indexes = [
+            models.Index(fields=['user', 'is_read', '-created_at'], name='exchange_notif_unread_idx'),
+            models.Index(fields=['is_read', 'created_at'], name='exchange_notif_retention_idx'),
+        ]
 
     def __str__(self) -> str:  # pragma: no cover - repr utility
         return f'ExchangeNotification({self.title}) for {self.user}'
+
+
+class NotificationCounter(models.Model):
+    """
+    Unread exchange notifications per user, kept in step with
+    ``ExchangeNotification`` by ``exchange.notifications`` so badges are a
+    primary-key read.
+    """
+
+    user = models.OneToOneField(
+        settings.AUTH_USER_MODEL,
+        primary_key=True,
+        on_delete=models.CASCADE,
+        related_name='exchange_notification_counter',
+    )
+    unread = models.IntegerField(default=0)
+
+    def __str__(self) -> str:  # pragma: no cover - repr utility
+        return f'NotificationCounter({self.user}) {self.unread}'
+
+
+class CardTransfer(models.Model):
+    """
+    Ledger of card copies moved between users by completed exchanges, one row
+    per leg. Ownership is updated through ``packs.models.CardHolding``, so the
+    pack purchase log only ever records real pack openings.
+    """
+
+    # Offers can be deleted by their owner; the ledger keeps the bare id.
+    offer_id = models.UUIDField(null=True, blank=True)
+    from_user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='cards_sent',
+    )
+    to_user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='cards_received',
+    )
+    content_type = models.ForeignKey(ContentType, on_delete=models.CASCADE)
+    object_id = models.PositiveIntegerField()
+    card = GenericForeignKey('content_type', 'object_id')
+    rarity = models.ForeignKey(
+        'cards.CardRarity',
+        null=True,
+        blank=True,
+        on_delete=models.SET_NULL,
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ('-id',)
+        # Per-user history is read newest first with ``id`` as the keyset.
+        indexes = [
+            models.Index(fields=['from_user', '-id'], name='exchange_transfer_from_idx'),
+            models.Index(fields=['to_user', '-id'], name='exchange_transfer_to_idx'),
+        ]
+
+    def __str__(self) -> str:  # pragma: no cover - repr utility
+        return f'CardTransfer({self.content_type.model} #{self.object_id}) {self.from_user} -> {self.to_user}'
+
+
+class WishlistEntry(models.Model):
+    """
+    A card a user wants to receive through exchanges: either one specific
+    card (``content_type``/``object_id``) or a filter on card type, rarity,
+    team and season where blank fields match anything.
+    """
+
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='wishlist_entries',
+    )
+    content_type = models.ForeignKey(ContentType, null=True, blank=True, on_delete=models.CASCADE)
+    object_id = models.PositiveIntegerField(null=True, blank=True)
+    card = GenericForeignKey('content_type', 'object_id')
+    card_type = models.CharField(max_length=20, blank=True)
+    rarity = models.CharField(max_length=32, blank=True)
+    team = models.CharField(max_length=20, blank=True)
+    season = models.CharField(max_length=20, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ('-created_at',)
+        constraints = [
+            # Backstop for ``find_duplicate``: two concurrent adds of the same
+            # card or filter cannot both pass the check and insert.
+            models.UniqueConstraint(
+                fields=['user', 'content_type', 'object_id'],
+                condition=models.Q(content_type__isnull=False),
+                name='exchange_wishlist_unique_card',
+            ),
+            models.UniqueConstraint(
+                fields=['user', 'card_type', 'rarity', 'team', 'season'],
+                condition=models.Q(content_type__isnull=True),
+                name='exchange_wishlist_unique_filter',
+            ),
+        ]
+
+    @property
+    def is_filter(self) -> bool:
+        return self.content_type_id is None
+
+    def __str__(self) -> str:  # pragma: no cover - repr utility
+        if not self.is_filter:
+            return f'WishlistEntry({self.user} wants {self.content_type.model} #{self.object_id})'
+        return f'WishlistEntry({self.user} wants {self.card_type or "any"} {self.rarity} {self.team} {self.season})'
+
+
+class WishlistCard(models.Model):
+    """
+    Reverse index of the wishlists: one row per card matched by an entry, so
+    "who wants this card" is a single lookup on (content_type, object_id).
+    Maintained by ``exchange.wishlist``.
+    """
+
+    entry = models.ForeignKey(WishlistEntry, on_delete=models.CASCADE, related_name='index_rows')
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='+')
+    content_type = models.ForeignKey(ContentType, on_delete=models.CASCADE)
+    object_id = models.PositiveIntegerField()
+
+    class Meta:
+        unique_together = ('entry', 'content_type', 'object_id')
+        indexes = [
+            models.Index(fields=['content_type', 'object_id', 'user'], name='exchange_wishlist_card_idx'),
+            models.Index(fields=['user', 'content_type', 'object_id'], name='exchange_wishlist_user_idx'),
+        ]
+
+    def __str__(self) -> str:  # pragma: no cover - repr utility
+        return f'WishlistCard({self.user} -> {self.content_type.model} #{self.object_id})'
+
+
+class OfferSupply(models.Model):
+    """
+    Open offers per card, maintained incrementally by ``exchange.market``
+    on every offer state change.
+    """
+
+    content_type = models.ForeignKey(ContentType, on_delete=models.CASCADE)
+    object_id = models.PositiveIntegerField()
+    card = GenericForeignKey('content_type', 'object_id')
+    rarity = models.CharField(max_length=32)
+    open_offers = models.IntegerField(default=0)
+
+    class Meta:
+        unique_together = ('content_type', 'object_id')
+        indexes = [
+            models.Index(fields=['rarity', '-open_offers'], name='exchange_supply_rarity_idx'),
+        ]
+
+    def __str__(self) -> str:  # pragma: no cover - repr utility
+        return f'OfferSupply({self.content_type.model} #{self.object_id}) {self.open_offers}'
+
+
+class RarityMarketStats(models.Model):
+    """
+    Open offers and completed matches per rarity; the average time to match
+    is ``match_seconds / matched_offers``.
+    """
+
+    rarity = models.CharField(max_length=32, unique=True)
+    open_offers = models.IntegerField(default=0)
+    matched_offers = models.PositiveIntegerField(default=0)
+    match_seconds = models.BigIntegerField(default=0)
+
+    def __str__(self) -> str:  # pragma: no cover - repr utility
+        return f'RarityMarketStats({self.rarity})'
+
+
+class DailyTradeStats(models.Model):
+    """Completed trades (cycles) and offers per day."""
+
+    day = models.DateField(unique=True)
+    trades = models.PositiveIntegerField(default=0)
+    offers_completed = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        ordering = ('-day',)
+
+    def __str__(self) -> str:  # pragma: no cover - repr utility
+        return f'DailyTradeStats({self.day}) {self.trades}'
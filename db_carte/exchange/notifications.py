@@ -0,0 +1,120 @@
+"""
+Exchange notifications and their per-user unread counters.
+
+Every notification is created through ``notify`` and marked read through
+``mark_read``, which adjust ``NotificationCounter`` in the same transaction,
+so ``unread_count`` is a primary-key read. Request handlers use
+``notify_later``, which only queues an outbox task (see ``exchange.tasks``).
+Listings are keyset-paginated on
+``(created_at, id)`` and ``purge_read_notifications`` drops old read rows in
+batches.
+"""
+
+from __future__ import annotations
+
+from collections import Counter
+from datetime import datetime, timedelta
+from typing import Iterable, List, Optional, Tuple
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from db_carte.counters import increment_counters
+from outbox.services import enqueue
+
+from .models import ExchangeNotification, NotificationCounter
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+DEFAULT_PURGE_BATCH_SIZE = 1000
+
+
+def notify(notifications: Iterable[ExchangeNotification]) -> List[ExchangeNotification]:
+    """Inserts ``notifications`` with one bulk INSERT and bumps their users' counters."""
+
+    notifications = list(notifications)
+    if not notifications:
+        return notifications
+    with transaction.atomic():
+        ExchangeNotification.objects.bulk_create(notifications, batch_size=500)
+        unread = Counter(notification.user_id for notification in notifications if not notification.is_read)
+        increment_counters(
+            NotificationCounter,
+            ('user_id',),
+            {(user_id,): {'unread': total} for user_id, total in unread.items()},
+        )
+    return notifications
+
+
+def notify_later(notifications: Iterable[ExchangeNotification]) -> None:
+    """Queues ``notifications`` for the outbox worker, in the caller's transaction."""
+
+    rows = [
+        {'user_id': notification.user_id, 'title': notification.title, 'message': notification.message}
+        for notification in notifications
+    ]
+    if rows:
+        enqueue('exchange.notify', {'notifications': rows})
+
+
+def mark_read(user, notification_ids) -> int:
+    """Marks the given notifications of ``user`` as read; returns how many were unread."""
+
+    with transaction.atomic():
+        updated = ExchangeNotification.objects.filter(
+            user=user,
+            pk__in=notification_ids,
+            is_read=False,
+        ).update(is_read=True)
+        increment_counters(NotificationCounter, ('user_id',), {(user.pk,): {'unread': -updated}})
+    return updated
+
+
+def unread_count(user) -> int:
+    unread = NotificationCounter.objects.filter(pk=user.pk).values_list('unread', flat=True).first()
+    return max(unread or 0, 0)
+
+
+def unread_page(
+    user,
+    limit: int = DEFAULT_PAGE_SIZE,
+    before: Optional[str] = None,
+) -> Tuple[List[ExchangeNotification], Optional[str]]:
+    """
+    One page of ``user``'s unread notifications, newest first, starting after
+    the notification id ``before``. Returns the page and the cursor of the
+    next one (``None`` on the last page).
+    """
+
+    queryset = ExchangeNotification.objects.filter(user=user, is_read=False)
+    if before:
+        cursor = ExchangeNotification.objects.filter(user=user, pk=before).values_list('created_at', flat=True).first()
+        if cursor is not None:
+            queryset = queryset.filter(Q(created_at__lt=cursor) | Q(created_at=cursor, id__lt=before))
+    page = list(queryset.order_by('-created_at', '-id')[:limit])
+    next_before = str(page[-1].pk) if len(page) == limit else None
+    return page, next_before
+
+
+def purge_read_notifications(
+    before: Optional[datetime] = None,
+    batch_size: int = DEFAULT_PURGE_BATCH_SIZE,
+) -> int:
+    """Deletes read notifications created before ``before``, in batches; returns how many."""
+
+    before = before or timezone.now() - timedelta(days=settings.EXCHANGE_NOTIFICATION_RETENTION_DAYS)
+    purged = 0
+    while True:
+        ids = list(
+            ExchangeNotification.objects.filter(is_read=True, created_at__lt=before)
+            .order_by('created_at')
+            .values_list('id', flat=True)[:batch_size]
+        )
+        if not ids:
+            return purged
+        deleted, _ = ExchangeNotification.objects.filter(pk__in=ids, is_read=True).delete()
+        purged += deleted
+        if len(ids) < batch_size:
+            return purged
@@ -2,7 +2,7 @@ from rest_framework import serializers
 
 from packs.serializers import serialize_collection_card
 
-from .models import ExchangeNotification, ExchangeOffer
+from .models import CardTransfer, ExchangeNotification, ExchangeOffer, WishlistEntry
 from .utils import get_card_quantity_for_user, normalize_card_type
 
 
@@ -10,6 +10,7 @@ class ExchangeOfferSerializer(serializers.ModelSerializer):
     offered_card = serializers.SerializerMethodField()
     username = serializers.CharField(source='user.username', read_only=True)
     requested_by = serializers.SerializerMethodField()
+    wishlist_hit = serializers.SerializerMethodField()
 
     class Meta:
         model = ExchangeOffer
@@ -22,6 +23,8 @@ class ExchangeOfferSerializer(serializers.ModelSerializer):
             'status',
             'offered_card',
             'requested_by',
+            'wishlist_hit',
+            'expires_at',
         )
 
     def get_offered_card(self, obj: ExchangeOffer):
@@ -29,7 +32,10 @@ class ExchangeOfferSerializer(serializers.ModelSerializer):
         if not card:
             return None
         request = self.context.get('request')
-        quantity = get_card_quantity_for_user(obj.user, type(card), card.pk) or 1
+        quantity = getattr(obj, 'owned_quantity', None)
+        if quantity is None:
+            quantity = get_card_quantity_for_user(obj.user, type(card), card.pk)
+        quantity = quantity or 1
         payload = serialize_collection_card(card, request=request, quantity=quantity)
         payload['type'] = obj.card_type
         payload['rarity'] = obj.required_rarity
@@ -43,8 +49,76 @@ class ExchangeOfferSerializer(serializers.ModelSerializer):
             return obj.requested_by.username
         return None
 
+    def get_wishlist_hit(self, obj: ExchangeOffer):
+        return bool(getattr(obj, 'wishlist_hit', False))
+
 
 class ExchangeNotificationSerializer(serializers.ModelSerializer):
     class Meta:
         model = ExchangeNotification
         fields = ('id', 'title', 'message', 'created_at')
+
+
+class CardTransferSerializer(serializers.ModelSerializer):
+    direction = serializers.SerializerMethodField()
+    counterpart = serializers.SerializerMethodField()
+    card_type = serializers.CharField(source='content_type.model', read_only=True)
+    card_name = serializers.SerializerMethodField()
+    rarity = serializers.CharField(source='rarity.name', read_only=True, default=None)
+
+    class Meta:
+        model = CardTransfer
+        fields = (
+            'id',
+            'offer_id',
+            'direction',
+            'counterpart',
+            'card_type',
+            'object_id',
+            'card_name',
+            'rarity',
+            'created_at',
+        )
+
+    def _is_sent(self, obj: CardTransfer) -> bool:
+        return obj.from_user_id == self.context['request'].user.id
+
+    def get_direction(self, obj: CardTransfer):
+        return 'sent' if self._is_sent(obj) else 'received'
+
+    def get_counterpart(self, obj: CardTransfer):
+        return obj.to_user.username if self._is_sent(obj) else obj.from_user.username
+
+    def get_card_name(self, obj: CardTransfer):
+        card = getattr(obj, 'card', None)
+        return getattr(card, 'name', None)
+
+
+class WishlistEntrySerializer(serializers.ModelSerializer):
+    card_id = serializers.IntegerField(source='object_id', read_only=True)
+    card_name = serializers.SerializerMethodField()
+    matches = serializers.SerializerMethodField()
+
+    class Meta:
+        model = WishlistEntry
+        fields = (
+            'id',
+            'card_type',
+            'card_id',
+            'card_name',
+            'rarity',
+            'team',
+            'season',
+            'matches',
+            'created_at',
+        )
+
+    def get_card_name(self, obj: WishlistEntry):
+        card = getattr(obj, 'card', None)
+        return getattr(card, 'name', None)
+
+    def get_matches(self, obj: WishlistEntry):
+        matches = getattr(obj, 'matches', None)
+        if matches is None:
+            matches = obj.index_rows.count()
+        return matches
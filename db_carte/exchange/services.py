@@ -1,18 +1,42 @@
 from __future__ import annotations
 
-from typing import Dict, Optional
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional, Set
 
-from django.contrib.contenttypes.models import ContentType
+from django.conf import settings
 from django.db import transaction
+from django.contrib.contenttypes.models import ContentType
+from django.db.models import (
+    Case,
+    Count,
+    Exists,
+    IntegerField,
+    OuterRef,
+    Q,
+    Subquery,
+    Value,
+    When,
+    prefetch_related_objects,
+)
+from django.db.models.functions import Coalesce
 from django.utils import timezone
 
 from cards.models import UserCollection
-from packs.models import Pack, PackPurchase, PackPurchaseCard
-
-from .models import ExchangeNotification, ExchangeOffer
-from .utils import get_card_quantity_for_user, normalize_card_type
-
-EXCHANGE_PACK_SLUG = 'exchange-transfer'
+from outbox.services import enqueue_once
+from packs.bitsets import OwnershipBits, bulk_user_bitsets, get_card_index, user_bitsets
+from packs.ownership import adjust_holdings, owned_card_quantities, owned_copies
+
+from .market import record_supply, record_trade, supply_key
+from .matching import DEFAULT_MAX_LENGTH, MarketOffer, find_trade_cycles
+from .notifications import notify_later
+from .models import CardTransfer, ExchangeNotification, ExchangeOffer, WishlistCard
+from .utils import (
+    CANONICAL_CARD_TYPE_LABELS,
+    get_card_quantity_for_user,
+    get_model_for_card_type,
+    normalize_card_type,
+)
+from .wishlist import users_wanting, users_wanting_cards, wanted_cards, wanted_cards_by_user
 
 COLLECTION_FIELD_MAP = {
     'player': 'player_cards',
@@ -22,8 +46,30 @@ COLLECTION_FIELD_MAP = {
 }
 
 
-def _user_missing_card(user, model, card_id: int) -> bool:
-    return get_card_quantity_for_user(user, model, card_id) == 0
+ACTIVE_STATUSES = (ExchangeOffer.Status.OPEN, ExchangeOffer.Status.REQUESTED)
+
+
+class OfferError(Exception):
+    """Raised when an offer cannot be published; the message is shown to the user."""
+
+
+class OfferCardNotFoundError(OfferError):
+    pass
+
+
+def transition_offer(offer_id, from_statuses: Iterable[str], to_status: str, **changes) -> bool:
+    """
+    Compare-and-swap of an offer's status: a single conditional UPDATE that
+    only applies while the offer is still in one of ``from_statuses``.
+    Returns True if this caller performed the transition. Works the same on
+    every backend (including SQLite) since it needs no row locks.
+    """
+    updated = ExchangeOffer.objects.filter(pk=offer_id, status__in=list(from_statuses)).update(
+        status=to_status,
+        updated_at=timezone.now(),
+        **changes,
+    )
+    return updated == 1
 
 
 def _active_offer_reservations(user, content_type, object_id, exclude_offer_id=None) -> int:
@@ -31,13 +77,89 @@ def _active_offer_reservations(user, content_type, object_id, exclude_offer_id=N
         user=user,
         content_type=content_type,
         object_id=object_id,
-        status__in=[ExchangeOffer.Status.OPEN, ExchangeOffer.Status.REQUESTED],
+        status__in=ACTIVE_STATUSES,
     )
     if exclude_offer_id:
         qs = qs.exclude(pk=exclude_offer_id)
     return qs.count()
 
 
+def _reserved_copies(user_id: int, content_type: ContentType):
+    """Expression counting ``user_id``'s active offers of the outer card row."""
+    reserved = (
+        ExchangeOffer.objects.filter(
+            user_id=user_id,
+            content_type=content_type,
+            object_id=OuterRef('pk'),
+            status__in=ACTIVE_STATUSES,
+        )
+        .order_by()
+        .values('object_id')
+        .annotate(total=Count('id'))
+        .values('total')
+    )
+    return Coalesce(Subquery(reserved, output_field=IntegerField()), Value(0))
+
+
+def create_offer(user, raw_card_type, card_id, wants: Optional[str] = None):
+    """
+    Validates and publishes an offer, then tries to match it. The card, the
+    user's copies of it and the copies already reserved by their active
+    offers come from a single query, and the counts are handed to
+    ``attempt_match_for_offer`` instead of being recomputed. With
+    ``EXCHANGE_ASYNC_MATCHING`` the offer is queued for ``match_queued_offers``
+    instead and ``match_result`` is always None.
+    Returns ``(offer, match_result)``; raises ``OfferError``.
+    """
+    mapping = get_model_for_card_type(raw_card_type)
+    if not mapping:
+        raise OfferError('Unsupported card type.')
+    normalized_type, model = mapping
+    try:
+        card_id = int(card_id)
+    except (TypeError, ValueError):
+        raise OfferError('card_id must be a valid integer.')
+
+    content_type = ContentType.objects.get_for_model(model)
+    card = (
+        model.objects.filter(pk=card_id)
+        .select_related('rarity')
+        .annotate(
+            owned=owned_copies(user.pk, content_type),
+            reserved=_reserved_copies(user.pk, content_type),
+        )
+        .first()
+    )
+    if card is None:
+        raise OfferCardNotFoundError('Card not found.')
+    if card.owned <= 0:
+        raise OfferError('You must own the selected card to trade it.')
+    if card.owned - card.reserved <= 1:
+        raise OfferError('You need an extra copy of this card before publishing the trade.')
+
+    rarity_name = getattr(getattr(card, 'rarity', None), 'name', 'common') or 'common'
+    normalized_rarity = rarity_name.lower()
+    queue_match = settings.EXCHANGE_ASYNC_MATCHING
+    with transaction.atomic():
+        offer = ExchangeOffer.objects.create(
+            user=user,
+            card=card,
+            card_type=CANONICAL_CARD_TYPE_LABELS.get(normalized_type, normalized_type),
+            required_rarity=normalized_rarity,
+            wants=wants or f'Any {normalized_rarity} card',
+            match_requested_at=timezone.now() if queue_match else None,
+        )
+        record_supply({supply_key(offer): 1})
+        if queue_match:
+            enqueue_once('exchange.match_offers')
+    if queue_match:
+        offer.owned_quantity = card.owned
+        return offer, None
+    match_result = attempt_match_for_offer(offer, owned=card.owned, reserved=card.reserved)
+    offer.owned_quantity = card.owned - 1 if match_result else card.owned
+    return offer, match_result
+
+
 def _has_tradeable_copy(offer: ExchangeOffer) -> bool:
     card = getattr(offer, 'card', None)
     if not card:
@@ -47,18 +169,30 @@ def _has_tradeable_copy(offer: ExchangeOffer) -> bool:
     return (total_owned - reserved) >= 1
 
 
-def _get_exchange_pack() -> Pack:
-    pack, _ = Pack.objects.get_or_create(
-        slug=EXCHANGE_PACK_SLUG,
-        defaults={
-            'name': 'Exchange Transfer',
-            'description': 'Virtual pack used to register card exchanges between users.',
-            'price': 0,
-            'cards_per_pack': 1,
-            'is_active': False,
-        },
-    )
-    return pack
+def tradeable_rarities(user_id: int) -> Set[str]:
+    """
+    Rarities of which ``user_id`` can still offer a copy: a card with at least
+    two copies beyond those reserved by their open or requested offers. Uses
+    the ownership bitmaps plus one grouped count of the user's reservations.
+    """
+    card_index = get_card_index()
+    spare = user_bitsets(user_id).spare
+    reserved = {
+        (row['content_type_id'], row['object_id']): row['reserved']
+        for row in ExchangeOffer.objects.filter(
+            user_id=user_id,
+            status__in=[ExchangeOffer.Status.OPEN, ExchangeOffer.Status.REQUESTED],
+        )
+        .values('content_type_id', 'object_id')
+        .annotate(reserved=Count('id'))
+        .order_by()
+    }
+    if reserved:
+        quantities = owned_card_quantities([user_id], reserved).get(user_id, {})
+        for key, count in reserved.items():
+            if quantities.get(key, 0) - count < 2:
+                spare &= ~card_index.bit(key)
+    return {rarity for rarity, bitmap in card_index.facets['rarity'].items() if spare & bitmap}
 
 
 def _ensure_collection_entry(user, card, normalized_type: str):
@@ -83,126 +217,388 @@ def _maybe_remove_collection_entry(user, card, normalized_type: str):
             relation.remove(card)
 
 
-def _transfer_single_copy(from_offer: ExchangeOffer, to_offer: ExchangeOffer):
-    card = from_offer.card
-    if not card:
-        raise ValueError('Missing card for offer')
-    normalized_type = normalize_card_type(from_offer.card_type)
-    content_type = ContentType.objects.get_for_model(type(card))
-    card_entry = (
-        PackPurchaseCard.objects
-        .select_related('purchase')
-        .filter(
-            purchase__user=from_offer.user,
-            content_type=content_type,
-            object_id=card.pk,
-        )
-        .first()
-    )
-    if not card_entry:
-        raise ValueError('Unable to locate card entry for exchange')
-    rarity = card_entry.rarity
-    card_entry.delete()
-    _maybe_remove_collection_entry(from_offer.user, card, normalized_type or from_offer.card_type)
-
-    pack = _get_exchange_pack()
-    purchase = PackPurchase.objects.create(
-        user=to_offer.user,
-        pack=pack,
-        cost=0,
-        cards_count=1,
-    )
-    PackPurchaseCard.objects.create(
-        purchase=purchase,
-        content_type=content_type,
-        object_id=card.pk,
-        rarity=rarity or getattr(card, 'rarity', None),
-    )
-    _ensure_collection_entry(to_offer.user, card, normalized_type or from_offer.card_type)
+def _cycle_legs(cycle: List[ExchangeOffer]):
+    """(offer, recipient) pairs: each offer's card goes to the next offer's owner."""
+    return [(offer, cycle[(index + 1) % len(cycle)].user) for index, offer in enumerate(cycle)]
 
 
-def _create_notifications(offer_a: ExchangeOffer, offer_b: ExchangeOffer):
-    card_a = getattr(offer_a, 'card', None)
-    card_b = getattr(offer_b, 'card', None)
-    if not card_a or not card_b:
-        return
-    ExchangeNotification.objects.bulk_create(
+def _record_cycle(cycle: List[ExchangeOffer]):
+    """
+    Moves one copy of each offer's card to the owner of the next offer (a
+    two-offer cycle is a plain swap). All legs are written to the
+    ``CardTransfer`` ledger with a single INSERT and ownership is updated
+    with one batched ``CardHolding`` adjustment.
+    """
+    legs = []
+    for sender_offer, recipient in _cycle_legs(cycle):
+        card = sender_offer.card
+        if not card:
+            raise ValueError('Missing card for offer')
+        legs.append((sender_offer, recipient, card))
+
+    CardTransfer.objects.bulk_create(
         [
-            ExchangeNotification(
-                user=offer_a.user,
-                title='Scambio completato',
-                message=f'Hai scambiato {card_a} con {offer_b.user.username} e ora possiedi {card_b}.',
-            ),
-            ExchangeNotification(
-                user=offer_b.user,
-                title='Scambio completato',
-                message=f'Hai scambiato {card_b} con {offer_a.user.username} e ora possiedi {card_a}.',
-            ),
+            CardTransfer(
+                offer_id=sender_offer.pk,
+                from_user=sender_offer.user,
+                to_user=recipient,
+                content_type_id=sender_offer.content_type_id,
+                object_id=sender_offer.object_id,
+                rarity=getattr(card, 'rarity', None),
+            )
+            for sender_offer, recipient, card in legs
         ]
     )
 
+    deltas = defaultdict(int)
+    for sender_offer, recipient, _ in legs:
+        deltas[(sender_offer.user_id, sender_offer.content_type_id, sender_offer.object_id)] -= 1
+        deltas[(recipient.pk, sender_offer.content_type_id, sender_offer.object_id)] += 1
+    adjust_holdings(deltas)
 
-def attempt_match_for_offer(offer: ExchangeOffer) -> Optional[Dict[str, str]]:
+    for sender_offer, recipient, card in legs:
+        normalized_type = normalize_card_type(sender_offer.card_type) or sender_offer.card_type
+        _maybe_remove_collection_entry(sender_offer.user, card, normalized_type)
+        _ensure_collection_entry(recipient, card, normalized_type)
+
+
+def _create_notifications(cycle: List[ExchangeOffer]):
+    cards = [getattr(offer, 'card', None) for offer in cycle]
+    if not all(cards):
+        return
+    notifications = []
+    for index, offer in enumerate(cycle):
+        given = cards[index]
+        received_from = cycle[index - 1]
+        received = cards[index - 1]
+        if len(cycle) == 2:
+            message = f'Hai scambiato {given} con {received_from.user.username} e ora possiedi {received}.'
+        else:
+            recipient = cycle[(index + 1) % len(cycle)].user
+            message = (
+                f'Scambio a {len(cycle)}: hai ceduto {given} a {recipient.username} '
+                f'e ricevuto {received} da {received_from.user.username}.'
+            )
+        notifications.append(
+            ExchangeNotification(user=offer.user, title='Scambio completato', message=message)
+        )
+    notify_later(notifications)
+
+
+def _claim_cycle(cycle: List[ExchangeOffer], now) -> bool:
+    """
+    Moves every offer of the cycle OPEN -> COMPLETED, each pointing at the
+    owner of the offer whose card it receives. Offers are claimed in primary
+    key order so that matchers racing on overlapping cycles cannot deadlock;
+    the caller rolls back if this fails.
+    """
+    partners = [(offer, cycle[index - 1].user) for index, offer in enumerate(cycle)]
+    for claimed, partner in sorted(partners, key=lambda pair: str(pair[0].pk)):
+        if not transition_offer(
+            claimed.pk,
+            [ExchangeOffer.Status.OPEN],
+            ExchangeOffer.Status.COMPLETED,
+            requested_by=partner,
+            requested_at=now,
+        ):
+            return False
+    return True
+
+
+def _ownership_still_allows(cycle: List[ExchangeOffer]) -> bool:
+    """
+    Re-checks in the database that every sender still owns the offered card
+    and every recipient still has no copy of it. Matchers pick partners from
+    cached ownership bitmaps, which can be stale in another process (e.g. an
+    outbox worker), so this runs inside the completing transaction.
+    """
+    legs = _cycle_legs(cycle)
+    if not all(offer.card for offer, _ in legs):
+        return False
+    quantities = owned_card_quantities(
+        {offer.user_id for offer in cycle},
+        {(offer.content_type_id, offer.object_id) for offer in cycle},
+    )
+    for offer, recipient in legs:
+        card = (offer.content_type_id, offer.object_id)
+        if quantities.get(offer.user_id, {}).get(card, 0) < 1:
+            return False
+        if quantities.get(recipient.pk, {}).get(card, 0) > 0:
+            return False
+    return True
+
+
+def complete_cycle(cycle: List[ExchangeOffer]) -> bool:
+    """
+    Atomically claims every offer of ``cycle`` and records the transfers.
+    Returns False (and changes nothing) if any offer was taken meanwhile, a
+    sender no longer owns the card or a recipient already owns it.
+    """
+    with transaction.atomic():
+        now = timezone.now()
+        if not _claim_cycle(cycle, now) or not _ownership_still_allows(cycle):
+            transaction.set_rollback(True)
+            return False
+        _record_cycle(cycle)
+        _create_notifications(cycle)
+        record_trade(cycle, now)
+
+    for index, offer in enumerate(cycle):
+        offer.status = ExchangeOffer.Status.COMPLETED
+        offer.requested_by = cycle[index - 1].user
+        offer.requested_at = now
+    return True
+
+
+def attempt_match_for_offer(
+    offer: ExchangeOffer,
+    owned: Optional[int] = None,
+    reserved: Optional[int] = None,
+) -> Optional[Dict[str, str]]:
+    """
+    Tries to complete ``offer`` against a single counterparty. Callers that
+    just created the offer pass the ``owned`` and ``reserved`` (by the user's
+    other active offers) copy counts they validated, which skips re-reading
+    the offer and recounting its copies.
+    """
     card = getattr(offer, 'card', None)
     if not card:
         return None
     rarity_name = getattr(getattr(card, 'rarity', None), 'name', 'common')
     normalized_rarity = (rarity_name or 'common').lower()
 
-    with transaction.atomic():
-        offer = ExchangeOffer.objects.select_for_update().select_related('user').get(pk=offer.pk)
+    if owned is None or reserved is None:
+        offer = ExchangeOffer.objects.select_related('user').get(pk=offer.pk)
         if offer.status != ExchangeOffer.Status.OPEN:
             return None
         if not _has_tradeable_copy(offer):
             return None
+    elif owned - reserved < 1:
+        return None
 
-        candidates = (
-            ExchangeOffer.objects.select_for_update()
-            .filter(
-                status=ExchangeOffer.Status.OPEN,
-                required_rarity=normalized_rarity,
+    # Counterparties who wishlisted the offered card come from one lookup on
+    # the wishlist reverse index; offers matching only on rarity follow.
+    wanted_by = users_wanting((offer.content_type_id, offer.object_id), exclude_user_id=offer.user_id)
+    my_wants = wanted_cards(offer.user_id)
+    candidates = (
+        ExchangeOffer.objects.filter(status=ExchangeOffer.Status.OPEN)
+        .filter(Q(user_id__in=wanted_by) | Q(required_rarity=normalized_rarity))
+        .exclude(user=offer.user)
+        .annotate(
+            wanted=Case(
+                When(user_id__in=wanted_by, then=Value(1)),
+                default=Value(0),
+                output_field=IntegerField(),
             )
-            .exclude(user=offer.user)
-            .order_by('created_at')
-            .select_related('user', 'content_type')
         )
-
-        for candidate in candidates:
-            other_card = getattr(candidate, 'card', None)
-            if not other_card:
-                continue
-            if candidate.pk == offer.pk:
-                continue
-            if not _has_tradeable_copy(candidate):
-                continue
-            if not _user_missing_card(candidate.user, type(card), card.pk):
-                continue
-            if not _user_missing_card(offer.user, type(other_card), other_card.pk):
-                continue
-
-            _transfer_single_copy(offer, candidate)
-            _transfer_single_copy(candidate, offer)
-
-            now = timezone.now()
-            offer.status = ExchangeOffer.Status.COMPLETED
-            offer.requested_by = candidate.user
-            offer.requested_at = now
-            offer.updated_at = now
-            offer.save(update_fields=['status', 'requested_by', 'requested_at', 'updated_at'])
-
-            candidate.status = ExchangeOffer.Status.COMPLETED
-            candidate.requested_by = offer.user
-            candidate.requested_at = now
-            candidate.updated_at = now
-            candidate.save(update_fields=['status', 'requested_by', 'requested_at', 'updated_at'])
-
-            _create_notifications(offer, candidate)
-
-            return {
-                'matched': True,
-                'partner_username': candidate.user.username,
-                'received_card_name': getattr(other_card, 'name', 'Carta'),
-                'sent_card_name': getattr(card, 'name', 'Carta'),
-            }
+        .order_by('-wanted', 'created_at')
+        .select_related('user', 'content_type')
+    )
+    candidates = list(candidates)
+    # Who lacks what is answered from the cached ownership bitmaps; both sides
+    # are still re-checked in the database by complete_cycle.
+    bits = bulk_user_bitsets({offer.user_id} | {candidate.user_id for candidate in candidates})
+    return _match_candidates(offer, card, normalized_rarity, candidates, my_wants, bits)
+
+
+def _match_candidates(
+    offer: ExchangeOffer,
+    card,
+    normalized_rarity: str,
+    candidates: List[ExchangeOffer],
+    my_wants: Set,
+    bits: Dict[int, OwnershipBits],
+) -> Optional[Dict[str, str]]:
+    card_index = get_card_index()
+    offered_key = (offer.content_type_id, offer.object_id)
+
+    # Candidates are read without locks and claimed one at a time with
+    # conditional UPDATEs; losing a race only moves on to the next candidate.
+    for candidate in candidates:
+        if candidate.pk == offer.pk or candidate.status != ExchangeOffer.Status.OPEN:
+            continue
+        other_card = getattr(candidate, 'card', None)
+        if not other_card:
+            continue
+        # The candidate accepts our card by wishlist or rarity (see the query);
+        # we accept theirs if it is on our wishlist or of our rarity.
+        if candidate.required_rarity != normalized_rarity and (
+            (candidate.content_type_id, candidate.object_id) not in my_wants
+        ):
+            continue
+        if bits[candidate.user_id].owns(card_index, offered_key):
+            continue
+        if bits[offer.user_id].owns(card_index, (candidate.content_type_id, candidate.object_id)):
+            continue
+        if not _has_tradeable_copy(candidate):
+            continue
+
+        if not complete_cycle([offer, candidate]):
+            if not ExchangeOffer.objects.filter(pk=offer.pk, status=ExchangeOffer.Status.OPEN).exists():
+                return None
+            continue
+
+        return {
+            'matched': True,
+            'partner_username': candidate.user.username,
+            'received_card_name': getattr(other_card, 'name', 'Carta'),
+            'sent_card_name': getattr(card, 'name', 'Carta'),
+        }
 
     return None
+
+
+def _queued_offers(batch_size: int) -> List[ExchangeOffer]:
+    """
+    The oldest open offers on the matching queue. An offer stays queued until
+    ``_dequeue`` runs after it was processed, so the offers of a batch cut
+    short by a crash or a lost lease are picked up again by the retry.
+    Concurrent matchers may look at the same offer; ``complete_cycle`` only
+    lets one of them trade it. Offers that left OPEN are dequeued right away.
+    """
+    while True:
+        queued = list(
+            ExchangeOffer.objects.filter(match_requested_at__isnull=False)
+            .order_by('match_requested_at')
+            .select_related('user', 'content_type')[:batch_size]
+        )
+        batch = [offer for offer in queued if offer.status == ExchangeOffer.Status.OPEN]
+        ExchangeOffer.objects.filter(
+            pk__in=[offer.pk for offer in queued if offer.status != ExchangeOffer.Status.OPEN],
+        ).update(match_requested_at=None)
+        if batch or not queued:
+            return batch
+
+
+def _dequeue(offer: ExchangeOffer) -> None:
+    ExchangeOffer.objects.filter(pk=offer.pk, match_requested_at=offer.match_requested_at).update(
+        match_requested_at=None
+    )
+
+
+def _batch_candidates(batch: List[ExchangeOffer]) -> List[ExchangeOffer]:
+    """
+    Open offers that could trade with an offer of ``batch``, oldest first:
+    the batch itself, the oldest ``EXCHANGE_MATCH_CANDIDATE_LIMIT`` offers of
+    each rarity in the batch, and as many offers of a card some batch user
+    wishlisted. Partners beyond the limit are left to ``run_cycle_matching``.
+    """
+    limit = settings.EXCHANGE_MATCH_CANDIDATE_LIMIT
+    open_offers = (
+        ExchangeOffer.objects.filter(status=ExchangeOffer.Status.OPEN)
+        .order_by('created_at')
+        .select_related('user', 'content_type')
+    )
+    candidates = {offer.pk: offer for offer in batch}
+    for rarity in {offer.required_rarity for offer in batch}:
+        for candidate in open_offers.filter(required_rarity=rarity)[:limit]:
+            candidates.setdefault(candidate.pk, candidate)
+    wished = WishlistCard.objects.filter(
+        user_id__in={offer.user_id for offer in batch},
+        content_type_id=OuterRef('content_type_id'),
+        object_id=OuterRef('object_id'),
+    )
+    for candidate in open_offers.filter(Exists(wished))[:limit]:
+        candidates.setdefault(candidate.pk, candidate)
+    candidates = sorted(candidates.values(), key=lambda offer: offer.created_at)
+    prefetch_related_objects(candidates, 'card')
+    return candidates
+
+
+def _match_batch(batch: List[ExchangeOffer]) -> int:
+    """
+    Matches a FIFO batch of new offers. The candidate offers, the wishlist
+    lookups and the ownership bitmaps are loaded once for the whole batch
+    rather than once per offer; batch offers are candidates for each other.
+    Each offer leaves the queue once it has been processed.
+    """
+    wanted_by = users_wanting_cards((offer.content_type_id, offer.object_id) for offer in batch)
+    wants = wanted_cards_by_user(offer.user_id for offer in batch)
+    candidates = _batch_candidates(batch)
+    bits = bulk_user_bitsets({candidate.user_id for candidate in candidates})
+
+    matched = 0
+    for offer in batch:
+        card = getattr(offer, 'card', None)
+        if offer.status == ExchangeOffer.Status.OPEN and card and _has_tradeable_copy(offer):
+            interested = wanted_by.get((offer.content_type_id, offer.object_id), set())
+            offer_candidates = sorted(
+                (
+                    candidate
+                    for candidate in candidates
+                    if candidate.user_id != offer.user_id
+                    and (candidate.user_id in interested or candidate.required_rarity == offer.required_rarity)
+                ),
+                key=lambda candidate: candidate.user_id not in interested,
+            )
+            if _match_candidates(offer, card, offer.required_rarity, offer_candidates, wants[offer.user_id], bits):
+                matched += 1
+                # Both collections changed: later offers of the batch must see it.
+                bits.update(bulk_user_bitsets({offer.user_id, offer.requested_by.pk}))
+        _dequeue(offer)
+    return matched
+
+
+def match_queued_offers(batch_size: Optional[int] = None) -> Dict[str, int]:
+    """
+    Drains the asynchronous matching queue in FIFO batches. Trade results
+    reach both parties as ``ExchangeNotification`` rows through
+    ``complete_cycle``.
+    """
+    batch_size = batch_size or settings.EXCHANGE_MATCH_BATCH_SIZE
+    stats = {'offers': 0, 'matched': 0}
+    while True:
+        batch = _queued_offers(batch_size)
+        if not batch:
+            return stats
+        stats['offers'] += len(batch)
+        stats['matched'] += _match_batch(batch)
+
+
+def load_market(max_offers: Optional[int] = None):
+    """
+    Snapshot of the open offers (oldest first) and of what their owners own,
+    restricted to the offered cards, as inputs for ``find_trade_cycles``.
+    """
+    queryset = (
+        ExchangeOffer.objects.filter(status=ExchangeOffer.Status.OPEN)
+        .order_by('created_at')
+        .values_list('id', 'user_id', 'content_type_id', 'object_id', 'required_rarity')
+    )
+    if max_offers is not None:
+        queryset = queryset[:max_offers]
+    offers = [
+        MarketOffer(offer_id=offer_id, user_id=user_id, card=(content_type_id, object_id), rarity=rarity)
+        for offer_id, user_id, content_type_id, object_id, rarity in queryset
+    ]
+    quantities = owned_card_quantities(
+        {offer.user_id for offer in offers},
+        {offer.card for offer in offers},
+    )
+    owned = {user_id: set(cards) for user_id, cards in quantities.items()}
+    return offers, owned
+
+
+def run_cycle_matching(
+    max_length: int = DEFAULT_MAX_LENGTH,
+    max_offers: Optional[int] = None,
+) -> Dict[str, int]:
+    """
+    Finds disjoint trade cycles among all open offers and completes each one
+    atomically. Cycles whose offers changed since the snapshot are skipped.
+    """
+    offers, owned = load_market(max_offers)
+    cycles = find_trade_cycles(offers, owned, max_length=max_length)
+
+    offer_ids = [offer.offer_id for cycle in cycles for offer in cycle]
+    loaded = ExchangeOffer.objects.select_related('user', 'content_type').in_bulk(offer_ids)
+
+    stats = {'open_offers': len(offers), 'cycles_found': len(cycles), 'cycles_completed': 0, 'offers_completed': 0}
+    for cycle in cycles:
+        instances = [loaded.get(offer.offer_id) for offer in cycle]
+        if None in instances:
+            continue
+        if complete_cycle(instances):
+            stats['cycles_completed'] += 1
+            stats['offers_completed'] += len(instances)
+    return stats
@@ -0,0 +1,19 @@
+"""Deferred exchange work executed by the outbox worker (``run_outbox_worker``)."""
+
+from outbox.registry import task
+
+from .models import ExchangeNotification
+from .notifications import notify
+from .services import match_queued_offers
+
+
+@task('exchange.notify')
+def deliver_notifications(payload):
+    notify(ExchangeNotification(**row) for row in payload['notifications'])
+
+
+@task('exchange.match_offers', atomic=False)
+def match_offers(payload):
+    # Not atomic: every trade commits on its own. Offers leave the queue only
+    # once processed, so a retry resumes with the ones still queued.
+    match_queued_offers(payload.get('batch_size'))
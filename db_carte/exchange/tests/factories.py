@@ -0,0 +1,24 @@
+"""Exchange fixtures on top of the pack test factories."""
+
+from django.contrib.contenttypes.models import ContentType
+
+from exchange.models import ExchangeOffer
+from packs.ownership import adjust_holdings
+
+
+def give_cards(user, *cards):
+    """Gives ``user`` one copy of each card."""
+    adjust_holdings(
+        {(user.pk, ContentType.objects.get_for_model(type(card)).pk, card.pk): 1 for card in cards}
+    )
+
+
+def make_offer(user, card, **fields) -> ExchangeOffer:
+    fields.setdefault('required_rarity', card.rarity.name.lower())
+    return ExchangeOffer.objects.create(
+        user=user,
+        content_type=ContentType.objects.get_for_model(type(card)),
+        object_id=card.pk,
+        card_type='player',
+        **fields,
+    )
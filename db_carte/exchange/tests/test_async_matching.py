@@ -0,0 +1,84 @@
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+
+from exchange import services
+from exchange.models import ExchangeOffer
+from exchange.services import create_offer, match_queued_offers, transition_offer
+from outbox.models import OutboxTask
+from packs.tests.factories import make_player_cards, make_user
+
+from .factories import give_cards, make_offer
+
+
+@override_settings(EXCHANGE_ASYNC_MATCHING=True)
+class AsyncMatchingTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.alice, self.bob, self.carol = make_user(), make_user(), make_user()
+        self.card_a, self.card_b, self.card_c = make_player_cards(3)
+        for user, card in ((self.alice, self.card_a), (self.bob, self.card_b), (self.carol, self.card_c)):
+            give_cards(user, card)
+            give_cards(user, card)
+
+    def offer(self, user, card):
+        offer, match = create_offer(user, 'player', card.pk)
+        self.assertIsNone(match)
+        return offer
+
+    def queued(self):
+        return set(ExchangeOffer.objects.filter(match_requested_at__isnull=False).values_list('pk', flat=True))
+
+    def test_new_offers_share_one_pending_match_task(self):
+        self.offer(self.alice, self.card_a)
+        self.offer(self.bob, self.card_b)
+
+        self.assertEqual(OutboxTask.objects.filter(name='exchange.match_offers').count(), 1)
+
+        OutboxTask.objects.update(status=OutboxTask.Status.RUNNING)
+        self.offer(self.carol, self.card_c)
+        self.assertEqual(OutboxTask.objects.filter(name='exchange.match_offers').count(), 2)
+
+    def test_drains_the_queue_and_trades(self):
+        first = self.offer(self.alice, self.card_a)
+        second = self.offer(self.bob, self.card_b)
+
+        stats = match_queued_offers(batch_size=1)
+
+        self.assertEqual(stats, {'offers': 1, 'matched': 1})
+        self.assertEqual(self.queued(), set())
+        statuses = dict(ExchangeOffer.objects.values_list('pk', 'status'))
+        self.assertEqual(statuses, {first.pk: 'completed', second.pk: 'completed'})
+
+    def test_offers_stay_queued_until_processed(self):
+        first = self.offer(self.alice, self.card_a)
+        second = self.offer(self.bob, self.card_b)
+
+        with mock.patch.object(services, '_match_candidates', side_effect=[None, RuntimeError('lost')]):
+            with self.assertRaises(RuntimeError):
+                match_queued_offers()
+
+        # The crash hit the second offer: only the first one left the queue.
+        self.assertEqual(self.queued(), {second.pk})
+        self.assertEqual(match_queued_offers(), {'offers': 1, 'matched': 1})
+        self.assertEqual(ExchangeOffer.objects.get(pk=first.pk).status, 'completed')
+        self.assertEqual(self.queued(), set())
+
+    def test_skips_a_full_batch_of_closed_offers(self):
+        cancelled = self.offer(self.alice, self.card_a)
+        transition_offer(cancelled.pk, [ExchangeOffer.Status.OPEN], ExchangeOffer.Status.CANCELLED)
+        self.offer(self.bob, self.card_b)
+
+        self.assertEqual(match_queued_offers(batch_size=1), {'offers': 1, 'matched': 0})
+        self.assertEqual(self.queued(), set())
+
+    @override_settings(EXCHANGE_MATCH_CANDIDATE_LIMIT=1)
+    def test_limits_the_candidates_per_batch(self):
+        oldest = make_offer(self.alice, self.card_a)
+        make_offer(self.bob, self.card_b)
+        new = self.offer(self.carol, self.card_c)
+
+        candidates = services._batch_candidates([new])
+
+        self.assertEqual([candidate.pk for candidate in candidates], [oldest.pk, new.pk])
@@ -0,0 +1,50 @@
+from django.contrib.contenttypes.models import ContentType
+from django.test import TestCase
+
+from cards.models import PlayerCard
+from exchange.models import CardTransfer, ExchangeOffer
+from exchange.services import complete_cycle
+from packs.models import CardHolding
+from packs.ownership import card_quantities
+from packs.tests.factories import make_player_cards, make_user
+
+from .factories import give_cards, make_offer
+
+
+class CompleteCycleTests(TestCase):
+    def setUp(self):
+        self.alice, self.bob = make_user(), make_user()
+        self.card_a, self.card_b = make_player_cards(2)
+        give_cards(self.alice, self.card_a)
+        give_cards(self.bob, self.card_b)
+        self.offers = [make_offer(self.alice, self.card_a), make_offer(self.bob, self.card_b)]
+        self.content_type = ContentType.objects.get_for_model(PlayerCard)
+
+    def owned(self, user):
+        return card_quantities(user, self.content_type, [self.card_a.pk, self.card_b.pk])
+
+    def assert_nothing_changed(self):
+        self.assertEqual(
+            set(ExchangeOffer.objects.values_list('status', flat=True)), {ExchangeOffer.Status.OPEN}
+        )
+        self.assertFalse(CardTransfer.objects.exists())
+
+    def test_swaps_the_cards(self):
+        self.assertTrue(complete_cycle(self.offers))
+
+        self.assertEqual(self.owned(self.alice), {self.card_b.pk: 1})
+        self.assertEqual(self.owned(self.bob), {self.card_a.pk: 1})
+        self.assertEqual(CardTransfer.objects.count(), 2)
+
+    def test_refuses_when_a_recipient_already_owns_the_card(self):
+        # Written behind the bitmap cache's back, as another process would.
+        CardHolding.objects.create(user=self.bob, content_type=self.content_type, object_id=self.card_a.pk, quantity=1)
+
+        self.assertFalse(complete_cycle(self.offers))
+        self.assert_nothing_changed()
+
+    def test_refuses_when_a_sender_no_longer_owns_the_card(self):
+        CardHolding.objects.filter(user=self.alice).update(quantity=0)
+
+        self.assertFalse(complete_cycle(self.offers))
+        self.assert_nothing_changed()
@@ -0,0 +1,117 @@
+from datetime import timedelta
+from unittest.mock import patch
+
+from django.test import TestCase
+from django.utils import timezone
+
+from exchange.expiry import compact_offers, expire_offers
+from exchange.market import rebuild_supply
+from exchange.models import ExchangeNotification, ExchangeOffer, ExchangeOfferHistory, OfferSupply, RarityMarketStats
+from packs.tests.factories import make_player_cards, make_user
+
+from .factories import make_offer
+
+Status = ExchangeOffer.Status
+
+
+class ExpireOffersTests(TestCase):
+    def setUp(self):
+        self.alice, self.bob = make_user(), make_user()
+        self.cards = make_player_cards(3)
+        self.past = timezone.now() - timedelta(minutes=1)
+
+    def statuses(self):
+        return dict(ExchangeOffer.objects.values_list('id', 'status'))
+
+    def test_cancels_expired_live_offers_only(self):
+        expired = make_offer(self.alice, self.cards[0], expires_at=self.past)
+        requested = make_offer(
+            self.bob, self.cards[1], expires_at=self.past, status=Status.REQUESTED, requested_by=self.alice
+        )
+        fresh = make_offer(self.alice, self.cards[2])
+
+        self.assertEqual(expire_offers(batch_size=1), 2)
+
+        self.assertEqual(
+            self.statuses(),
+            {expired.pk: Status.CANCELLED, requested.pk: Status.CANCELLED, fresh.pk: Status.OPEN},
+        )
+
+    def test_offer_claimed_between_select_and_update_is_left_alone(self):
+        claimed = make_offer(self.alice, self.cards[0], expires_at=self.past)
+        other = make_offer(self.bob, self.cards[1], expires_at=self.past)
+        now = timezone.now
+        calls = []
+
+        def trade_claims_offer_first():
+            # The first clock read comes after the batch SELECT, right before
+            # the first UPDATE: a trade completes the offer in between.
+            if not calls:
+                ExchangeOffer.objects.filter(pk=claimed.pk).update(status=Status.COMPLETED)
+            calls.append(None)
+            return now()
+
+        with patch('exchange.expiry.timezone.now', side_effect=trade_claims_offer_first):
+            self.assertEqual(expire_offers(now=now()), 1)
+
+        self.assertEqual(self.statuses(), {claimed.pk: Status.COMPLETED, other.pk: Status.CANCELLED})
+        self.assertEqual(list(ExchangeNotification.objects.values_list('user_id', flat=True)), [self.bob.pk])
+
+    def test_releases_supply_of_open_offers_only(self):
+        make_offer(self.alice, self.cards[0], expires_at=self.past)
+        make_offer(self.bob, self.cards[0], expires_at=self.past)
+        make_offer(self.alice, self.cards[1], expires_at=self.past, status=Status.REQUESTED, requested_by=self.bob)
+        make_offer(self.bob, self.cards[2])
+        rebuild_supply()
+
+        self.assertEqual(expire_offers(), 3)
+
+        self.assertEqual(
+            dict(OfferSupply.objects.values_list('object_id', 'open_offers')),
+            {self.cards[0].pk: 0, self.cards[2].pk: 1},
+        )
+        rarity = self.cards[0].rarity.name.lower()
+        self.assertEqual(RarityMarketStats.objects.get(rarity=rarity).open_offers, 1)
+
+    def test_notifies_once_per_expired_offer(self):
+        make_offer(self.alice, self.cards[0], expires_at=self.past)
+        make_offer(self.alice, self.cards[1], expires_at=self.past)
+        make_offer(self.bob, self.cards[2], expires_at=self.past, status=Status.REQUESTED, requested_by=self.alice)
+
+        expire_offers(batch_size=2)
+        expire_offers()
+
+        self.assertEqual(
+            sorted(ExchangeNotification.objects.values_list('user_id', flat=True)),
+            sorted([self.alice.pk, self.alice.pk, self.bob.pk]),
+        )
+        self.assertEqual(
+            set(ExchangeNotification.objects.values_list('message', flat=True)),
+            {
+                f'La tua offerta di scambio (player #{card.pk}) è scaduta ed è stata annullata.'
+                for card in self.cards
+            },
+        )
+
+
+class CompactOffersTests(TestCase):
+    def setUp(self):
+        self.user = make_user()
+        self.cards = make_player_cards(4)
+
+    def test_moves_old_terminal_offers_keeping_their_ids(self):
+        old = timezone.now() - timedelta(days=2)
+        completed = make_offer(self.user, self.cards[0], status=Status.COMPLETED)
+        cancelled = make_offer(self.user, self.cards[1], status=Status.CANCELLED)
+        live = make_offer(self.user, self.cards[2])
+        recent = make_offer(self.user, self.cards[3], status=Status.CANCELLED)
+        ExchangeOffer.objects.exclude(pk=recent.pk).update(updated_at=old)
+
+        self.assertEqual(compact_offers(batch_size=1), 2)
+
+        self.assertEqual(set(ExchangeOffer.objects.values_list('id', flat=True)), {live.pk, recent.pk})
+        history = {row.pk: row for row in ExchangeOfferHistory.objects.all()}
+        self.assertEqual(set(history), {completed.pk, cancelled.pk})
+        self.assertEqual(history[completed.pk].status, Status.COMPLETED)
+        self.assertEqual(history[cancelled.pk].object_id, self.cards[1].pk)
+        self.assertEqual(history[completed.pk].closed_at, old)
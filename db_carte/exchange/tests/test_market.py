@@ -0,0 +1,32 @@
+from django.contrib.contenttypes.models import ContentType
+from django.test import TestCase
+
+from cards.models import PlayerCard
+from exchange.market import record_supply
+from exchange.models import OfferSupply, RarityMarketStats
+
+
+class RecordSupplyTests(TestCase):
+    def setUp(self):
+        self.content_type_id = ContentType.objects.get_for_model(PlayerCard).pk
+
+    def supply(self):
+        return {
+            object_id: (rarity, open_offers)
+            for object_id, rarity, open_offers in OfferSupply.objects.values_list('object_id', 'rarity', 'open_offers')
+        }
+
+    def test_counts_open_offers_per_card_and_rarity(self):
+        record_supply({(self.content_type_id, 1, 'common'): 2, (self.content_type_id, 2, 'rare'): 1})
+        record_supply({(self.content_type_id, 1, 'common'): -1, (self.content_type_id, 3, 'rare'): 1})
+
+        self.assertEqual(self.supply(), {1: ('common', 1), 2: ('rare', 1), 3: ('rare', 1)})
+        self.assertEqual(
+            dict(RarityMarketStats.objects.values_list('rarity', 'open_offers')), {'common': 1, 'rare': 2}
+        )
+
+    def test_zero_deltas_create_no_rows(self):
+        record_supply({(self.content_type_id, 1, 'common'): 0})
+
+        self.assertFalse(OfferSupply.objects.exists())
+        self.assertFalse(RarityMarketStats.objects.exists())
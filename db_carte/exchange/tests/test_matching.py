@@ -0,0 +1,73 @@
+from django.test import SimpleTestCase
+
+from exchange.matching import MarketOffer, find_trade_cycles
+
+
+def offer(offer_id, user_id, card, rarity='gold'):
+    return MarketOffer(offer_id, user_id, (1, card), rarity)
+
+
+class FindTradeCyclesTests(SimpleTestCase):
+    def test_finds_a_two_way_swap(self):
+        offers = [offer('a', 1, 10), offer('b', 2, 20)]
+        owned = {1: {(1, 10)}, 2: {(1, 20)}}
+
+        cycles = find_trade_cycles(offers, owned)
+
+        self.assertEqual([[o.offer_id for o in cycle] for cycle in cycles], [['a', 'b']])
+        self.assertEqual(owned, {1: {(1, 10), (1, 20)}, 2: {(1, 20), (1, 10)}})
+
+    def test_finds_a_three_way_ring(self):
+        # Nobody can swap pairwise: 1 already owns 20, 2 owns 30, 3 owns 10.
+        offers = [offer('a', 1, 10), offer('b', 2, 20), offer('c', 3, 30)]
+        owned = {1: {(1, 10), (1, 20)}, 2: {(1, 20), (1, 30)}, 3: {(1, 30), (1, 10)}}
+
+        cycles = find_trade_cycles(offers, owned)
+
+        self.assertEqual(len(cycles), 1)
+        cycle = cycles[0]
+        self.assertEqual(len(cycle), 3)
+        for position, given in enumerate(cycle):
+            receiver = cycle[(position + 1) % len(cycle)]
+            self.assertIn(given.card, owned[receiver.user_id])
+
+    def test_no_cycle_when_the_receiver_already_owns_the_card(self):
+        offers = [offer('a', 1, 10), offer('b', 2, 20)]
+        owned = {1: {(1, 10), (1, 20)}, 2: {(1, 20)}}
+
+        self.assertEqual(find_trade_cycles(offers, owned), [])
+        self.assertEqual(owned, {1: {(1, 10), (1, 20)}, 2: {(1, 20)}})
+
+    def test_rarities_are_not_mixed(self):
+        offers = [offer('a', 1, 10, 'gold'), offer('b', 2, 20, 'silver')]
+
+        self.assertEqual(find_trade_cycles(offers, {}), [])
+
+    def test_a_user_appears_at_most_once_per_cycle(self):
+        # User 1 offers two cards, so a 1 -> 2 -> 1 path exists by user but
+        # is not a valid trade; only the pairwise swaps are.
+        offers = [offer('a1', 1, 10), offer('b', 2, 20), offer('a2', 1, 11), offer('c', 3, 30)]
+
+        cycles = find_trade_cycles(offers, {}, max_length=3)
+
+        self.assertTrue(cycles)
+        for cycle in cycles:
+            users = [o.user_id for o in cycle]
+            self.assertEqual(len(users), len(set(users)))
+
+    def test_cycles_from_one_pass_do_not_share_offers(self):
+        offers = [offer(index, index % 6, 100 + index) for index in range(30)]
+
+        cycles = find_trade_cycles(offers, {}, max_length=3)
+
+        self.assertTrue(cycles)
+        matched = [o.offer_id for cycle in cycles for o in cycle]
+        self.assertEqual(len(matched), len(set(matched)))
+        for cycle in cycles:
+            self.assertEqual(len({o.user_id for o in cycle}), len(cycle))
+
+    def test_max_length_bounds_the_ring(self):
+        offers = [offer('a', 1, 10), offer('b', 2, 20), offer('c', 3, 30)]
+        owned = {1: {(1, 10), (1, 20)}, 2: {(1, 20), (1, 30)}, 3: {(1, 30), (1, 10)}}
+
+        self.assertEqual(find_trade_cycles(offers, owned, max_length=2), [])
@@ -0,0 +1,90 @@
+from datetime import timedelta
+
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from exchange.models import ExchangeNotification
+from exchange.notifications import mark_read, notify, purge_read_notifications, unread_count
+from packs.tests.factories import make_user
+
+
+def notification(user, **fields):
+    return ExchangeNotification(user=user, title='Scambio', message='Offerta', **fields)
+
+
+class UnreadCounterTests(TestCase):
+    def setUp(self):
+        self.alice, self.bob = make_user(), make_user()
+
+    def test_counter_follows_notify_and_mark_read(self):
+        notify([notification(self.alice), notification(self.alice), notification(self.bob)])
+        notify([notification(self.alice, is_read=True)])
+        self.assertEqual((unread_count(self.alice), unread_count(self.bob)), (2, 1))
+
+        first, second = ExchangeNotification.objects.filter(user=self.alice, is_read=False).values_list('id', flat=True)
+        read = ExchangeNotification.objects.get(user=self.alice, is_read=True).pk
+        self.assertEqual(mark_read(self.alice, [first]), 1)
+        # Already read ids and other users' ids do not move the counter.
+        bob_id = ExchangeNotification.objects.get(user=self.bob).pk
+        self.assertEqual(mark_read(self.alice, [first, read, bob_id, second]), 1)
+
+        self.assertEqual((unread_count(self.alice), unread_count(self.bob)), (0, 1))
+
+    def test_users_without_notifications_count_zero(self):
+        self.assertEqual(unread_count(self.alice), 0)
+        self.assertEqual(mark_read(self.alice, []), 0)
+        self.assertEqual(unread_count(self.alice), 0)
+
+    def test_purge_drops_old_read_rows_only(self):
+        notify([notification(self.alice) for _ in range(3)])
+        ids = list(ExchangeNotification.objects.values_list('id', flat=True))
+        mark_read(self.alice, ids[:2])
+        ExchangeNotification.objects.filter(pk=ids[1]).update(created_at=timezone.now() - timedelta(days=400))
+        ExchangeNotification.objects.filter(pk=ids[2]).update(created_at=timezone.now() - timedelta(days=400))
+
+        self.assertEqual(purge_read_notifications(batch_size=1), 1)
+
+        self.assertEqual(set(ExchangeNotification.objects.values_list('id', flat=True)), {ids[0], ids[2]})
+        self.assertEqual(unread_count(self.alice), 1)
+
+
+class NotificationViewTests(TestCase):
+    def setUp(self):
+        self.user = make_user()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_count_view_reads_the_counter(self):
+        notify([notification(self.user), notification(self.user)])
+        self.assertEqual(self.client.get('/api/exchange/notifications/count/').json(), {'unread': 2})
+
+        ids = [str(pk) for pk in ExchangeNotification.objects.values_list('id', flat=True)]
+        response = self.client.post('/api/exchange/notifications/read/', {'ids': ids[:1]}, format='json')
+        self.assertEqual(response.status_code, 204)
+        self.assertEqual(self.client.get('/api/exchange/notifications/count/').json(), {'unread': 1})
+
+    def test_paging_with_tied_timestamps_neither_repeats_nor_skips(self):
+        notify([notification(self.user) for _ in range(7)])
+        ExchangeNotification.objects.update(created_at=timezone.now())
+        older = notification(self.user)
+        notify([older])
+        ExchangeNotification.objects.filter(pk=older.pk).update(created_at=timezone.now() - timedelta(hours=1))
+
+        seen, before = [], None
+        while True:
+            params = {'limit': 3, **({'before': before} if before else {})}
+            response = self.client.get('/api/exchange/notifications/', params)
+            self.assertEqual(response.status_code, 200)
+            seen.extend(row['id'] for row in response.json())
+            before = response.get('X-Next-Before')
+            if not before:
+                break
+
+        self.assertEqual(len(seen), 8)
+        self.assertEqual(set(seen), {str(pk) for pk in ExchangeNotification.objects.values_list('id', flat=True)})
+        self.assertEqual(seen[-1], str(older.pk))
+
+    def test_rejects_malformed_cursor(self):
+        response = self.client.get('/api/exchange/notifications/', {'before': 'nope'})
+        self.assertEqual(response.status_code, 400)
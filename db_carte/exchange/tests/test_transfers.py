@@ -0,0 +1,57 @@
+from django.contrib.contenttypes.models import ContentType
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from cards.models import PlayerCard
+from exchange.models import CardTransfer
+from packs.tests.factories import make_player_cards, make_user
+
+
+class CardTransferHistoryTests(TestCase):
+    def setUp(self):
+        self.alice, self.bob = make_user(), make_user()
+        self.client = APIClient()
+        self.client.force_authenticate(self.alice)
+        self.content_type = ContentType.objects.get_for_model(PlayerCard)
+
+    def transfer(self, count):
+        CardTransfer.objects.bulk_create(
+            [
+                CardTransfer(
+                    from_user=self.alice if index % 2 else self.bob,
+                    to_user=self.bob if index % 2 else self.alice,
+                    content_type=self.content_type,
+                    object_id=card.pk,
+                    rarity=card.rarity,
+                )
+                for index, card in enumerate(make_player_cards(count))
+            ]
+        )
+
+    def history(self, **params):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/api/exchange/transfers/', params)
+        self.assertEqual(response.status_code, 200)
+        return response.json(), len(queries)
+
+    def test_card_names_do_not_cost_a_query_per_row(self):
+        self.transfer(2)
+        _, few = self.history()
+        self.transfer(8)
+        body, many = self.history()
+
+        self.assertEqual(len(body['results']), 10)
+        self.assertTrue(all(row['card_name'] for row in body['results']))
+        self.assertEqual(many, few)
+
+    def test_pages_with_before(self):
+        self.transfer(5)
+        first, _ = self.history(limit=3)
+        second, _ = self.history(limit=3, before=first['next_before'])
+
+        ids = [row['id'] for row in first['results'] + second['results']]
+        self.assertEqual(ids, sorted(CardTransfer.objects.values_list('id', flat=True), reverse=True))
+        self.assertEqual({row['direction'] for row in first['results']}, {'sent', 'received'})
+        self.assertIsNone(second['next_before'])
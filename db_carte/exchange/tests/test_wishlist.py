@@ -0,0 +1,84 @@
+from unittest.mock import patch
+
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from exchange.models import WishlistEntry
+from exchange.utils import normalize_team
+from packs.tests.factories import make_player_cards, make_user
+
+
+class NormalizeTeamTests(TestCase):
+    def test_accepts_codes_and_labels_in_any_case(self):
+        for value in ('LAKECITY', 'lakecity', 'Lake City', 'lake-city'):
+            self.assertEqual(normalize_team(value), 'LAKECITY', value)
+        self.assertEqual(normalize_team('4 mori'), '4MORI')
+        self.assertIsNone(normalize_team('Atlantis'))
+        self.assertIsNone(normalize_team(None))
+
+
+class WishlistViewTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = make_user()
+        self.client.force_authenticate(self.user)
+        self.card = make_player_cards(1, team='DIAVOLI')[0]
+
+    def add(self, **data):
+        return self.client.post('/api/exchange/wishlist/', data, format='json')
+
+    def test_team_filter_is_stored_as_code_and_matches_cards(self):
+        response = self.add(team='diavoli')
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(WishlistEntry.objects.get().team, 'DIAVOLI')
+        self.assertEqual(response.json()['matches'], 1)
+
+    def test_rejects_unknown_team(self):
+        response = self.add(team='Atlantis')
+
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(WishlistEntry.objects.exists())
+
+    def test_rejects_duplicate_filters_and_cards(self):
+        self.assertEqual(self.add(team='DIAVOLI', rarity='Common').status_code, 201)
+        self.assertEqual(self.add(team='Diavoli', rarity='common').status_code, 400)
+        self.assertEqual(self.add(team='Diavoli').status_code, 201)
+
+        self.assertEqual(self.add(card_type='player', card_id=self.card.pk).status_code, 201)
+        self.assertEqual(self.add(card_type='player', card_id=self.card.pk).status_code, 400)
+        self.assertEqual(WishlistEntry.objects.filter(user=self.user).count(), 3)
+
+    def test_other_users_can_add_the_same_entry(self):
+        self.assertEqual(self.add(team='DIAVOLI').status_code, 201)
+        self.client.force_authenticate(make_user())
+
+        self.assertEqual(self.add(team='DIAVOLI').status_code, 201)
+
+    def test_constraint_rejects_a_duplicate_that_passed_the_check(self):
+        self.assertEqual(self.add(team='DIAVOLI').status_code, 201)
+        self.assertEqual(self.add(card_type='player', card_id=self.card.pk).status_code, 201)
+
+        # As if a concurrent request inserted the same entries after this
+        # request's duplicate check.
+        with patch('exchange.views.find_duplicate', return_value=None):
+            self.assertEqual(self.add(team='Diavoli').status_code, 400)
+            self.assertEqual(self.add(card_type='player', card_id=self.card.pk).status_code, 400)
+        self.assertEqual(WishlistEntry.objects.count(), 2)
+
+    def test_listing_loads_card_names_in_bulk(self):
+        for card in make_player_cards(3):
+            self.assertEqual(self.add(card_type='player', card_id=card.pk).status_code, 201)
+        self.add(team='DIAVOLI')
+
+        with CaptureQueriesContext(connection) as few:
+            self.client.get('/api/exchange/wishlist/')
+        for card in make_player_cards(5):
+            self.add(card_type='player', card_id=card.pk)
+        with CaptureQueriesContext(connection) as many:
+            response = self.client.get('/api/exchange/wishlist/')
+
+        self.assertEqual(len(response.json()), 9)
+        self.assertEqual(len(many), len(few))
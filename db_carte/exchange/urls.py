@@ -1,13 +1,19 @@
 from django.urls import path
 
 from .views import (
+    CardTransferHistoryView,
     ExchangeFeedView,
+    ExchangeNotificationCountView,
     ExchangeNotificationListView,
     ExchangeNotificationReadView,
     ExchangeOfferCreateView,
     ExchangeOfferDetailView,
     ExchangeOfferJoinView,
+    MarketDepthView,
     MyExchangeOffersView,
+    TradeableCardsView,
+    WishlistEntryDetailView,
+    WishlistView,
 )
 
 urlpatterns = [
@@ -16,6 +22,12 @@ urlpatterns = [
     path('offers/feed/', ExchangeFeedView.as_view(), name='exchange-offer-feed'),
     path('offers/<uuid:offer_id>/', ExchangeOfferDetailView.as_view(), name='exchange-offer-detail'),
     path('offers/<uuid:offer_id>/join/', ExchangeOfferJoinView.as_view(), name='exchange-offer-join'),
+    path('market/', MarketDepthView.as_view(), name='exchange-market'),
+    path('transfers/', CardTransferHistoryView.as_view(), name='exchange-transfers'),
+    path('users/<str:username>/tradeable/', TradeableCardsView.as_view(), name='exchange-tradeable'),
+    path('wishlist/', WishlistView.as_view(), name='exchange-wishlist'),
+    path('wishlist/<int:entry_id>/', WishlistEntryDetailView.as_view(), name='exchange-wishlist-entry'),
     path('notifications/', ExchangeNotificationListView.as_view(), name='exchange-notifications'),
+    path('notifications/count/', ExchangeNotificationCountView.as_view(), name='exchange-notifications-count'),
     path('notifications/read/', ExchangeNotificationReadView.as_view(), name='exchange-notifications-read'),
 ]
@@ -2,11 +2,10 @@ from __future__ import annotations
 
 from typing import Optional, Tuple, Type
 
-from django.contrib.contenttypes.models import ContentType
 from django.db.models import Model
 
-from cards.models import BonusMalusCard, CoachCard, GoalkeeperCard, PlayerCard
-from packs.models import PackPurchaseCard
+from cards.models import TEAMS, BonusMalusCard, CoachCard, GoalkeeperCard, PlayerCard
+from packs.ownership import card_quantity
 
 
 CARD_TYPE_MODEL_MAP: dict[str, Type[Model]] = {
@@ -23,6 +22,13 @@ CANONICAL_CARD_TYPE_LABELS: dict[str, str] = {
     'bonusmalus': 'bonusMalus',
 }
 
+# Team codes by code or label with spaces and dashes removed, e.g. 'lakecity'.
+_TEAM_CODES: dict[str, str] = {
+    simplified: code
+    for code, label in TEAMS
+    for simplified in (code.lower(), label.replace(' ', '').replace('-', '').lower())
+}
+
 
 def normalize_card_type(value: Optional[str]) -> Optional[str]:
     if not isinstance(value, str):
@@ -36,6 +42,13 @@ def normalize_card_type(value: Optional[str]) -> Optional[str]:
     return simplified if simplified in CARD_TYPE_MODEL_MAP else None
 
 
+def normalize_team(value: Optional[str]) -> Optional[str]:
+    """The ``TEAMS`` code for a team code or label in any case, else None."""
+    if not isinstance(value, str):
+        return None
+    return _TEAM_CODES.get(value.replace(' ', '').replace('-', '').replace('_', '').lower())
+
+
 def get_model_for_card_type(value: Optional[str]) -> Optional[Tuple[str, Type[Model]]]:
     normalized = normalize_card_type(value)
     if not normalized:
@@ -47,12 +60,7 @@ def get_model_for_card_type(value: Optional[str]) -> Optional[Tuple[str, Type[Mo
 
 
 def get_card_quantity_for_user(user, model: Type[Model], card_id: int) -> int:
-    content_type = ContentType.objects.get_for_model(model)
-    return PackPurchaseCard.objects.filter(
-        purchase__user=user,
-        content_type=content_type,
-        object_id=card_id,
-    ).count()
+    return card_quantity(user, model, card_id)
 
 
 def get_card_type_label(normalized: str) -> str:
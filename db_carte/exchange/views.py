@@ -1,27 +1,43 @@
 import logging
+import uuid
 
+from django.contrib.auth import get_user_model
 from django.contrib.contenttypes.models import ContentType
-from django.db import DatabaseError
+from django.db import DatabaseError, IntegrityError, transaction
+from django.db.models import Count, Exists, OuterRef, prefetch_related_objects
 from django.shortcuts import get_object_or_404
 from django.utils import timezone
 from rest_framework import permissions, status
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
-from .models import ExchangeNotification, ExchangeOffer
-from .serializers import ExchangeNotificationSerializer, ExchangeOfferSerializer
-from .services import attempt_match_for_offer
-from .utils import (
-    CANONICAL_CARD_TYPE_LABELS,
-    get_card_quantity_for_user,
-    get_model_for_card_type,
+from db_carte.renderers import NegotiatedRenderersMixin
+from packs.bitsets import get_card_index, tradeable_between, user_bitsets
+
+from .market import market_depth, record_supply, supply_key
+from .models import CardTransfer, ExchangeOffer, WishlistCard, WishlistEntry
+from .notifications import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, mark_read, unread_count, unread_page
+from .serializers import (
+    CardTransferSerializer,
+    ExchangeNotificationSerializer,
+    ExchangeOfferSerializer,
+    WishlistEntrySerializer,
+)
+from .services import (
+    OfferCardNotFoundError,
+    OfferError,
+    create_offer,
+    tradeable_rarities,
+    transition_offer,
 )
+from .utils import get_model_for_card_type, normalize_team
+from .wishlist import find_duplicate, index_entry
 
 
 logger = logging.getLogger(__name__)
 
 
-class BaseExchangeView(APIView):
+class BaseExchangeView(NegotiatedRenderersMixin, APIView):
     permission_classes = [permissions.IsAuthenticated]
 
 
@@ -33,74 +49,61 @@ class MyExchangeOffersView(BaseExchangeView):
             .select_related('user')
         )
         serializer = ExchangeOfferSerializer(offers, many=True, context={'request': request})
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        return Response(self.layout(request, serializer.data), status=status.HTTP_200_OK)
 
 
 class ExchangeFeedView(BaseExchangeView):
     def get(self, request):
+        # Offers of cards on the user's wishlist come first.
+        wishlist_hit = Exists(
+            WishlistCard.objects.filter(
+                user=request.user,
+                content_type=OuterRef('content_type'),
+                object_id=OuterRef('object_id'),
+            )
+        )
         offers = (
             ExchangeOffer.objects.filter(status=ExchangeOffer.Status.OPEN)
             .exclude(user=request.user)
+            .annotate(wishlist_hit=wishlist_hit)
+            .order_by('-wishlist_hit', '-created_at')
             .select_related('user')
         )
+        if request.query_params.get('actionable') in ('1', 'true'):
+            offers = self._actionable(request.user, offers)
         serializer = ExchangeOfferSerializer(offers, many=True, context={'request': request})
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        return Response(self.layout(request, serializer.data), status=status.HTTP_200_OK)
+
+    @staticmethod
+    def _actionable(user, offers):
+        """
+        Keeps the offers the user can complete: they have a spare copy of the
+        required rarity and do not own the offered card yet.
+        """
+        offers = offers.filter(required_rarity__in=tradeable_rarities(user.pk))
+        card_index = get_card_index()
+        owned = user_bitsets(user.pk)
+        return [
+            offer for offer in offers
+            if not owned.owns(card_index, (offer.content_type_id, offer.object_id))
+        ]
 
 
 class ExchangeOfferCreateView(BaseExchangeView):
     def post(self, request):
-        card_id = request.data.get('card_id')
-        raw_card_type = request.data.get('card_type')
-        mapping = get_model_for_card_type(raw_card_type)
-        if not mapping:
-            return Response({'detail': 'Unsupported card type.'}, status=status.HTTP_400_BAD_REQUEST)
-
-        normalized_type, model = mapping
-
         try:
-            card_id = int(card_id)
-        except (TypeError, ValueError):
-            return Response({'detail': 'card_id must be a valid integer.'}, status=status.HTTP_400_BAD_REQUEST)
-
-        card = get_object_or_404(model, pk=card_id)
-        content_type = ContentType.objects.get_for_model(model)
-        total_owned = get_card_quantity_for_user(request.user, model, card.pk)
-        if total_owned <= 0:
-            return Response({'detail': 'You must own the selected card to trade it.'}, status=status.HTTP_400_BAD_REQUEST)
-
-        active_offers = (
-            ExchangeOffer.objects.filter(
-                user=request.user,
-                content_type=content_type,
-                object_id=card.pk,
-            )
-            .exclude(status__in=[ExchangeOffer.Status.CANCELLED, ExchangeOffer.Status.COMPLETED])
-            .count()
-        )
-        if total_owned - active_offers <= 1:
-            return Response(
-                {'detail': 'You need an extra copy of this card before publishing the trade.'},
-                status=status.HTTP_400_BAD_REQUEST,
+            offer, match_result = create_offer(
+                request.user,
+                request.data.get('card_type'),
+                request.data.get('card_id'),
+                wants=request.data.get('wants'),
             )
+        except OfferCardNotFoundError as exc:
+            return Response({'detail': str(exc)}, status=status.HTTP_404_NOT_FOUND)
+        except OfferError as exc:
+            return Response({'detail': str(exc)}, status=status.HTTP_400_BAD_REQUEST)
 
-        rarity_name = getattr(getattr(card, 'rarity', None), 'name', 'common') or 'common'
-        normalized_rarity = rarity_name.lower()
-        wants = request.data.get('wants')
-        if not wants:
-            wants = f'Any {normalized_rarity} card'
-
-        canonical_type = CANONICAL_CARD_TYPE_LABELS.get(normalized_type, normalized_type)
-
-        offer = ExchangeOffer.objects.create(
-            user=request.user,
-            content_type=content_type,
-            object_id=card.pk,
-            card_type=canonical_type,
-            required_rarity=normalized_rarity,
-            wants=wants,
-        )
         serializer = ExchangeOfferSerializer(offer, context={'request': request})
-        match_result = attempt_match_for_offer(offer)
         payload = serializer.data
         if match_result:
             payload['match_result'] = match_result
@@ -112,7 +115,18 @@ class ExchangeOfferDetailView(BaseExchangeView):
         offer = get_object_or_404(ExchangeOffer, pk=offer_id)
         if offer.user_id != request.user.id:
             return Response({'detail': 'You can only delete your offers.'}, status=status.HTTP_403_FORBIDDEN)
-        offer.delete()
+        # Only delete the offer if no trade has claimed it in the meantime.
+        with transaction.atomic():
+            deleted, _ = ExchangeOffer.objects.filter(pk=offer.pk, status=ExchangeOffer.Status.OPEN).delete()
+            if deleted:
+                record_supply({supply_key(offer): -1})
+            else:
+                deleted, _ = ExchangeOffer.objects.filter(
+                    pk=offer.pk,
+                    status__in=[ExchangeOffer.Status.REQUESTED, ExchangeOffer.Status.CANCELLED],
+                ).delete()
+        if not deleted:
+            return Response({'detail': 'This offer has already been traded.'}, status=status.HTTP_409_CONFLICT)
         return Response(status=status.HTTP_204_NO_CONTENT)
 
 
@@ -121,29 +135,211 @@ class ExchangeOfferJoinView(BaseExchangeView):
         offer = get_object_or_404(ExchangeOffer, pk=offer_id)
         if offer.user_id == request.user.id:
             return Response({'detail': 'You cannot join your own offer.'}, status=status.HTTP_400_BAD_REQUEST)
-        if offer.status != ExchangeOffer.Status.OPEN:
+        with transaction.atomic():
+            joined = transition_offer(
+                offer.pk,
+                [ExchangeOffer.Status.OPEN],
+                ExchangeOffer.Status.REQUESTED,
+                requested_by=request.user,
+                requested_at=timezone.now(),
+            )
+            if joined:
+                record_supply({supply_key(offer): -1})
+        if not joined:
             return Response({'detail': 'This offer is no longer available.'}, status=status.HTTP_400_BAD_REQUEST)
-        offer.status = ExchangeOffer.Status.REQUESTED
-        offer.requested_by = request.user
-        offer.requested_at = timezone.now()
-        offer.save(update_fields=['status', 'requested_by', 'requested_at', 'updated_at'])
+        offer.refresh_from_db()
         serializer = ExchangeOfferSerializer(offer, context={'request': request})
         return Response(serializer.data, status=status.HTTP_200_OK)
 
 
+class CardTransferHistoryView(BaseExchangeView):
+    DEFAULT_LIMIT = 50
+    MAX_LIMIT = 200
+
+    def get(self, request):
+        try:
+            limit = min(int(request.query_params.get('limit', self.DEFAULT_LIMIT)), self.MAX_LIMIT)
+            before = request.query_params.get('before')
+            before = int(before) if before else None
+        except (TypeError, ValueError):
+            return Response({'detail': 'limit and before must be integers.'}, status=status.HTTP_400_BAD_REQUEST)
+        if limit < 1:
+            return Response({'detail': 'limit must be positive.'}, status=status.HTTP_400_BAD_REQUEST)
+
+        # Two index range scans (one per direction) merged in Python, instead
+        # of an OR across both user columns.
+        legs = []
+        for user_field in ('from_user', 'to_user'):
+            queryset = CardTransfer.objects.filter(**{user_field: request.user})
+            if before is not None:
+                queryset = queryset.filter(id__lt=before)
+            legs.extend(
+                queryset.select_related('from_user', 'to_user', 'content_type', 'rarity')
+                .order_by('-id')[:limit]
+            )
+        transfers = sorted(legs, key=lambda transfer: transfer.id, reverse=True)[:limit]
+        # One query per card type for the names instead of one per row.
+        prefetch_related_objects(transfers, 'card')
+
+        serializer = CardTransferSerializer(transfers, many=True, context={'request': request})
+        return Response(
+            {
+                'results': self.layout(request, serializer.data),
+                'next_before': transfers[-1].id if len(transfers) == limit else None,
+            },
+            status=status.HTTP_200_OK,
+        )
+
+
+class TradeableCardsView(BaseExchangeView):
+    """Cards each side has spare copies of that the other side lacks."""
+
+    @staticmethod
+    def _serialize(keys):
+        return [
+            {'card_type': ContentType.objects.get_for_id(content_type_id).model, 'card_id': object_id}
+            for content_type_id, object_id in keys
+        ]
+
+    def get(self, request, username: str):
+        other = get_object_or_404(get_user_model(), username=username)
+        if other.pk == request.user.pk:
+            return Response({'detail': 'Pick another user.'}, status=status.HTTP_400_BAD_REQUEST)
+        payload = {
+            'username': other.username,
+            'you_can_give': self._serialize(tradeable_between(request.user.pk, other.pk)),
+            'you_can_get': self._serialize(tradeable_between(other.pk, request.user.pk)),
+        }
+        return Response(payload, status=status.HTTP_200_OK)
+
+
+class MarketDepthView(BaseExchangeView):
+    def get(self, request):
+        card = None
+        if request.query_params.get('card_type') or request.query_params.get('card_id'):
+            mapping = get_model_for_card_type(request.query_params.get('card_type'))
+            if not mapping:
+                return Response({'detail': 'Unsupported card type.'}, status=status.HTTP_400_BAD_REQUEST)
+            try:
+                card_id = int(request.query_params.get('card_id'))
+            except (TypeError, ValueError):
+                return Response({'detail': 'card_id must be a valid integer.'}, status=status.HTTP_400_BAD_REQUEST)
+            card = (ContentType.objects.get_for_model(mapping[1]).pk, card_id)
+        return Response(market_depth(card), status=status.HTTP_200_OK)
+
+
+class WishlistView(BaseExchangeView):
+    FILTER_FIELDS = ('rarity', 'team', 'season')
+
+    @staticmethod
+    def _duplicate():
+        return Response({'detail': 'This card or filter is already in your wishlist.'}, status=status.HTTP_400_BAD_REQUEST)
+
+    def get(self, request):
+        entries = (
+            WishlistEntry.objects.filter(user=request.user)
+            .annotate(matches=Count('index_rows'))
+            .prefetch_related('card')
+            .order_by('-created_at')
+        )
+        serializer = WishlistEntrySerializer(entries, many=True, context={'request': request})
+        return Response(self.layout(request, serializer.data), status=status.HTTP_200_OK)
+
+    def post(self, request):
+        raw_card_type = request.data.get('card_type')
+        mapping = get_model_for_card_type(raw_card_type) if raw_card_type else None
+        if raw_card_type and not mapping:
+            return Response({'detail': 'Unsupported card type.'}, status=status.HTTP_400_BAD_REQUEST)
+
+        entry = WishlistEntry(user=request.user, card_type=mapping[0] if mapping else '')
+        card_id = request.data.get('card_id')
+        if card_id is not None:
+            if not mapping:
+                return Response({'detail': 'card_type is required with card_id.'}, status=status.HTTP_400_BAD_REQUEST)
+            try:
+                card_id = int(card_id)
+            except (TypeError, ValueError):
+                return Response({'detail': 'card_id must be a valid integer.'}, status=status.HTTP_400_BAD_REQUEST)
+            entry.card = get_object_or_404(mapping[1], pk=card_id)
+        else:
+            for field in self.FILTER_FIELDS:
+                value = request.data.get(field)
+                if value:
+                    setattr(entry, field, str(value).strip()[:entry._meta.get_field(field).max_length])
+            entry.rarity = entry.rarity.lower()
+            if entry.team:
+                team = normalize_team(entry.team)
+                if not team:
+                    return Response({'detail': 'Unknown team.'}, status=status.HTTP_400_BAD_REQUEST)
+                entry.team = team
+            if not (entry.card_type or entry.rarity or entry.team or entry.season):
+                return Response(
+                    {'detail': 'Provide a card or at least one of card_type, rarity, team, season.'},
+                    status=status.HTTP_400_BAD_REQUEST,
+                )
+
+        if find_duplicate(entry) is not None:
+            return self._duplicate()
+        try:
+            with transaction.atomic():
+                entry.save()
+        except IntegrityError:
+            # A concurrent request added the same entry after the check.
+            return self._duplicate()
+        entry.matches = index_entry(entry)
+        serializer = WishlistEntrySerializer(entry, context={'request': request})
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
+
+
+class WishlistEntryDetailView(BaseExchangeView):
+    def delete(self, request, entry_id: int):
+        deleted, _ = WishlistEntry.objects.filter(pk=entry_id, user=request.user).delete()
+        if not deleted:
+            return Response({'detail': 'Wishlist entry not found.'}, status=status.HTTP_404_NOT_FOUND)
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+
 class ExchangeNotificationListView(BaseExchangeView):
+    """
+    Unread notifications, newest first. ``limit`` and ``before`` (a
+    notification id) page through them; the next cursor is returned in the
+    ``X-Next-Before`` header so the body stays a plain list.
+    """
+
     def get(self, request):
         try:
-            notifications = ExchangeNotification.objects.filter(
-                user=request.user,
-                is_read=False,
-            ).order_by('-created_at')
+            limit = min(int(request.query_params.get('limit', DEFAULT_PAGE_SIZE)), MAX_PAGE_SIZE)
+            before = request.query_params.get('before')
+            before = str(uuid.UUID(before)) if before else None
+        except (TypeError, ValueError):
+            return Response(
+                {'detail': 'limit must be an integer and before a notification id.'},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        if limit < 1:
+            return Response({'detail': 'limit must be positive.'}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            notifications, next_before = unread_page(request.user, limit, before)
         except DatabaseError as exc:
             logger.warning('Unable to read exchange notifications, returning empty list', exc_info=exc)
             return Response([], status=status.HTTP_200_OK)
 
         serializer = ExchangeNotificationSerializer(notifications, many=True)
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        response = Response(self.layout(request, serializer.data), status=status.HTTP_200_OK)
+        if next_before:
+            response['X-Next-Before'] = next_before
+        return response
+
+
+class ExchangeNotificationCountView(BaseExchangeView):
+    def get(self, request):
+        try:
+            unread = unread_count(request.user)
+        except DatabaseError as exc:
+            logger.warning('Unable to read the exchange notification counter', exc_info=exc)
+            unread = 0
+        return Response({'unread': unread}, status=status.HTTP_200_OK)
 
 
 class ExchangeNotificationReadView(BaseExchangeView):
@@ -153,7 +349,7 @@ class ExchangeNotificationReadView(BaseExchangeView):
             return Response({'detail': 'Provide notification ids.'}, status=status.HTTP_400_BAD_REQUEST)
 
         try:
-            ExchangeNotification.objects.filter(user=request.user, pk__in=ids).update(is_read=True)
+            mark_read(request.user, ids)
         except DatabaseError as exc:
             logger.warning('Unable to mark exchange notifications as read', exc_info=exc)
             return Response({'detail': 'Notifications unavailable at the moment.'}, status=status.HTTP_503_SERVICE_UNAVAILABLE)
@@ -0,0 +1,197 @@
+"""
+Structured wishlists and their reverse index.
+
+A ``WishlistEntry`` names one card or a card filter; ``WishlistCard`` holds
+one row per (entry, matching card), so "who wants this card" and "which of
+these cards do I want" are single indexed lookups. Entries are indexed when
+saved and filter entries are re-evaluated whenever a card is created or
+edited.
+"""
+
+from __future__ import annotations
+
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from django.contrib.contenttypes.models import ContentType
+from django.db import transaction
+from django.db.models import Q
+
+from .models import WishlistCard, WishlistEntry
+from .utils import CARD_TYPE_MODEL_MAP
+
+CardKey = Tuple[int, int]  # (content type id, object id)
+
+
+def _card_filter(entry: WishlistEntry, model) -> Optional[Q]:
+    field_names = {field.name for field in model._meta.get_fields()}
+    condition = Q()
+    if entry.rarity:
+        condition &= Q(rarity__name__iexact=entry.rarity)
+    if entry.season:
+        condition &= Q(season=entry.season)
+    if entry.team:
+        if 'team' not in field_names:
+            return None
+        condition &= Q(team=entry.team)
+    return condition
+
+
+def matching_cards(entry: WishlistEntry) -> List[CardKey]:
+    if not entry.is_filter:
+        return [(entry.content_type_id, entry.object_id)]
+
+    keys: List[CardKey] = []
+    for card_type, model in CARD_TYPE_MODEL_MAP.items():
+        if entry.card_type and entry.card_type != card_type:
+            continue
+        condition = _card_filter(entry, model)
+        if condition is None:
+            continue
+        content_type_id = ContentType.objects.get_for_model(model).pk
+        keys.extend(
+            (content_type_id, object_id)
+            for object_id in model.objects.filter(condition).values_list('pk', flat=True)
+        )
+    return keys
+
+
+def find_duplicate(entry: WishlistEntry) -> Optional[WishlistEntry]:
+    """An existing entry of the same user for the same card or the same filter."""
+    existing = WishlistEntry.objects.filter(user_id=entry.user_id).exclude(pk=entry.pk)
+    if not entry.is_filter:
+        return existing.filter(content_type_id=entry.content_type_id, object_id=entry.object_id).first()
+    return existing.filter(
+        content_type__isnull=True,
+        card_type=entry.card_type,
+        rarity=entry.rarity,
+        team=entry.team,
+        season=entry.season,
+    ).first()
+
+
+def index_entry(entry: WishlistEntry) -> int:
+    """(Re)builds the reverse index rows of ``entry``; returns how many."""
+    keys = matching_cards(entry)
+    with transaction.atomic():
+        WishlistCard.objects.filter(entry=entry).delete()
+        WishlistCard.objects.bulk_create(
+            [
+                WishlistCard(entry=entry, user_id=entry.user_id, content_type_id=content_type_id, object_id=object_id)
+                for content_type_id, object_id in keys
+            ],
+            batch_size=500,
+        )
+    return len(keys)
+
+
+def _entry_matches(entry: WishlistEntry, card, card_type: str) -> bool:
+    if entry.card_type and entry.card_type != card_type:
+        return False
+    if entry.rarity:
+        rarity_name = getattr(getattr(card, 'rarity', None), 'name', '') or ''
+        if rarity_name.lower() != entry.rarity.lower():
+            return False
+    if entry.season and entry.season != card.season:
+        return False
+    if entry.team and entry.team != getattr(card, 'team', None):
+        return False
+    return True
+
+
+def index_card(card, card_type: str) -> None:
+    """
+    Re-evaluates the filter entries against a created or edited card, so new
+    cards show up in wishlists like "any rare card" without a full rebuild.
+    """
+    content_type = ContentType.objects.get_for_model(type(card))
+    candidates = WishlistEntry.objects.filter(content_type__isnull=True).filter(
+        Q(card_type='') | Q(card_type=card_type)
+    )
+    matching = [entry for entry in candidates if _entry_matches(entry, card, card_type)]
+    with transaction.atomic():
+        WishlistCard.objects.filter(
+            content_type=content_type,
+            object_id=card.pk,
+            entry__content_type__isnull=True,
+        ).delete()
+        WishlistCard.objects.bulk_create(
+            [
+                WishlistCard(entry=entry, user_id=entry.user_id, content_type=content_type, object_id=card.pk)
+                for entry in matching
+            ],
+            batch_size=500,
+        )
+
+
+def unindex_card(card) -> None:
+    content_type = ContentType.objects.get_for_model(type(card))
+    WishlistCard.objects.filter(content_type=content_type, object_id=card.pk).delete()
+    WishlistEntry.objects.filter(content_type=content_type, object_id=card.pk).delete()
+
+
+def connect_card_signals() -> None:
+    from django.db.models.signals import post_delete, post_save
+
+    for card_type, model in CARD_TYPE_MODEL_MAP.items():
+        def _saved(sender, instance, raw=False, card_type=card_type, **kwargs):
+            if not raw:
+                index_card(instance, card_type)
+
+        def _deleted(sender, instance, **kwargs):
+            unindex_card(instance)
+
+        dispatch_uid = f'wishlist-index:{card_type}'
+        post_save.connect(_saved, sender=model, weak=False, dispatch_uid=dispatch_uid)
+        post_delete.connect(_deleted, sender=model, weak=False, dispatch_uid=dispatch_uid)
+
+
+def users_wanting(card: CardKey, exclude_user_id: Optional[int] = None) -> Set[int]:
+    """Users whose wishlist contains ``card``: one lookup on the reverse index."""
+    content_type_id, object_id = card
+    queryset = WishlistCard.objects.filter(content_type_id=content_type_id, object_id=object_id)
+    if exclude_user_id is not None:
+        queryset = queryset.exclude(user_id=exclude_user_id)
+    return set(queryset.values_list('user_id', flat=True))
+
+
+def wanted_cards(user_id: int, cards: Optional[Iterable[CardKey]] = None) -> Set[CardKey]:
+    """Card keys in ``user_id``'s wishlist, optionally restricted to ``cards``."""
+    queryset = WishlistCard.objects.filter(user_id=user_id)
+    if cards is not None:
+        cards = set(cards)
+        if not cards:
+            return set()
+        queryset = queryset.filter(
+            content_type_id__in={content_type_id for content_type_id, _ in cards},
+            object_id__in={object_id for _, object_id in cards},
+        )
+    wanted = set(queryset.values_list('content_type_id', 'object_id'))
+    return wanted if cards is None else wanted & cards
+
+
+def users_wanting_cards(cards: Iterable[CardKey]) -> Dict[CardKey, Set[int]]:
+    """``users_wanting`` for many cards with one lookup."""
+    cards = set(cards)
+    wanting: Dict[CardKey, Set[int]] = defaultdict(set)
+    if not cards:
+        return wanting
+    rows = WishlistCard.objects.filter(
+        content_type_id__in={content_type_id for content_type_id, _ in cards},
+        object_id__in={object_id for _, object_id in cards},
+    ).values_list('content_type_id', 'object_id', 'user_id')
+    for content_type_id, object_id, user_id in rows:
+        if (content_type_id, object_id) in cards:
+            wanting[(content_type_id, object_id)].add(user_id)
+    return wanting
+
+
+def wanted_cards_by_user(user_ids: Iterable[int]) -> Dict[int, Set[CardKey]]:
+    """``wanted_cards`` for many users with one lookup."""
+    wanted: Dict[int, Set[CardKey]] = defaultdict(set)
+    rows = WishlistCard.objects.filter(user_id__in=set(user_ids)).values_list(
+        'user_id', 'content_type_id', 'object_id'
+    )
+    for user_id, content_type_id, object_id in rows:
+        wanted[user_id].add((content_type_id, object_id))
+    return wanted
@@ -0,0 +1,20 @@
+from django.contrib import admin
+
+from .models import OutboxTask
+
+
+@admin.register(OutboxTask)
+class OutboxTaskAdmin(admin.ModelAdmin):
+    list_display = ("id", "name", "status", "attempts", "run_after", "created_at", "completed_at")
+    list_filter = ("status", "name")
+    search_fields = ("name",)
+    readonly_fields = (
+        "name",
+        "payload",
+        "attempts",
+        "locked_by",
+        "locked_until",
+        "last_error",
+        "created_at",
+        "completed_at",
+    )
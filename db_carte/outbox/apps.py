@@ -0,0 +1,12 @@
+from django.apps import AppConfig
+from django.utils.module_loading import autodiscover_modules
+
+
+class OutboxConfig(AppConfig):
+    default_auto_field = "django.db.models.BigAutoField"
+    name = "outbox"
+    verbose_name = "Background Tasks"
+
+    def ready(self):
+        # Every installed app registers its deferred tasks in ``tasks.py``.
+        autodiscover_modules("tasks")
@@ -0,0 +1,33 @@
+import signal
+
+from django.core.management.base import BaseCommand
+
+from outbox.services import DEFAULT_BATCH_SIZE
+from outbox.worker import OutboxWorker
+
+
+class Command(BaseCommand):
+    help = "Runs deferred outbox tasks on a local thread pool until interrupted."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--threads", type=int, default=4)
+        parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+        parser.add_argument("--poll-interval", type=float, default=1.0, help="Seconds to wait when no task is due.")
+        parser.add_argument("--lease-seconds", type=int, help="How long a task stays leased before it is retried.")
+        parser.add_argument("--task", action="append", dest="names", help="Only run tasks with this name (repeatable).")
+        parser.add_argument("--once", action="store_true", help="Run a single batch and exit.")
+
+    def handle(self, *args, **options):
+        worker = OutboxWorker(
+            threads=options["threads"],
+            batch_size=options["batch_size"],
+            poll_interval=options["poll_interval"],
+            lease_seconds=options["lease_seconds"],
+            names=options["names"],
+        )
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            signal.signal(signum, lambda *args: worker.stop())
+
+        self.stdout.write(f"Outbox worker {worker.worker_id} started with {options['threads']} threads.")
+        processed = worker.run(once=options["once"])
+        self.stdout.write(self.style.SUCCESS(f"Outbox worker stopped after {processed} tasks."))
@@ -0,0 +1,55 @@
+"""
+Registry of the deferred tasks the outbox worker can execute.
+
+Apps declare tasks in their ``tasks.py`` (imported by ``OutboxConfig.ready``)::
+
+    @task("exchange.notify")
+    def notify(payload):
+        ...
+
+Atomic tasks (the default) run in the same transaction that marks them
+done, so their database writes are applied exactly once even though
+delivery is at-least-once. Tasks with external side effects or long
+runtimes should pass ``atomic=False`` and be idempotent.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Optional
+
+
+class UnknownTaskError(LookupError):
+    """Raised for outbox rows whose task name is not registered."""
+
+
+@dataclass(frozen=True)
+class TaskSpec:
+    name: str
+    func: Callable[[Dict[str, Any]], Any]
+    atomic: bool = True
+    max_attempts: Optional[int] = None
+
+
+_tasks: Dict[str, TaskSpec] = {}
+
+
+def task(name: str, atomic: bool = True, max_attempts: Optional[int] = None):
+    def register(func):
+        if name in _tasks and _tasks[name].func is not func:
+            raise ValueError(f"Outbox task '{name}' is already registered.")
+        _tasks[name] = TaskSpec(name=name, func=func, atomic=atomic, max_attempts=max_attempts)
+        return func
+
+    return register
+
+
+def get_task(name: str) -> TaskSpec:
+    try:
+        return _tasks[name]
+    except KeyError:
+        raise UnknownTaskError(f"No outbox task named '{name}'.")
+
+
+def registered_tasks() -> Dict[str, TaskSpec]:
+    return dict(_tasks)
@@ -0,0 +1,202 @@
+"""
+Transactional outbox: enqueueing, leasing and completing deferred tasks.
+
+``enqueue`` inserts an ``OutboxTask`` in the caller's transaction, so a task
+exists if and only if the change that produced it committed. Workers lease
+due tasks with one conditional UPDATE (a compare-and-swap on the status and
+lease, like ``exchange.services.transition_offer``); leases that run out are
+handed out again, which makes delivery at-least-once. Failures are retried
+with exponential backoff until ``max_attempts``; a lease that runs out on
+the last attempt marks its task FAILED instead.
+"""
+
+from __future__ import annotations
+
+import traceback
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, List, Optional
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .models import OutboxTask
+from .registry import UnknownTaskError, get_task
+
+DEFAULT_BATCH_SIZE = 20
+MAX_BACKOFF_SECONDS = 60 * 60
+MAX_ERROR_LENGTH = 4000
+
+
+class LeaseLostError(Exception):
+    """Raised when a task's lease was taken over before it completed."""
+
+
+def enqueue(
+    name: str,
+    payload: Optional[Dict[str, Any]] = None,
+    delay: float = 0,
+    max_attempts: Optional[int] = None,
+) -> OutboxTask:
+    spec = get_task(name)
+    return OutboxTask.objects.create(
+        name=name,
+        payload=payload or {},
+        run_after=timezone.now() + timedelta(seconds=delay),
+        max_attempts=max_attempts or spec.max_attempts or settings.OUTBOX_MAX_ATTEMPTS,
+    )
+
+
+def enqueue_once(name: str, payload: Optional[Dict[str, Any]] = None) -> Optional[OutboxTask]:
+    """
+    ``enqueue`` unless a ``name`` task is already waiting to run, for tasks
+    that drain a queue and only need one trigger. Call it inside the
+    transaction that fills the queue: the waiting task is locked until that
+    transaction commits, so it cannot be claimed and finish draining before
+    the new work is visible. Returns the new task, or None.
+    """
+
+    waiting = (
+        OutboxTask.objects.select_for_update()
+        .filter(name=name, status=OutboxTask.Status.PENDING)
+        .values_list("pk", flat=True)
+        .first()
+    )
+    if waiting is not None:
+        return None
+    return enqueue(name, payload)
+
+
+def _due(now: datetime, names: Optional[Iterable[str]] = None) -> Q:
+    due = Q(status=OutboxTask.Status.PENDING, run_after__lte=now) | Q(
+        status=OutboxTask.Status.RUNNING,
+        locked_until__lt=now,
+        attempts__lt=F("max_attempts"),
+    )
+    if names is not None:
+        due &= Q(name__in=list(names))
+    return due
+
+
+def _fail_abandoned(now: datetime, names: Optional[Iterable[str]] = None) -> int:
+    """Marks expired leases that used up their last attempt as FAILED; returns how many."""
+
+    abandoned = OutboxTask.objects.filter(
+        status=OutboxTask.Status.RUNNING,
+        locked_until__lt=now,
+        attempts__gte=F("max_attempts"),
+    )
+    if names is not None:
+        abandoned = abandoned.filter(name__in=list(names))
+    return abandoned.update(
+        status=OutboxTask.Status.FAILED,
+        locked_until=None,
+        completed_at=now,
+        last_error="Lease expired on the last attempt.",
+    )
+
+
+def claim_tasks(
+    worker_id: str,
+    limit: int = DEFAULT_BATCH_SIZE,
+    lease_seconds: Optional[int] = None,
+    names: Optional[Iterable[str]] = None,
+) -> List[OutboxTask]:
+    """Leases up to ``limit`` due tasks (oldest first) to ``worker_id``."""
+
+    now = timezone.now()
+    if names is not None:
+        names = list(names)
+    _fail_abandoned(now, names)
+    due = _due(now, names)
+    task_ids = list(
+        OutboxTask.objects.filter(due).order_by("run_after", "id").values_list("id", flat=True)[:limit]
+    )
+    if not task_ids:
+        return []
+    locked_until = now + timedelta(seconds=lease_seconds or settings.OUTBOX_LEASE_SECONDS)
+    OutboxTask.objects.filter(due, pk__in=task_ids).update(
+        status=OutboxTask.Status.RUNNING,
+        locked_by=worker_id,
+        locked_until=locked_until,
+        attempts=F("attempts") + 1,
+    )
+    return list(
+        OutboxTask.objects.filter(pk__in=task_ids, locked_by=worker_id, locked_until=locked_until).order_by(
+            "run_after", "id"
+        )
+    )
+
+
+def _leased(task: OutboxTask, worker_id: str):
+    return OutboxTask.objects.filter(pk=task.pk, status=OutboxTask.Status.RUNNING, locked_by=worker_id)
+
+
+def _complete(task: OutboxTask, worker_id: str) -> bool:
+    return (
+        _leased(task, worker_id).update(
+            status=OutboxTask.Status.DONE,
+            locked_until=None,
+            completed_at=timezone.now(),
+            last_error="",
+        )
+        == 1
+    )
+
+
+def _fail(task: OutboxTask, worker_id: str, error: str, retry: bool = True) -> None:
+    if retry and task.attempts < task.max_attempts:
+        backoff = min(settings.OUTBOX_RETRY_BASE_SECONDS * 2 ** (task.attempts - 1), MAX_BACKOFF_SECONDS)
+        changes = {"status": OutboxTask.Status.PENDING, "run_after": timezone.now() + timedelta(seconds=backoff)}
+    else:
+        changes = {"status": OutboxTask.Status.FAILED, "completed_at": timezone.now()}
+    _leased(task, worker_id).update(locked_until=None, last_error=error[-MAX_ERROR_LENGTH:], **changes)
+
+
+def run_task(task: OutboxTask, worker_id: str) -> bool:
+    """
+    Executes a leased task and records the outcome. Returns True if the task
+    completed. Atomic tasks commit their writes together with the DONE
+    status, and roll back if the lease was lost in the meantime.
+    """
+
+    try:
+        spec = get_task(task.name)
+    except UnknownTaskError as exc:
+        _fail(task, worker_id, str(exc), retry=False)
+        return False
+
+    try:
+        if spec.atomic:
+            with transaction.atomic():
+                spec.func(task.payload)
+                if not _complete(task, worker_id):
+                    raise LeaseLostError(task.pk)
+            return True
+        spec.func(task.payload)
+        return _complete(task, worker_id)
+    except LeaseLostError:
+        return False
+    except Exception:
+        _fail(task, worker_id, traceback.format_exc())
+        return False
+
+
+def purge_completed(before: Optional[datetime] = None, batch_size: int = 1000) -> int:
+    """Deletes tasks that finished successfully before ``before``; returns how many."""
+
+    before = before or timezone.now() - timedelta(hours=settings.OUTBOX_RETENTION_HOURS)
+    purged = 0
+    while True:
+        task_ids = list(
+            OutboxTask.objects.filter(status=OutboxTask.Status.DONE, completed_at__lt=before)
+            .order_by("id")
+            .values_list("id", flat=True)[:batch_size]
+        )
+        if not task_ids:
+            return purged
+        deleted, _ = OutboxTask.objects.filter(pk__in=task_ids).delete()
+        purged += deleted
+        if len(task_ids) < batch_size:
+            return purged
@@ -0,0 +1,131 @@
+from datetime import timedelta
+
+from django.db import transaction
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from cards.models import CardRarity
+from outbox.models import OutboxTask
+from outbox.registry import task
+from outbox.services import claim_tasks, enqueue, purge_completed, run_task
+
+calls = []
+
+
+@task("tests.record")
+def record(payload):
+    calls.append(payload)
+
+
+@task("tests.fail", max_attempts=3)
+def fail(payload):
+    raise RuntimeError("boom")
+
+
+@task("tests.lose-lease")
+def lose_lease(payload):
+    CardRarity.objects.create(name="written-by-task")
+    # Another worker takes the task over while this one is still running.
+    OutboxTask.objects.filter(pk=payload["task_id"]).update(locked_by="other")
+
+
+@override_settings(OUTBOX_LEASE_SECONDS=60, OUTBOX_RETRY_BASE_SECONDS=10)
+class OutboxServiceTests(TestCase):
+    def setUp(self):
+        calls.clear()
+
+    def test_enqueue_is_part_of_the_callers_transaction(self):
+        with self.assertRaises(RuntimeError):
+            with transaction.atomic():
+                enqueue("tests.record")
+                raise RuntimeError
+
+        self.assertFalse(OutboxTask.objects.exists())
+
+    def test_claims_only_due_tasks_and_runs_them_once(self):
+        due = enqueue("tests.record", {"n": 1})
+        enqueue("tests.record", {"n": 2}, delay=60)
+
+        claimed = claim_tasks("w1")
+        self.assertEqual([claimed_task.pk for claimed_task in claimed], [due.pk])
+        self.assertEqual(claim_tasks("w2"), [])
+
+        self.assertTrue(run_task(claimed[0], "w1"))
+        due.refresh_from_db()
+        self.assertEqual((due.status, due.attempts), (OutboxTask.Status.DONE, 1))
+        self.assertEqual(calls, [{"n": 1}])
+
+    def test_expired_lease_is_handed_to_another_worker(self):
+        enqueue("tests.record")
+        [stale] = claim_tasks("w1")
+        OutboxTask.objects.filter(pk=stale.pk).update(locked_until=timezone.now() - timedelta(seconds=1))
+
+        [taken] = claim_tasks("w2")
+        self.assertEqual((taken.locked_by, taken.attempts), ("w2", 2))
+
+        # The first worker finishes late: its completion no longer counts.
+        self.assertFalse(run_task(stale, "w1"))
+        taken.refresh_from_db()
+        self.assertEqual((taken.status, taken.locked_by), (OutboxTask.Status.RUNNING, "w2"))
+        self.assertTrue(run_task(taken, "w2"))
+
+    def test_expired_lease_on_the_last_attempt_fails_the_task(self):
+        created = enqueue("tests.record", max_attempts=1)
+        claim_tasks("w1")
+        OutboxTask.objects.filter(pk=created.pk).update(locked_until=timezone.now() - timedelta(seconds=1))
+
+        self.assertEqual(claim_tasks("w2"), [])
+        created.refresh_from_db()
+        self.assertEqual((created.status, created.attempts), (OutboxTask.Status.FAILED, 1))
+        self.assertIsNone(created.locked_until)
+        self.assertTrue(created.last_error)
+
+    def test_atomic_task_rolls_back_when_the_lease_is_lost(self):
+        created = enqueue("tests.lose-lease")
+        OutboxTask.objects.filter(pk=created.pk).update(payload={"task_id": created.pk})
+        [claimed] = claim_tasks("w1")
+
+        self.assertFalse(run_task(claimed, "w1"))
+        self.assertFalse(CardRarity.objects.filter(name="written-by-task").exists())
+
+    def test_failures_back_off_then_fail_after_max_attempts(self):
+        created = enqueue("tests.fail")
+        self.assertEqual(created.max_attempts, 3)
+
+        for attempt, backoff in ((1, 10), (2, 20)):
+            [claimed] = claim_tasks("w1")
+            started = timezone.now()
+            self.assertFalse(run_task(claimed, "w1"))
+            claimed.refresh_from_db()
+            self.assertEqual((claimed.status, claimed.attempts), (OutboxTask.Status.PENDING, attempt))
+            self.assertIn("boom", claimed.last_error)
+            delay = (claimed.run_after - started).total_seconds()
+            self.assertTrue(backoff - 1 < delay <= backoff + 1, delay)
+            OutboxTask.objects.filter(pk=created.pk).update(run_after=timezone.now())
+
+        [claimed] = claim_tasks("w1")
+        self.assertFalse(run_task(claimed, "w1"))
+        claimed.refresh_from_db()
+        self.assertEqual((claimed.status, claimed.attempts), (OutboxTask.Status.FAILED, 3))
+        self.assertEqual(claim_tasks("w1"), [])
+
+    def test_unknown_task_fails_without_retry(self):
+        OutboxTask.objects.create(name="tests.missing")
+        [claimed] = claim_tasks("w1")
+
+        self.assertFalse(run_task(claimed, "w1"))
+        claimed.refresh_from_db()
+        self.assertEqual(claimed.status, OutboxTask.Status.FAILED)
+
+    def test_purge_deletes_only_old_completed_tasks(self):
+        old_done = OutboxTask.objects.create(
+            name="tests.record", status=OutboxTask.Status.DONE, completed_at=timezone.now() - timedelta(days=30)
+        )
+        OutboxTask.objects.create(name="tests.record", status=OutboxTask.Status.DONE, completed_at=timezone.now())
+        OutboxTask.objects.create(
+            name="tests.fail", status=OutboxTask.Status.FAILED, completed_at=timezone.now() - timedelta(days=30)
+        )
+
+        self.assertEqual(purge_completed(timezone.now() - timedelta(days=1), batch_size=1), 1)
+        self.assertFalse(OutboxTask.objects.filter(pk=old_done.pk).exists())
+        self.assertEqual(OutboxTask.objects.count(), 2)
@@ -0,0 +1,95 @@
+"""
+Local background worker for the outbox.
+
+``OutboxWorker`` polls the database for due tasks, leases a batch and runs
+it on a thread pool; it needs nothing but the database. Each thread uses its
+own connection, closed after every task. ``stop()`` lets the tasks in flight
+finish before ``run()`` returns, which is how the management command shuts
+down on SIGINT/SIGTERM.
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import socket
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterable, Optional
+
+from django.db import close_old_connections, connection
+
+from .services import DEFAULT_BATCH_SIZE, claim_tasks, purge_completed, run_task
+
+logger = logging.getLogger(__name__)
+
+PURGE_EVERY_SECONDS = 60 * 10
+
+
+def default_worker_id() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+
+
+class OutboxWorker:
+    def __init__(
+        self,
+        threads: int = 4,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        poll_interval: float = 1.0,
+        lease_seconds: Optional[int] = None,
+        names: Optional[Iterable[str]] = None,
+        worker_id: Optional[str] = None,
+    ):
+        self.threads = threads
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self.lease_seconds = lease_seconds
+        self.names = list(names) if names else None
+        self.worker_id = worker_id or default_worker_id()
+        self._stopping = threading.Event()
+        self._wake = threading.Event()
+
+    def stop(self) -> None:
+        self._stopping.set()
+        self._wake.set()
+
+    def wake(self) -> None:
+        self._wake.set()
+
+    def _execute(self, task) -> bool:
+        close_old_connections()
+        try:
+            return run_task(task, self.worker_id)
+        except Exception:  # pragma: no cover - run_task records task errors itself
+            logger.exception("Outbox task %s crashed the worker thread", task.pk)
+            return False
+        finally:
+            connection.close()
+
+    def run_once(self, executor: ThreadPoolExecutor) -> int:
+        """Leases one batch and runs it to completion; returns how many tasks ran."""
+
+        tasks = claim_tasks(self.worker_id, self.batch_size, self.lease_seconds, self.names)
+        if tasks:
+            list(executor.map(self._execute, tasks))
+        return len(tasks)
+
+    def run(self, once: bool = False) -> int:
+        processed = 0
+        since_purge = 0.0
+        with ThreadPoolExecutor(max_workers=self.threads, thread_name_prefix="outbox") as executor:
+            while not self._stopping.is_set():
+                count = self.run_once(executor)
+                processed += count
+                if once:
+                    break
+                if count:
+                    continue
+                self._wake.wait(self.poll_interval)
+                self._wake.clear()
+                since_purge += self.poll_interval
+                if since_purge >= PURGE_EVERY_SECONDS:
+                    since_purge = 0.0
+                    purge_completed()
+        return processed
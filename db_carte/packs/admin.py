@@ -0,0 +1,30 @@
+from django.contrib import admin
+
+from .models import DailyPackSales
+from .rollups import DEFAULT_REPORT_DAYS, default_range, economy_report
+
+
+@admin.register(DailyPackSales)
+class DailyPackSalesAdmin(admin.ModelAdmin):
+    """Read-only economy dashboard backed by the daily rollup tables."""
+
+    change_list_template = "admin/packs/dailypacksales/change_list.html"
+    list_display = ("day", "pack", "purchases", "credits_spent", "cards_minted")
+    list_filter = ("pack",)
+    date_hierarchy = "day"
+    list_select_related = ("pack",)
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+    def changelist_view(self, request, extra_context=None):
+        extra_context = extra_context or {}
+        extra_context["economy"] = economy_report(*default_range())
+        extra_context["economy_days"] = DEFAULT_REPORT_DAYS
+        return super().changelist_view(request, extra_context=extra_context)
@@ -5,3 +5,29 @@ class PacksConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "packs"
     verbose_name = "Card Packs"
+
+    def ready(self):
+        from django.db.models.signals import post_delete, post_save
+
+        from cards.models import BonusMalusCard, CardRarity, CoachCard, GoalkeeperCard, PlayerCard
+        from db_carte.versioning import PACKS, connect_version_signals
+
+        from .models import Pack, PackRarityWeight, PrerolledPack
+
+        connect_version_signals(PACKS, Pack, PackRarityWeight, CardRarity)
+
+        # Pre-rolled contents become stale when the pack, its odds or the catalog change.
+        def discard_pack_pool(sender, instance, **kwargs):
+            PrerolledPack.objects.filter(pack_id=instance.pack_id).delete()
+
+        def discard_own_pool(sender, instance, **kwargs):
+            PrerolledPack.objects.filter(pack_id=instance.pk).delete()
+
+        def discard_all_pools(sender, **kwargs):
+            PrerolledPack.objects.all().delete()
+
+        for signal in (post_save, post_delete):
+            signal.connect(discard_pack_pool, sender=PackRarityWeight, weak=False)
+            signal.connect(discard_own_pool, sender=Pack, weak=False)
+            for model in (CardRarity, PlayerCard, GoalkeeperCard, CoachCard, BonusMalusCard):
+                signal.connect(discard_all_pools, sender=model, weak=False)
@@ -0,0 +1,182 @@
+"""
+Time-partitioned archival of the pack purchase audit log.
+
+Purchases older than ``PACK_ARCHIVE_HORIZON_DAYS`` are moved, in batches, from
+``PackPurchase``/``PackPurchaseCard`` (one row per purchase plus one per card)
+into ``ArchivedPackPurchase`` (one compact row per purchase). The copies they
+gave each user are carried over to ``CardHolding`` in the same transaction, so
+ownership counts are unchanged (see ``packs.ownership``).
+
+Only purchases already folded into the economy rollups are archived, which
+keeps the daily reports complete. ``restore_purchases`` moves rows back with
+their original primary keys.
+"""
+
+from __future__ import annotations
+
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Case, DateTimeField, Value, When
+from django.utils import timezone
+
+from .models import (
+    AggregationCheckpoint,
+    ArchivedPackPurchase,
+    CardHolding,
+    PackPurchase,
+    PackPurchaseCard,
+)
+from .ownership import HoldingKey, adjust_holdings
+from .rollups import CARD_ROLLUP, PURCHASE_ROLLUP
+
+DEFAULT_BATCH_SIZE = 1000
+
+
+def archive_horizon() -> datetime:
+    return timezone.now() - timedelta(days=settings.PACK_ARCHIVE_HORIZON_DAYS)
+
+
+def _checkpoint(name: str) -> int:
+    return (
+        AggregationCheckpoint.objects.filter(name=name)
+        .values_list("last_id", flat=True)
+        .first()
+        or 0
+    )
+
+
+def archivable_purchases(before: datetime):
+    return (
+        PackPurchase.objects.filter(created_at__lt=before, id__lte=_checkpoint(PURCHASE_ROLLUP))
+        .exclude(opened_cards__id__gt=_checkpoint(CARD_ROLLUP))
+        .order_by("id")
+    )
+
+
+def _archive_batch(purchase_ids: List[int]) -> int:
+    purchases = list(PackPurchase.objects.select_for_update().filter(id__in=purchase_ids))
+    owners = {purchase.pk: purchase.user_id for purchase in purchases}
+
+    cards: Dict[int, List[List[int]]] = defaultdict(list)
+    holdings: Dict[HoldingKey, int] = defaultdict(int)
+    rows = (
+        PackPurchaseCard.objects.select_for_update()
+        .filter(purchase_id__in=owners)
+        .values_list("id", "purchase_id", "content_type_id", "object_id", "rarity_id")
+        .order_by("id")
+    )
+    for card_id, purchase_id, content_type_id, object_id, rarity_id in rows:
+        cards[purchase_id].append([card_id, content_type_id, object_id, rarity_id])
+        holdings[(owners[purchase_id], content_type_id, object_id)] += 1
+
+    ArchivedPackPurchase.objects.bulk_create(
+        [
+            ArchivedPackPurchase(
+                purchase_id=purchase.pk,
+                user_id=purchase.user_id,
+                pack_id=purchase.pack_id,
+                cost=purchase.cost,
+                cards_count=purchase.cards_count,
+                created_at=purchase.created_at,
+                cards=cards.get(purchase.pk, []),
+            )
+            for purchase in purchases
+        ],
+        batch_size=500,
+    )
+    adjust_holdings(holdings)
+    PackPurchaseCard.objects.filter(purchase_id__in=owners).delete()
+    PackPurchase.objects.filter(id__in=owners).delete()
+    return len(purchases)
+
+
+def archive_purchases(before: Optional[datetime] = None, batch_size: int = DEFAULT_BATCH_SIZE) -> int:
+    """Archives every purchase created before ``before``; returns how many."""
+
+    before = before or archive_horizon()
+    archived = 0
+    while True:
+        with transaction.atomic():
+            purchase_ids = list(archivable_purchases(before).values_list("id", flat=True)[:batch_size])
+            if not purchase_ids:
+                return archived
+            archived += _archive_batch(purchase_ids)
+
+
+def _restore_batch(archived: List[ArchivedPackPurchase]) -> None:
+    PackPurchase.objects.bulk_create(
+        [
+            PackPurchase(
+                id=row.purchase_id,
+                user_id=row.user_id,
+                pack_id=row.pack_id,
+                cost=row.cost,
+                cards_count=row.cards_count,
+            )
+            for row in archived
+        ],
+        batch_size=500,
+    )
+    # ``created_at`` is auto_now_add, so the original timestamps are written
+    # back with a single UPDATE.
+    PackPurchase.objects.filter(id__in=[row.purchase_id for row in archived]).update(
+        created_at=Case(
+            *[When(id=row.purchase_id, then=Value(row.created_at)) for row in archived],
+            output_field=DateTimeField(),
+        )
+    )
+
+    holdings: Dict[HoldingKey, int] = defaultdict(int)
+    restored_cards = []
+    for row in archived:
+        for card_id, content_type_id, object_id, rarity_id in row.cards:
+            restored_cards.append(
+                PackPurchaseCard(
+                    id=card_id,
+                    purchase_id=row.purchase_id,
+                    content_type_id=content_type_id,
+                    object_id=object_id,
+                    rarity_id=rarity_id,
+                )
+            )
+            holdings[(row.user_id, content_type_id, object_id)] -= 1
+    PackPurchaseCard.objects.bulk_create(restored_cards, batch_size=500)
+
+    adjust_holdings(holdings)
+    CardHolding.objects.filter(
+        user_id__in={row.user_id for row in archived},
+        quantity=0,
+    ).delete()
+    ArchivedPackPurchase.objects.filter(
+        purchase_id__in=[row.purchase_id for row in archived]
+    ).delete()
+
+
+def restore_purchases(
+    user=None,
+    since: Optional[datetime] = None,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+) -> int:
+    """
+    Moves archived purchases back into the hot log, optionally only those of
+    ``user`` and/or created at or after ``since``. Returns how many.
+    """
+
+    queryset = ArchivedPackPurchase.objects.order_by("purchase_id")
+    if user is not None:
+        queryset = queryset.filter(user=user)
+    if since is not None:
+        queryset = queryset.filter(created_at__gte=since)
+
+    restored = 0
+    while True:
+        with transaction.atomic():
+            batch = list(queryset.select_for_update()[:batch_size])
+            if not batch:
+                return restored
+            _restore_batch(batch)
+            restored += len(batch)
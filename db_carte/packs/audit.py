@@ -0,0 +1,157 @@
+"""
+Drop-rate audit: checks that the rarities pulled from each pack match its
+configured ``PackRarityWeight`` odds.
+
+The audit only reads the ``DailyRarityDrop`` counts kept by the card rollup
+(see ``packs.rollups``), groups them into time windows and runs a chi-square
+goodness-of-fit test per pack and window.
+
+Pack odds are not versioned: every window is compared with the weights the
+pack has *now*. After the odds of a pack change, windows from before the
+change test against the wrong distribution and may be flagged; pass
+``since`` (``--since`` on the command) with the day of the change to audit
+only the draws made under the current weights.
+"""
+
+from __future__ import annotations
+
+import math
+from collections import defaultdict
+from dataclasses import dataclass, field
+from datetime import date, timedelta
+from typing import Dict, List, Optional
+
+from .models import DailyRarityDrop, Pack
+from .services import build_roll_plan
+
+WINDOWS = ("day", "week", "month", "all")
+# Below this expected count per rarity the chi-square approximation is weak.
+MIN_RELIABLE_EXPECTED = 5.0
+
+
+def chi_square_sf(statistic: float, degrees_of_freedom: int) -> float:
+    """Survival function of the chi-square distribution (the test p-value)."""
+
+    if math.isinf(statistic):
+        return 0.0
+    if statistic <= 0:
+        return 1.0
+    return _regularized_gamma_q(degrees_of_freedom / 2.0, statistic / 2.0)
+
+
+def _regularized_gamma_q(a: float, x: float) -> float:
+    log_prefactor = -x + a * math.log(x) - math.lgamma(a)
+    if x < a + 1:
+        # Series expansion of the lower incomplete gamma function.
+        term = total = 1.0 / a
+        denominator = a
+        for _ in range(1000):
+            denominator += 1
+            term *= x / denominator
+            total += term
+            if abs(term) < abs(total) * 1e-14:
+                break
+        return max(0.0, 1.0 - total * math.exp(log_prefactor))
+
+    # Continued fraction for the upper incomplete gamma function (Lentz).
+    tiny = 1e-300
+    b = x + 1 - a
+    c = 1 / tiny
+    d = 1 / b
+    result = d
+    for step in range(1, 1000):
+        an = -step * (step - a)
+        b += 2
+        d = an * d + b
+        d = tiny if abs(d) < tiny else d
+        c = b + an / c
+        c = tiny if abs(c) < tiny else c
+        d = 1 / d
+        delta = d * c
+        result *= delta
+        if abs(delta - 1) < 1e-14:
+            break
+    return math.exp(log_prefactor) * result
+
+
+def window_start(day: date, window: str) -> Optional[date]:
+    if window == "day":
+        return day
+    if window == "week":
+        return day - timedelta(days=day.weekday())
+    if window == "month":
+        return day.replace(day=1)
+    return None
+
+
+@dataclass
+class DropAuditResult:
+    pack: Pack
+    window_start: Optional[date]
+    observed: Dict[str, int]
+    expected: Dict[str, float]
+    chi_square: float
+    degrees_of_freedom: int
+    p_value: float
+    total: int = field(init=False)
+
+    def __post_init__(self):
+        self.total = sum(self.observed.values())
+
+    @property
+    def reliable(self) -> bool:
+        return min(self.expected.values(), default=0.0) >= MIN_RELIABLE_EXPECTED
+
+    def is_suspicious(self, alpha: float) -> bool:
+        return self.p_value < alpha
+
+
+def audit_drop_rates(window: str = "week", since: Optional[date] = None) -> List[DropAuditResult]:
+    """
+    Compares the observed rarity counts of every pack, per window, with the
+    odds of the pack's current configuration (see the module docstring for
+    packs whose odds changed inside the audited range).
+    """
+
+    results: List[DropAuditResult] = []
+    pack_ids = DailyRarityDrop.objects.values_list("pack_id", flat=True).distinct()
+    for pack in Pack.objects.filter(pk__in=pack_ids).order_by("price", "id"):
+        plan = build_roll_plan(pack)
+        if not plan.pools:
+            continue
+        total_weight = plan.total_weight
+        probabilities = {pool.rarity_id: pool.weight / total_weight for pool in plan.pools}
+        names = {pool.rarity_id: pool.rarity_name for pool in plan.pools}
+
+        counts = DailyRarityDrop.objects.filter(pack=pack).select_related("rarity")
+        if since is not None:
+            counts = counts.filter(day__gte=since)
+
+        windows: Dict[Optional[date], Dict[int, int]] = defaultdict(lambda: defaultdict(int))
+        for row in counts.iterator(chunk_size=2000):
+            windows[window_start(row.day, window)][row.rarity_id] += row.count
+            names.setdefault(row.rarity_id, row.rarity.name)
+
+        for start in sorted(windows, key=lambda value: value or date.min):
+            observed_by_id = windows[start]
+            total = sum(observed_by_id.values())
+            statistic = 0.0
+            for rarity_id, probability in probabilities.items():
+                expected = total * probability
+                statistic += (observed_by_id.get(rarity_id, 0) - expected) ** 2 / expected
+            if any(rarity_id not in probabilities for rarity_id in observed_by_id):
+                # A rarity the pack cannot produce was pulled.
+                statistic = math.inf
+            degrees_of_freedom = max(1, len(probabilities) - 1)
+            results.append(
+                DropAuditResult(
+                    pack=pack,
+                    window_start=start,
+                    observed={names[rarity_id]: count for rarity_id, count in observed_by_id.items()},
+                    expected={names[rarity_id]: total * probability for rarity_id, probability in probabilities.items()},
+                    chi_square=statistic,
+                    degrees_of_freedom=degrees_of_freedom,
+                    p_value=chi_square_sf(statistic, degrees_of_freedom),
+                )
+            )
+    return results
@@ -0,0 +1,201 @@
+"""
+Per-user ownership bitmaps for set algebra over collections.
+
+Every card gets a dense position in a global card index (the document order
+of the catalog search index, rebuilt when the catalog version changes). A
+user's collection is then two Python ``int`` bitmaps over those positions:
+
+- ``owned``: cards with at least one copy;
+- ``spare``: cards with at least two copies, i.e. tradeable ones.
+
+Questions such as "which cards does A have spare that B lacks" or "how much
+of a season do I own" become a couple of bitwise operations and popcounts.
+Bitmaps are built from ``packs.ownership`` and kept in the Django cache;
+pack openings and holding adjustments drop the affected users' entries when
+their transaction commits, so the next read rebuilds them. A rebuild racing
+such a commit can cache a stale bitmap until ``OWNERSHIP_BITSET_CACHE_SECONDS``
+expire, so trades keep re-checking ownership in the database before they
+commit. Like the version tokens, processes only share invalidations when
+they share a cache backend.
+"""
+
+from __future__ import annotations
+
+import threading
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from django.conf import settings
+from django.contrib.contenttypes.models import ContentType
+from django.core.cache import cache
+from django.db import transaction
+
+from cards.search import SEARCH_MODELS, CardSearchIndex, get_search_index
+
+from .ownership import user_card_quantities, users_card_quantities
+
+CardKey = Tuple[int, int]  # (content type id, object id)
+
+_CACHE_KEY = "ownership-bits:{user_id}"
+
+
+class CardIndex:
+    """Dense positions of every catalog card plus facet bitmaps over them."""
+
+    def __init__(self, search_index: CardSearchIndex):
+        self.version = search_index.version
+        content_types = {
+            card_type: ContentType.objects.get_for_model(model).pk for card_type, model in SEARCH_MODELS
+        }
+        self.keys: List[CardKey] = [
+            (content_types[document.card_type], document.card_id) for document in search_index.documents
+        ]
+        self.positions: Dict[CardKey, int] = {key: index for index, key in enumerate(self.keys)}
+        self.all_bits = search_index.all_bits
+        self.facets = search_index.facets
+
+    def bitmap(self, keys: Iterable[CardKey]) -> int:
+        bitmap = 0
+        for key in keys:
+            position = self.positions.get(key)
+            if position is not None:
+                bitmap |= 1 << position
+        return bitmap
+
+    def cards(self, bitmap: int) -> List[CardKey]:
+        cards = []
+        while bitmap:
+            low = bitmap & -bitmap
+            cards.append(self.keys[low.bit_length() - 1])
+            bitmap ^= low
+        return cards
+
+    def facet(self, name: str, value: str) -> int:
+        return self.facets.get(name, {}).get(value, 0)
+
+    def bit(self, key: CardKey) -> int:
+        position = self.positions.get(key)
+        return 0 if position is None else 1 << position
+
+
+_card_index: Optional[CardIndex] = None
+_card_index_lock = threading.Lock()
+
+
+def get_card_index() -> CardIndex:
+    global _card_index
+    search_index = get_search_index()
+    index = _card_index
+    if index is not None and index.version == search_index.version:
+        return index
+    with _card_index_lock:
+        if _card_index is None or _card_index.version != search_index.version:
+            _card_index = CardIndex(search_index)
+        return _card_index
+
+
+@dataclass(frozen=True)
+class OwnershipBits:
+    user_id: int
+    owned: int
+    spare: int
+
+    def owns(self, index: CardIndex, key: CardKey) -> bool:
+        return bool(self.owned & index.bit(key))
+
+    def has_spare(self, index: CardIndex, key: CardKey) -> bool:
+        return bool(self.spare & index.bit(key))
+
+
+def _build(index: CardIndex, user_id: int, quantities: Dict[CardKey, int]) -> OwnershipBits:
+    return OwnershipBits(
+        user_id=user_id,
+        owned=index.bitmap(quantities),
+        spare=index.bitmap(key for key, quantity in quantities.items() if quantity >= 2),
+    )
+
+
+def _cache_key(user_id: int) -> str:
+    return _CACHE_KEY.format(user_id=user_id)
+
+
+def _cached(index: CardIndex, value) -> Optional[Tuple[int, int]]:
+    # Bitmaps built against an older catalog use stale positions.
+    if value is None or value[0] != index.version:
+        return None
+    return value[1], value[2]
+
+
+def user_bitsets(user_id: int) -> OwnershipBits:
+    index = get_card_index()
+    cached = _cached(index, cache.get(_cache_key(user_id)))
+    if cached is not None:
+        return OwnershipBits(user_id, *cached)
+    bits = _build(index, user_id, user_card_quantities(user_id))
+    cache.set(
+        _cache_key(user_id),
+        (index.version, bits.owned, bits.spare),
+        timeout=settings.OWNERSHIP_BITSET_CACHE_SECONDS,
+    )
+    return bits
+
+
+def bulk_user_bitsets(user_ids: Iterable[int]) -> Dict[int, OwnershipBits]:
+    """``user_bitsets`` for many users: one cache round trip, two queries for the misses."""
+
+    index = get_card_index()
+    user_ids = set(user_ids)
+    cached = cache.get_many([_cache_key(user_id) for user_id in user_ids])
+    result: Dict[int, OwnershipBits] = {}
+    for user_id in user_ids:
+        value = _cached(index, cached.get(_cache_key(user_id)))
+        if value is not None:
+            result[user_id] = OwnershipBits(user_id, *value)
+
+    missing = user_ids - result.keys()
+    if missing:
+        quantities = users_card_quantities(missing)
+        for user_id in missing:
+            result[user_id] = _build(index, user_id, quantities.get(user_id, {}))
+        cache.set_many(
+            {
+                _cache_key(user_id): (index.version, result[user_id].owned, result[user_id].spare)
+                for user_id in missing
+            },
+            timeout=settings.OWNERSHIP_BITSET_CACHE_SECONDS,
+        )
+    return result
+
+
+def invalidate_user_bitsets(user_ids: Iterable[int]) -> None:
+    """Drops the cached bitmaps of ``user_ids`` once the current transaction commits."""
+
+    keys = [_cache_key(user_id) for user_id in set(user_ids)]
+    if keys:
+        transaction.on_commit(lambda: cache.delete_many(keys))
+
+
+def tradeable_between(giver_id: int, receiver_id: int) -> List[CardKey]:
+    """Cards ``giver_id`` has spare copies of that ``receiver_id`` does not own."""
+
+    index = get_card_index()
+    bits = bulk_user_bitsets([giver_id, receiver_id])
+    return index.cards(bits[giver_id].spare & ~bits[receiver_id].owned)
+
+
+def collection_progress(user_id: int, season: Optional[str] = None) -> Dict[str, Dict[str, int]]:
+    """
+    Owned and total card counts per card type, for the whole catalog or one
+    season, computed as popcounts of the user's bitmap against the facets.
+    """
+
+    index = get_card_index()
+    owned = user_bitsets(user_id).owned
+    scope = index.facet("season", season) if season else index.all_bits
+    progress = {}
+    for card_type, bitmap in sorted(index.facets["type"].items()):
+        total = (bitmap & scope).bit_count()
+        if total:
+            progress[card_type] = {"owned": (owned & bitmap & scope).bit_count(), "total": total}
+    progress["all"] = {"owned": (owned & scope).bit_count(), "total": scope.bit_count()}
+    return progress
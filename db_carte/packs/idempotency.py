@@ -0,0 +1,81 @@
+from __future__ import annotations
+
+import hashlib
+from datetime import timedelta
+from typing import Any, Dict, Optional
+
+from django.conf import settings
+from django.utils import timezone
+
+from .models import PackPurchaseIdempotencyKey
+from .services import PackError
+
+IDEMPOTENCY_HEADER = "Idempotency-Key"
+MAX_KEY_LENGTH = 255
+
+
+class IdempotencyKeyError(PackError):
+    """Raised when an idempotency key is malformed or reused for another request."""
+
+
+def request_fingerprint(*parts: Any) -> str:
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update(str(part).encode("utf-8"))
+        digest.update(b"\x00")
+    return digest.hexdigest()
+
+
+def validate_key(key: str) -> str:
+    key = key.strip()
+    if not key or len(key) > MAX_KEY_LENGTH:
+        raise IdempotencyKeyError(
+            f"{IDEMPOTENCY_HEADER} must be between 1 and {MAX_KEY_LENGTH} characters."
+        )
+    return key
+
+
+def find_stored_response(user, key: str, fingerprint: str) -> Optional[PackPurchaseIdempotencyKey]:
+    """
+    Returns the stored response for ``key`` with a single lookup on the
+    (user, key) unique index. Expired records are discarded so the key can
+    be used again.
+    """
+
+    record = PackPurchaseIdempotencyKey.objects.filter(user=user, key=key).first()
+    if record is None:
+        return None
+    if record.expires_at <= timezone.now():
+        record.delete()
+        return None
+    if record.request_hash != fingerprint:
+        raise IdempotencyKeyError(
+            f"This {IDEMPOTENCY_HEADER} was already used for a different request."
+        )
+    return record
+
+
+def store_response(user, key: str, fingerprint: str, status: int, payload: Dict[str, Any]) -> PackPurchaseIdempotencyKey:
+    return PackPurchaseIdempotencyKey.objects.create(
+        user=user,
+        key=key,
+        request_hash=fingerprint,
+        response_status=status,
+        response_payload=payload,
+        expires_at=timezone.now() + timedelta(seconds=settings.PACK_IDEMPOTENCY_KEY_TTL),
+    )
+
+
+def purge_expired_keys(batch_size: int = 1000) -> int:
+    """Deletes expired records in batches and returns how many were removed."""
+
+    removed = 0
+    while True:
+        expired_ids = list(
+            PackPurchaseIdempotencyKey.objects.filter(expires_at__lte=timezone.now())
+            .order_by("expires_at")
+            .values_list("pk", flat=True)[:batch_size]
+        )
+        if not expired_ids:
+            return removed
+        removed += PackPurchaseIdempotencyKey.objects.filter(pk__in=expired_ids).delete()[0]
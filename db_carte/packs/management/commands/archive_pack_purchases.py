@@ -0,0 +1,50 @@
+from datetime import date, datetime, time, timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from packs.archive import DEFAULT_BATCH_SIZE, archive_horizon, archive_purchases, restore_purchases
+
+
+class Command(BaseCommand):
+    help = (
+        "Moves pack purchases older than PACK_ARCHIVE_HORIZON_DAYS out of the hot "
+        "audit log, or restores archived purchases with --restore."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--days", type=int, help="Archive purchases older than this many days.")
+        parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+        parser.add_argument("--restore", action="store_true", help="Move archived purchases back.")
+        parser.add_argument("--user", help="With --restore, only restore this username.")
+        parser.add_argument("--since", help="With --restore, only restore purchases from this date (YYYY-MM-DD).")
+
+    def handle(self, *args, **options):
+        if options["restore"]:
+            self._restore(options)
+            return
+
+        before = archive_horizon()
+        if options["days"] is not None:
+            before = timezone.now() - timedelta(days=options["days"])
+        archived = archive_purchases(before=before, batch_size=options["batch_size"])
+        self.stdout.write(self.style.SUCCESS(f"Archived {archived} purchases created before {before:%Y-%m-%d %H:%M}."))
+
+    def _restore(self, options):
+        user = None
+        if options["user"]:
+            try:
+                user = get_user_model().objects.get(username=options["user"])
+            except get_user_model().DoesNotExist:
+                raise CommandError(f"Unknown user '{options['user']}'.")
+
+        since = None
+        if options["since"]:
+            try:
+                since = timezone.make_aware(datetime.combine(date.fromisoformat(options["since"]), time.min))
+            except ValueError:
+                raise CommandError("--since must be a date in YYYY-MM-DD format.")
+
+        restored = restore_purchases(user=user, since=since, batch_size=options["batch_size"])
+        self.stdout.write(self.style.SUCCESS(f"Restored {restored} purchases."))
@@ -0,0 +1,62 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+from packs.aggregation import DEFAULT_CHUNK_SIZE, DEFAULT_SETTLE_SECONDS
+from packs.audit import WINDOWS, audit_drop_rates
+from packs.rollups import RollupError, update_card_rollup
+
+
+class Command(BaseCommand):
+    help = (
+        "Folds new pack openings into the daily drop counts and runs a chi-square "
+        "test of the observed rarities against the configured pack odds. Odds are "
+        "not versioned: after changing a pack's weights, audit with --since the "
+        "day of the change."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--window", choices=WINDOWS, default="week")
+        parser.add_argument("--since", help="Only audit days from this date (YYYY-MM-DD), e.g. the last odds change.")
+        parser.add_argument("--alpha", type=float, default=0.01, help="Significance level.")
+        parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+        parser.add_argument("--settle-seconds", type=int, default=DEFAULT_SETTLE_SECONDS)
+        parser.add_argument("--rebuild", action="store_true", help="Recount the whole log from scratch.")
+
+    def handle(self, *args, **options):
+        since = None
+        if options["since"]:
+            try:
+                since = date.fromisoformat(options["since"])
+            except ValueError:
+                raise CommandError("--since must be a date in YYYY-MM-DD format.")
+
+        try:
+            first, last = update_card_rollup(
+                chunk_size=options["chunk_size"],
+                settle_seconds=options["settle_seconds"],
+                rebuild=options["rebuild"],
+            )
+        except RollupError as exc:
+            raise CommandError(str(exc))
+        self.stdout.write(f"Counted pack cards with ids {first + 1}..{last}." if last > first else "No new pack cards.")
+
+        flagged = 0
+        for result in audit_drop_rates(window=options["window"], since=since):
+            suspicious = result.is_suspicious(options["alpha"])
+            flagged += suspicious
+            label = result.window_start.isoformat() if result.window_start else "all time"
+            observed = ", ".join(
+                f"{name} {count}/{result.expected.get(name, 0):.1f}"
+                for name, count in sorted(result.observed.items())
+            )
+            line = (
+                f"{result.pack.slug:<16} {label:<10} n={result.total:<7} "
+                f"chi2={result.chi_square:.2f} df={result.degrees_of_freedom} p={result.p_value:.4f}  [{observed}]"
+            )
+            if not result.reliable:
+                line += " (low expected counts)"
+            self.stdout.write(self.style.ERROR(line) if suspicious else line)
+
+        summary = f"{flagged} window(s) deviate from the configured odds at alpha={options['alpha']}."
+        self.stdout.write(self.style.WARNING(summary) if flagged else self.style.SUCCESS(summary))
@@ -0,0 +1,44 @@
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+
+from packs.preroll import PoolSizing, refill_pools
+
+
+class Command(BaseCommand):
+    help = (
+        "Pre-rolls pack contents into the PrerolledPack queue, sized to recent "
+        "demand, so purchases only have to claim a row."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+        parser.add_argument("--loop", action="store_true", help="Keep refilling until interrupted.")
+        parser.add_argument("--interval", type=float, default=10.0, help="Seconds between refills with --loop.")
+        parser.add_argument("--window", type=int, default=60, help="Demand window in minutes.")
+        parser.add_argument("--factor", type=float, default=2.0, help="Pool size as a multiple of recent demand.")
+        parser.add_argument("--min-size", type=int, default=20)
+        parser.add_argument("--max-size", type=int, default=2000)
+
+    def handle(self, *args, **options):
+        sizing = PoolSizing(
+            window=timedelta(minutes=options["window"]),
+            factor=options["factor"],
+            min_size=options["min_size"],
+            max_size=options["max_size"],
+        )
+        workers = max(1, options["workers"])
+
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            while True:
+                added = refill_pools(executor, workers, sizing)
+                for slug, count in added.items():
+                    self.stdout.write(f"{slug}: +{count} pre-rolled packs")
+                if not options["loop"]:
+                    break
+                time.sleep(options["interval"])
+
+        self.stdout.write(self.style.SUCCESS("Pre-roll pools are up to date."))
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from packs.idempotency import purge_expired_keys
+
+
+class Command(BaseCommand):
+    help = "Deletes expired pack purchase idempotency keys."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        removed = purge_expired_keys(batch_size=options["batch_size"])
+        self.stdout.write(self.style.SUCCESS(f"Removed {removed} expired idempotency keys."))
@@ -0,0 +1,59 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from packs.models import Pack
+from packs.services import build_roll_plan
+from packs.simulation import SimulationUnavailableError, simulate_pack
+
+
+class Command(BaseCommand):
+    help = "Simulates pack openings to report drop rates, duplicates and the cost of completing the set."
+
+    def add_arguments(self, parser):
+        parser.add_argument("slug", nargs="?", help="Pack slug; all active packs when omitted.")
+        parser.add_argument("--openings", type=int, default=1_000_000)
+        parser.add_argument("--seed", type=int, default=None)
+        parser.add_argument("--packs-per-player", type=int, default=10)
+        parser.add_argument("--top", type=int, default=10, help="Most frequent cards to list.")
+
+    def handle(self, *args, **options):
+        packs = Pack.objects.filter(is_active=True)
+        if options["slug"]:
+            packs = Pack.objects.filter(slug=options["slug"])
+            if not packs.exists():
+                raise CommandError(f"Unknown pack '{options['slug']}'.")
+
+        for pack in packs.order_by("price", "id"):
+            started = time.perf_counter()
+            try:
+                report = simulate_pack(
+                    build_roll_plan(pack),
+                    price=pack.price,
+                    openings=options["openings"],
+                    seed=options["seed"],
+                    packs_per_player=options["packs_per_player"],
+                )
+            except SimulationUnavailableError as exc:
+                raise CommandError(f"{pack.slug}: {exc}")
+            elapsed = time.perf_counter() - started
+
+            self.stdout.write(self.style.MIGRATE_HEADING(
+                f"{pack.name} ({report['openings']:,} openings in {elapsed:.2f}s)"
+            ))
+            for rarity in report["rarities"]:
+                self.stdout.write(
+                    f"  {rarity['rarity']:<10} configured {rarity['configured_rate']:.4%}"
+                    f"  observed {rarity['observed_rate']:.4%}  ({rarity['cards']} cards)"
+                )
+            self.stdout.write(f"  Top {options['top']} cards:")
+            for card in report["cards"][: options["top"]]:
+                self.stdout.write(f"    {card['type']} #{card['id']}: {card['observed_rate']:.4%}")
+            self.stdout.write(
+                f"  Duplicate rate over {report['packs_per_player']} packs: {report['duplicate_rate']:.2%}"
+            )
+            self.stdout.write(
+                f"  Expected packs to complete {report['set_size']} cards: "
+                f"{report['expected_packs_to_complete']:,.0f} "
+                f"({report['expected_credit_cost_to_complete']:,.0f} credits)"
+            )
@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from packs.aggregation import DEFAULT_CHUNK_SIZE, DEFAULT_SETTLE_SECONDS
+from packs.rollups import RollupError, update_rollups
+
+
+class Command(BaseCommand):
+    help = "Folds new pack purchases and opened cards into the daily economy rollups."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+        parser.add_argument("--settle-seconds", type=int, default=DEFAULT_SETTLE_SECONDS)
+        parser.add_argument("--rebuild", action="store_true", help="Recount the whole log from scratch.")
+
+    def handle(self, *args, **options):
+        try:
+            covered = update_rollups(
+                chunk_size=options["chunk_size"],
+                settle_seconds=options["settle_seconds"],
+                rebuild=options["rebuild"],
+            )
+        except RollupError as exc:
+            raise CommandError(str(exc))
+        for name, (first, last) in covered.items():
+            if last > first:
+                self.stdout.write(self.style.SUCCESS(f"{name}: folded ids {first + 1}..{last}."))
+            else:
+                self.stdout.write(f"{name}: up to date.")
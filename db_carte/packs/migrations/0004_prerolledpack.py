@@ -0,0 +1,27 @@
+# Generated by Django 5.1.1 on 2026-10-19 02:17
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('packs', '0003_packpurchaseidempotencykey'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PrerolledPack',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('cards', models.JSONField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('pack', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='prerolled', to='packs.pack')),
+            ],
+            options={
+                'ordering': ('id',),
+                'indexes': [models.Index(fields=['pack', 'id'], name='packs_preroll_pack_id_idx')],
+            },
+        ),
+    ]
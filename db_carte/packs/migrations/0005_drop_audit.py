@@ -0,0 +1,38 @@
+# Generated by Django 5.1.1 on 2026-10-19 02:20
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cards', '0007_fulltext_search'),
+        ('packs', '0004_prerolledpack'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AggregationCheckpoint',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=64, unique=True)),
+                ('last_id', models.PositiveBigIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='DailyRarityDrop',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('count', models.PositiveIntegerField(default=0)),
+                ('pack', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_rarity_drops', to='packs.pack')),
+                ('rarity', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='cards.cardrarity')),
+            ],
+            options={
+                'ordering': ('day', 'pack', 'rarity'),
+                'unique_together': {('pack', 'rarity', 'day')},
+            },
+        ),
+    ]
@@ -0,0 +1,53 @@
+# Generated by Django 5.1.1 on 2026-10-19 02:21
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def reset_drop_counts(apps, schema_editor):
+    # The drop counts are now produced by the card rollup together with the
+    # per-card mint counts; recount both from the start of the log.
+    apps.get_model("packs", "AggregationCheckpoint").objects.filter(name="drop-audit").delete()
+    apps.get_model("packs", "DailyRarityDrop").objects.all().delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contenttypes', '0002_remove_content_type_name'),
+        ('packs', '0005_drop_audit'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyCardMint',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('object_id', models.PositiveIntegerField()),
+                ('day', models.DateField()),
+                ('count', models.PositiveIntegerField(default=0)),
+                ('content_type', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='contenttypes.contenttype')),
+            ],
+            options={
+                'ordering': ('day', 'content_type', 'object_id'),
+                'unique_together': {('content_type', 'object_id', 'day')},
+            },
+        ),
+        migrations.CreateModel(
+            name='DailyPackSales',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('purchases', models.PositiveIntegerField(default=0)),
+                ('credits_spent', models.PositiveBigIntegerField(default=0)),
+                ('cards_minted', models.PositiveIntegerField(default=0)),
+                ('pack', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_sales', to='packs.pack')),
+            ],
+            options={
+                'verbose_name_plural': 'daily pack sales',
+                'ordering': ('-day', 'pack'),
+                'unique_together': {('pack', 'day')},
+            },
+        ),
+        migrations.RunPython(reset_drop_counts, migrations.RunPython.noop),
+    ]
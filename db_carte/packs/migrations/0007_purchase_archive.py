@@ -0,0 +1,47 @@
+# Generated by Django 5.1.1 on 2026-10-19 02:23
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contenttypes', '0002_remove_content_type_name'),
+        ('packs', '0006_economy_rollups'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedPackPurchase',
+            fields=[
+                ('purchase_id', models.PositiveBigIntegerField(primary_key=True, serialize=False)),
+                ('cost', models.PositiveIntegerField()),
+                ('cards_count', models.PositiveIntegerField()),
+                ('created_at', models.DateTimeField()),
+                ('cards', models.JSONField()),
+                ('archived_at', models.DateTimeField(auto_now_add=True)),
+                ('pack', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_purchases', to='packs.pack')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_pack_purchases', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ('purchase_id',),
+                'indexes': [models.Index(fields=['user', 'created_at'], name='packs_archive_user_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='CardHolding',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('object_id', models.PositiveIntegerField()),
+                ('quantity', models.IntegerField(default=0)),
+                ('content_type', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='contenttypes.contenttype')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='card_holdings', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'unique_together': {('user', 'content_type', 'object_id')},
+            },
+        ),
+    ]
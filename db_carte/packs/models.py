@@ -115,3 +115,201 @@ class PackPurchaseCard(models.Model):
     @property
     def card_type(self) -> str:
         return self.content_type.model
+
+
+class PackPurchaseIdempotencyKey(models.Model):
+    """
+    Remembers the response of a pack purchase under the client supplied
+    ``Idempotency-Key`` header, so that a retried request replays the stored
+    payload instead of charging the user again.
+    """
+
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="pack_idempotency_keys",
+    )
+    key = models.CharField(max_length=255)
+    request_hash = models.CharField(
+        max_length=64,
+        help_text="SHA-256 of the request the key was first used for.",
+    )
+    response_status = models.PositiveSmallIntegerField()
+    response_payload = models.JSONField()
+    created_at = models.DateTimeField(auto_now_add=True)
+    expires_at = models.DateTimeField(db_index=True)
+
+    class Meta:
+        unique_together = ("user", "key")
+
+    def __str__(self) -> str:
+        return f"{self.user} key {self.key} (expires {self.expires_at:%Y-%m-%d %H:%M:%S})"
+
+
+class PrerolledPack(models.Model):
+    """
+    Pack contents rolled ahead of time by the ``preroll_packs`` command.
+    A purchase claims the oldest row of its pack instead of rolling inside
+    the locked transaction. ``cards`` holds the drawn card keys, e.g.
+    ``[{"type": "player", "id": 12, "rarity_id": 3, "rarity": "rare"}, ...]``.
+    """
+
+    pack = models.ForeignKey(
+        Pack,
+        on_delete=models.CASCADE,
+        related_name="prerolled",
+    )
+    cards = models.JSONField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ("id",)
+        indexes = [
+            models.Index(fields=["pack", "id"], name="packs_preroll_pack_id_idx"),
+        ]
+
+    def __str__(self) -> str:
+        return f"Pre-rolled {self.pack.name} #{self.pk}"
+
+
+class AggregationCheckpoint(models.Model):
+    """
+    High-water mark of an incremental aggregation job over an append-only log
+    (``PackPurchase`` or ``PackPurchaseCard``): rows with ``id <= last_id``
+    are already folded into the job's summary tables.
+    """
+
+    name = models.CharField(max_length=64, unique=True)
+    last_id = models.PositiveBigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self) -> str:
+        return f"{self.name} @ {self.last_id}"
+
+
+class DailyRarityDrop(models.Model):
+    """
+    Number of cards of a rarity pulled from a pack on a given day, maintained
+    incrementally from ``PackPurchaseCard`` by the economy rollups.
+    """
+
+    pack = models.ForeignKey(
+        Pack,
+        on_delete=models.CASCADE,
+        related_name="daily_rarity_drops",
+    )
+    rarity = models.ForeignKey("cards.CardRarity", on_delete=models.CASCADE)
+    day = models.DateField()
+    count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        unique_together = ("pack", "rarity", "day")
+        ordering = ("day", "pack", "rarity")
+
+    def __str__(self) -> str:
+        return f"{self.day} {self.pack.name} {self.rarity.name}: {self.count}"
+
+
+class DailyPackSales(models.Model):
+    """
+    Daily sales totals of a pack, maintained incrementally from
+    ``PackPurchase`` by the economy rollups.
+    """
+
+    pack = models.ForeignKey(
+        Pack,
+        on_delete=models.CASCADE,
+        related_name="daily_sales",
+    )
+    day = models.DateField()
+    purchases = models.PositiveIntegerField(default=0)
+    credits_spent = models.PositiveBigIntegerField(default=0)
+    cards_minted = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        unique_together = ("pack", "day")
+        ordering = ("-day", "pack")
+        verbose_name_plural = "daily pack sales"
+
+    def __str__(self) -> str:
+        return f"{self.day} {self.pack.name}: {self.purchases} sold"
+
+
+class DailyCardMint(models.Model):
+    """
+    Number of copies of a card produced by pack openings on a given day,
+    maintained incrementally from ``PackPurchaseCard`` by the economy rollups.
+    """
+
+    content_type = models.ForeignKey(ContentType, on_delete=models.CASCADE)
+    object_id = models.PositiveIntegerField()
+    card = GenericForeignKey("content_type", "object_id")
+    day = models.DateField()
+    count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        unique_together = ("content_type", "object_id", "day")
+        ordering = ("day", "content_type", "object_id")
+
+    def __str__(self) -> str:
+        return f"{self.day} {self.content_type.model} #{self.object_id}: {self.count}"
+
+
+class ArchivedPackPurchase(models.Model):
+    """
+    Compact copy of a ``PackPurchase`` moved out of the hot audit log by
+    ``archive_pack_purchases``: one row per purchase with the opened cards
+    packed into ``cards`` as ``[card_id, content_type_id, object_id, rarity_id]``
+    lists. The original primary keys are kept so a restore is lossless.
+    """
+
+    purchase_id = models.PositiveBigIntegerField(primary_key=True)
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="archived_pack_purchases",
+    )
+    pack = models.ForeignKey(
+        Pack,
+        on_delete=models.CASCADE,
+        related_name="archived_purchases",
+    )
+    cost = models.PositiveIntegerField()
+    cards_count = models.PositiveIntegerField()
+    created_at = models.DateTimeField()
+    cards = models.JSONField()
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ("purchase_id",)
+        indexes = [
+            models.Index(fields=["user", "created_at"], name="packs_archive_user_idx"),
+        ]
+
+    def __str__(self) -> str:
+        return f"Archived purchase #{self.purchase_id} of {self.user}"
+
+
+class CardHolding(models.Model):
+    """
+    Per-user quantity of a card that is not backed by a hot ``PackPurchaseCard``
+    row: copies whose purchase was archived plus copies received in exchanges,
+    minus copies given away (so it can be negative). A user owns
+    ``hot log rows + quantity`` copies of the card.
+    """
+
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="card_holdings",
+    )
+    content_type = models.ForeignKey(ContentType, on_delete=models.CASCADE)
+    object_id = models.PositiveIntegerField()
+    card = GenericForeignKey("content_type", "object_id")
+    quantity = models.IntegerField(default=0)
+
+    class Meta:
+        unique_together = ("user", "content_type", "object_id")
+
+    def __str__(self) -> str:
+        return f"{self.user} holds {self.quantity} x {self.content_type.model} #{self.object_id}"
@@ -0,0 +1,173 @@
+"""
+Card ownership queries.
+
+A user's quantity of a card is the number of hot ``PackPurchaseCard`` rows for
+it plus the user's ``CardHolding.quantity``, the net of copies whose purchases
+were archived and copies received or given away in exchanges (so it can be
+negative). Every ownership count must go through these helpers.
+"""
+
+from __future__ import annotations
+
+from typing import Dict, Iterable, Tuple, Type
+
+from django.contrib.contenttypes.models import ContentType
+from django.db.models import Count, IntegerField, Model, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+from db_carte.counters import increment_counters
+
+from .models import CardHolding, PackPurchaseCard
+
+# (user id, content type id, object id)
+HoldingKey = Tuple[int, int, int]
+
+
+def card_quantities(user, content_type: ContentType, object_ids: Iterable[int]) -> Dict[int, int]:
+    object_ids = list(object_ids)
+    if not object_ids:
+        return {}
+
+    quantities: Dict[int, int] = {}
+    hot = (
+        PackPurchaseCard.objects.filter(
+            purchase__user=user,
+            content_type=content_type,
+            object_id__in=object_ids,
+        )
+        .values("object_id")
+        .annotate(total=Count("id"))
+        .order_by()
+    )
+    for row in hot:
+        quantities[row["object_id"]] = row["total"]
+
+    holdings = CardHolding.objects.filter(
+        user=user,
+        content_type=content_type,
+        object_id__in=object_ids,
+    ).values_list("object_id", "quantity")
+    for object_id, quantity in holdings:
+        quantities[object_id] = quantities.get(object_id, 0) + quantity
+
+    return {object_id: quantity for object_id, quantity in quantities.items() if quantity > 0}
+
+
+def _grouped_quantities(user_ids, **card_filters) -> Dict[HoldingKey, int]:
+    totals: Dict[HoldingKey, int] = {}
+    hot = (
+        PackPurchaseCard.objects.filter(
+            purchase__user_id__in=user_ids,
+            **card_filters,
+        )
+        .values_list("purchase__user_id", "content_type_id", "object_id")
+        .annotate(total=Count("id"))
+        .order_by()
+    )
+    for user_id, content_type_id, object_id, total in hot:
+        totals[(user_id, content_type_id, object_id)] = total
+    holdings = CardHolding.objects.filter(
+        user_id__in=user_ids,
+        **card_filters,
+    ).values_list("user_id", "content_type_id", "object_id", "quantity")
+    for user_id, content_type_id, object_id, quantity in holdings:
+        key = (user_id, content_type_id, object_id)
+        totals[key] = totals.get(key, 0) + quantity
+    return totals
+
+
+def owned_card_quantities(user_ids: Iterable[int], cards: Iterable[Tuple[int, int]]) -> Dict[int, Dict[Tuple[int, int], int]]:
+    """
+    Bulk form of ``card_quantities`` for many users and cards at once:
+    ``{user_id: {(content_type_id, object_id): quantity}}`` with only
+    positive quantities. Runs two grouped queries whatever the input size.
+    """
+
+    user_ids = set(user_ids)
+    cards = set(cards)
+    if not user_ids or not cards:
+        return {}
+    totals = _grouped_quantities(
+        user_ids,
+        content_type_id__in={content_type_id for content_type_id, _ in cards},
+        object_id__in={object_id for _, object_id in cards},
+    )
+
+    owned: Dict[int, Dict[Tuple[int, int], int]] = {}
+    for (user_id, content_type_id, object_id), quantity in totals.items():
+        if quantity > 0 and (content_type_id, object_id) in cards:
+            owned.setdefault(user_id, {})[(content_type_id, object_id)] = quantity
+    return owned
+
+
+def users_card_quantities(user_ids: Iterable[int]) -> Dict[int, Dict[Tuple[int, int], int]]:
+    """Every card owned by each of ``user_ids``, in the shape of ``owned_card_quantities``."""
+
+    user_ids = set(user_ids)
+    if not user_ids:
+        return {}
+    owned: Dict[int, Dict[Tuple[int, int], int]] = {}
+    for (user_id, content_type_id, object_id), quantity in _grouped_quantities(user_ids).items():
+        if quantity > 0:
+            owned.setdefault(user_id, {})[(content_type_id, object_id)] = quantity
+    return owned
+
+
+def user_card_quantities(user_id: int) -> Dict[Tuple[int, int], int]:
+    return users_card_quantities([user_id]).get(user_id, {})
+
+
+def owned_copies(user_id: int, content_type: ContentType):
+    """
+    Expression for the number of copies of the outer card row (``OuterRef("pk")``)
+    owned by ``user_id``, so callers can fetch a card and its quantity in one
+    query: ``Model.objects.annotate(owned=owned_copies(user.pk, content_type))``.
+    """
+
+    hot = (
+        PackPurchaseCard.objects.filter(
+            purchase__user_id=user_id,
+            content_type=content_type,
+            object_id=OuterRef("pk"),
+        )
+        .order_by()
+        .values("object_id")
+        .annotate(total=Count("id"))
+        .values("total")
+    )
+    held = CardHolding.objects.filter(
+        user_id=user_id,
+        content_type=content_type,
+        object_id=OuterRef("pk"),
+    ).values("quantity")[:1]
+    return Coalesce(Subquery(hot, output_field=IntegerField()), Value(0)) + Coalesce(
+        Subquery(held, output_field=IntegerField()), Value(0)
+    )
+
+
+def card_quantity(user, model: Type[Model], card_id: int) -> int:
+    content_type = ContentType.objects.get_for_model(model)
+    return card_quantities(user, content_type, [card_id]).get(card_id, 0)
+
+
+def adjust_holdings(deltas: Dict[HoldingKey, int]) -> None:
+    """
+    Applies quantity deltas to ``CardHolding`` rows with one INSERT of the
+    missing rows and one UPDATE adding the deltas in place per chunk of keys
+    (see ``db_carte.counters``), so concurrent adjustments of the same holding
+    never lose an update.
+    """
+
+    deltas = {key: delta for key, delta in deltas.items() if delta}
+    if not deltas:
+        return
+
+    increment_counters(
+        CardHolding,
+        ("user_id", "content_type_id", "object_id"),
+        {key: {"quantity": delta} for key, delta in deltas.items()},
+    )
+
+    from .bitsets import invalidate_user_bitsets
+
+    invalidate_user_bitsets(user_id for user_id, _, _ in deltas)
@@ -0,0 +1,70 @@
+"""
+Background generation of pre-rolled pack contents.
+
+``refill_pools`` tops up the ``PrerolledPack`` queue of every active pack to a
+size proportional to its recent demand. The random draws run in a process
+pool on plain ``PackRollPlan`` snapshots; only the bulk inserts touch the
+database.
+"""
+
+from __future__ import annotations
+
+import random
+from concurrent.futures import Executor
+from dataclasses import dataclass
+from datetime import timedelta
+from typing import Dict, List
+
+from django.utils import timezone
+
+from .models import Pack, PackPurchase, PrerolledPack
+from .rolling import roll_batch
+from .services import build_roll_plan
+
+INSERT_BATCH_SIZE = 500
+
+
+@dataclass(frozen=True)
+class PoolSizing:
+    window: timedelta = timedelta(hours=1)
+    factor: float = 2.0
+    min_size: int = 20
+    max_size: int = 2000
+
+    def target(self, recent_purchases: int) -> int:
+        wanted = int(recent_purchases * self.factor)
+        return max(self.min_size, min(self.max_size, wanted))
+
+
+def refill_pools(executor: Executor, workers: int, sizing: PoolSizing) -> Dict[str, int]:
+    """
+    Rolls the missing contents of every active pack and returns how many
+    rows were added per pack slug.
+    """
+
+    since = timezone.now() - sizing.window
+    added: Dict[str, int] = {}
+    for pack in Pack.objects.filter(is_active=True).order_by("id"):
+        recent = PackPurchase.objects.filter(pack=pack, created_at__gte=since).count()
+        missing = sizing.target(recent) - PrerolledPack.objects.filter(pack=pack).count()
+        if missing <= 0:
+            continue
+
+        plan = build_roll_plan(pack)
+        if not plan.pools:
+            continue
+
+        chunks = _split(missing, workers)
+        seeds = [random.SystemRandom().getrandbits(64) for _ in chunks]
+        rows: List[PrerolledPack] = []
+        for contents in executor.map(roll_batch, [plan] * len(chunks), chunks, seeds):
+            rows.extend(PrerolledPack(pack=pack, cards=cards) for cards in contents)
+        PrerolledPack.objects.bulk_create(rows, batch_size=INSERT_BATCH_SIZE)
+        added[pack.slug] = len(rows)
+    return added
+
+
+def _split(total: int, parts: int) -> List[int]:
+    parts = max(1, min(parts, total))
+    base, extra = divmod(total, parts)
+    return [base + (1 if index < extra else 0) for index in range(parts)]
@@ -0,0 +1,98 @@
+"""
+Pure pack rolling logic.
+
+A ``PackRollPlan`` is a plain snapshot of a pack's odds: for every rarity with
+a positive weight and at least one card, the weight and the card keys that can
+be drawn. Rolling a plan needs no database access, so the same code runs
+inside the request, in the pre-roll worker processes and in the odds
+simulator. This module must not import Django models: worker processes may be
+started with the ``spawn`` method and would not have the app registry ready.
+"""
+
+from __future__ import annotations
+
+import random
+from dataclasses import dataclass
+from typing import List, Sequence, Tuple
+
+
+@dataclass(frozen=True)
+class RarityPool:
+    rarity_id: int
+    rarity_name: str
+    weight: float
+    # (card type label, card id), ordered by card type then id
+    cards: Tuple[Tuple[str, int], ...]
+
+
+@dataclass(frozen=True)
+class PackRollPlan:
+    pack_id: int
+    cards_per_pack: int
+    pools: Tuple[RarityPool, ...]
+
+    @property
+    def total_weight(self) -> float:
+        return sum(pool.weight for pool in self.pools)
+
+
+@dataclass(frozen=True)
+class RolledCard:
+    card_type: str
+    card_id: int
+    rarity_id: int
+    rarity_name: str
+
+    def to_json(self) -> dict:
+        return {
+            "type": self.card_type,
+            "id": self.card_id,
+            "rarity_id": self.rarity_id,
+            "rarity": self.rarity_name,
+        }
+
+    @classmethod
+    def from_json(cls, data: dict) -> "RolledCard":
+        return cls(
+            card_type=data["type"],
+            card_id=data["id"],
+            rarity_id=data["rarity_id"],
+            rarity_name=data["rarity"],
+        )
+
+
+def pick_pool(pools: Sequence[RarityPool], rng=random) -> RarityPool:
+    total_weight = sum(pool.weight for pool in pools)
+    roll = rng.uniform(0, total_weight)
+    cumulative = 0.0
+    for pool in pools:
+        cumulative += pool.weight
+        if roll <= cumulative:
+            return pool
+    return pools[-1]
+
+
+def roll_pack(plan: PackRollPlan, rng=random) -> List[RolledCard]:
+    rolled: List[RolledCard] = []
+    for _ in range(plan.cards_per_pack):
+        pool = pick_pool(plan.pools, rng)
+        card_type, card_id = pool.cards[rng.randrange(len(pool.cards))]
+        rolled.append(
+            RolledCard(
+                card_type=card_type,
+                card_id=card_id,
+                rarity_id=pool.rarity_id,
+                rarity_name=pool.rarity_name,
+            )
+        )
+    return rolled
+
+
+def roll_batch(plan: PackRollPlan, count: int, seed=None) -> List[List[dict]]:
+    """
+    Rolls ``count`` packs with an independent RNG. Used as the process pool
+    task of the pre-roll generator, hence the JSON-ready return value.
+    """
+
+    rng = random.Random(seed)
+    return [[card.to_json() for card in roll_pack(plan, rng)] for _ in range(count)]
@@ -0,0 +1,232 @@
+"""
+Daily economy rollups for the pack store.
+
+Two incremental jobs keep the summary tables up to date:
+
+- the purchase rollup folds ``PackPurchase`` into ``DailyPackSales``
+  (packs sold, credits spent and cards minted per pack and day);
+- the card rollup folds ``PackPurchaseCard`` into ``DailyRarityDrop``
+  (per pack, rarity and day) and ``DailyCardMint`` (per card and day).
+
+Reports built by ``economy_report`` read only these tables, so their cost
+grows with the number of days in the range instead of the number of purchases.
+
+Trades used to be recorded as zero-cost purchases of the hidden
+``exchange-transfer`` pack. Those rows are still in the log but are neither
+sales nor mints, so the folds and the report skip them.
+"""
+
+from __future__ import annotations
+
+from datetime import date, timedelta
+from typing import Any, Dict, Optional, Tuple
+
+from django.db.models import Count, Sum
+from django.db.models.functions import TruncDate
+
+from .aggregation import (
+    DEFAULT_CHUNK_SIZE,
+    DEFAULT_SETTLE_SECONDS,
+    add_counts,
+    reset_checkpoint,
+    run_incremental,
+)
+from .models import (
+    ArchivedPackPurchase,
+    DailyCardMint,
+    DailyPackSales,
+    DailyRarityDrop,
+    Pack,
+    PackPurchase,
+    PackPurchaseCard,
+)
+from .services import PackError
+
+PURCHASE_ROLLUP = "purchase-rollup"
+CARD_ROLLUP = "card-rollup"
+DEFAULT_REPORT_DAYS = 30
+TOP_CARDS = 10
+# Hidden pack of the pre-ledger exchange transfers (see the module docstring).
+EXCHANGE_TRANSFER_PACK_SLUG = "exchange-transfer"
+
+
+class RollupError(PackError):
+    """Raised when the rollups cannot be rebuilt from the hot log."""
+
+
+def _check_rebuild_allowed() -> None:
+    if ArchivedPackPurchase.objects.exists():
+        raise RollupError(
+            "Archived purchases are not part of the hot log; restore them before rebuilding the rollups."
+        )
+
+
+def fold_purchases(low: int, high: int) -> None:
+    rows = (
+        PackPurchase.objects.filter(id__gt=low, id__lte=high)
+        .exclude(pack__slug=EXCHANGE_TRANSFER_PACK_SLUG)
+        .values("pack_id", day=TruncDate("created_at"))
+        .annotate(purchases=Count("id"), credits=Sum("cost"), cards=Sum("cards_count"))
+        .order_by()
+    )
+    increments = {
+        (row["pack_id"], row["day"]): {
+            "purchases": row["purchases"],
+            "credits_spent": row["credits"] or 0,
+            "cards_minted": row["cards"] or 0,
+        }
+        for row in rows.iterator(chunk_size=2000)
+    }
+    add_counts(DailyPackSales, ("pack_id", "day"), increments)
+
+
+def fold_cards(low: int, high: int) -> None:
+    cards = PackPurchaseCard.objects.filter(id__gt=low, id__lte=high).exclude(
+        purchase__pack__slug=EXCHANGE_TRANSFER_PACK_SLUG
+    )
+    day = TruncDate("purchase__created_at")
+
+    drops = (
+        cards.values("purchase__pack_id", "rarity_id", day=day)
+        .annotate(total=Count("id"))
+        .order_by()
+    )
+    add_counts(
+        DailyRarityDrop,
+        ("pack_id", "rarity_id", "day"),
+        {
+            (row["purchase__pack_id"], row["rarity_id"], row["day"]): {"count": row["total"]}
+            for row in drops.iterator(chunk_size=2000)
+        },
+    )
+
+    mints = (
+        cards.values("content_type_id", "object_id", day=day)
+        .annotate(total=Count("id"))
+        .order_by()
+    )
+    add_counts(
+        DailyCardMint,
+        ("content_type_id", "object_id", "day"),
+        {
+            (row["content_type_id"], row["object_id"], row["day"]): {"count": row["total"]}
+            for row in mints.iterator(chunk_size=2000)
+        },
+    )
+
+
+def update_purchase_rollup(
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    settle_seconds: int = DEFAULT_SETTLE_SECONDS,
+    rebuild: bool = False,
+) -> Tuple[int, int]:
+    if rebuild:
+        _check_rebuild_allowed()
+        reset_checkpoint(PURCHASE_ROLLUP)
+        DailyPackSales.objects.all().delete()
+    return run_incremental(
+        PURCHASE_ROLLUP, PackPurchase, "created_at", fold_purchases, chunk_size, settle_seconds
+    )
+
+
+def update_card_rollup(
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    settle_seconds: int = DEFAULT_SETTLE_SECONDS,
+    rebuild: bool = False,
+) -> Tuple[int, int]:
+    if rebuild:
+        _check_rebuild_allowed()
+        reset_checkpoint(CARD_ROLLUP)
+        DailyRarityDrop.objects.all().delete()
+        DailyCardMint.objects.all().delete()
+    return run_incremental(
+        CARD_ROLLUP, PackPurchaseCard, "purchase__created_at", fold_cards, chunk_size, settle_seconds
+    )
+
+
+def update_rollups(
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    settle_seconds: int = DEFAULT_SETTLE_SECONDS,
+    rebuild: bool = False,
+) -> Dict[str, Tuple[int, int]]:
+    return {
+        PURCHASE_ROLLUP: update_purchase_rollup(chunk_size, settle_seconds, rebuild),
+        CARD_ROLLUP: update_card_rollup(chunk_size, settle_seconds, rebuild),
+    }
+
+
+def default_range(days: int = DEFAULT_REPORT_DAYS) -> Tuple[date, date]:
+    end = date.today()
+    return end - timedelta(days=days - 1), end
+
+
+def economy_report(start: date, end: date, pack: Optional[Pack] = None) -> Dict[str, Any]:
+    """
+    Sales, credit and mint figures for the days ``start``..``end`` (inclusive),
+    optionally restricted to one pack. Per-card mints are not tracked per
+    pack, so ``top_cards`` always covers the whole store.
+    """
+
+    # Rows folded before the transfers were skipped are left out as well.
+    sales = DailyPackSales.objects.filter(day__range=(start, end)).exclude(pack__slug=EXCHANGE_TRANSFER_PACK_SLUG)
+    drops = DailyRarityDrop.objects.filter(day__range=(start, end)).exclude(pack__slug=EXCHANGE_TRANSFER_PACK_SLUG)
+    if pack is not None:
+        sales = sales.filter(pack=pack)
+        drops = drops.filter(pack=pack)
+
+    days = list(
+        sales.values("day")
+        .annotate(
+            purchases=Sum("purchases"),
+            credits_spent=Sum("credits_spent"),
+            cards_minted=Sum("cards_minted"),
+        )
+        .order_by("day")
+    )
+    packs = list(
+        sales.values("pack__slug", "pack__name")
+        .annotate(
+            purchases=Sum("purchases"),
+            credits_spent=Sum("credits_spent"),
+            cards_minted=Sum("cards_minted"),
+        )
+        .order_by("-purchases", "pack__slug")
+    )
+    rarities = list(
+        drops.values("rarity__name")
+        .annotate(cards=Sum("count"))
+        .order_by("-cards", "rarity__name")
+    )
+    top_cards = list(
+        DailyCardMint.objects.filter(day__range=(start, end))
+        .values("content_type__model", "object_id")
+        .annotate(minted=Sum("count"))
+        .order_by("-minted", "content_type__model", "object_id")[:TOP_CARDS]
+    )
+
+    return {
+        "from": start.isoformat(),
+        "to": end.isoformat(),
+        "pack": pack.slug if pack is not None else None,
+        "totals": {
+            "purchases": sum(row["purchases"] for row in days),
+            "credits_spent": sum(row["credits_spent"] for row in days),
+            "cards_minted": sum(row["cards_minted"] for row in days),
+        },
+        "days": [{**row, "day": row["day"].isoformat()} for row in days],
+        "packs": [
+            {
+                "slug": row["pack__slug"],
+                "name": row["pack__name"],
+                "purchases": row["purchases"],
+                "credits_spent": row["credits_spent"],
+                "cards_minted": row["cards_minted"],
+            }
+            for row in packs
+        ],
+        "rarities": [{"rarity": row["rarity__name"], "cards": row["cards"]} for row in rarities],
+        "top_cards": [
+            {"type": row["content_type__model"], "id": row["object_id"], "minted": row["minted"]}
+            for row in top_cards
+        ],
+    }
@@ -1,17 +1,19 @@
 from __future__ import annotations
 
-import random
+from collections import defaultdict
 from dataclasses import dataclass
-from typing import List, Sequence, Tuple, Type
+from typing import Dict, List, Optional, Tuple, Type
 
-from django.contrib.auth import get_user_model
 from django.contrib.contenttypes.models import ContentType
 from django.db import transaction
-from django.db.models import F, QuerySet
 
 from cards.models import BonusMalusCard, CoachCard, GoalkeeperCard, PlayerCard, UserCollection
+from users.credits import CreditError, change_balance
+from users.models import CreditTransaction
 
-from .models import Pack, PackPurchase, PackPurchaseCard, PackRarityWeight
+from .bitsets import invalidate_user_bitsets
+from .models import Pack, PackPurchase, PackPurchaseCard, PrerolledPack
+from .rolling import PackRollPlan, RarityPool, RolledCard, roll_pack
 
 
 class PackError(Exception):
@@ -26,23 +28,6 @@ class NoAvailableCardsError(PackError):
     """Raised when a pack has no cards available for the configured rarities."""
 
 
-@dataclass
-class RarityEntry:
-    label: str
-    queryset: QuerySet
-    count: int
-
-
-@dataclass
-class RarityBucket:
-    rarity: PackRarityWeight
-    entries: Sequence[RarityEntry]
-
-    @property
-    def total_cards(self) -> int:
-        return sum(entry.count for entry in self.entries)
-
-
 @dataclass
 class OpenedCard:
     card: object
@@ -57,9 +42,23 @@ CARD_MODEL_MAP: Tuple[Tuple[str, Type], ...] = (
     ("bonus", BonusMalusCard),
 )
 
+CARD_MODELS_BY_LABEL: Dict[str, Type] = dict(CARD_MODEL_MAP)
+
+COLLECTION_RELATIONS: Dict[str, str] = {
+    "player": "player_cards",
+    "goalkeeper": "goalkeeper_cards",
+    "coach": "coach_cards",
+    "bonus": "bonus_malus_cards",
+}
+
+
+def build_roll_plan(pack: Pack) -> PackRollPlan:
+    """
+    Snapshots the odds of ``pack``: one pool per rarity with a positive weight
+    and at least one card, listing the card keys in a stable order.
+    """
 
-def _build_rarity_buckets(pack: Pack) -> List[RarityBucket]:
-    buckets: List[RarityBucket] = []
+    pools: List[RarityPool] = []
     rarity_weights = (
         pack.rarity_weights.select_related("rarity")
         .filter(weight__gt=0)
@@ -67,122 +66,150 @@ def _build_rarity_buckets(pack: Pack) -> List[RarityBucket]:
     )
 
     for rarity_weight in rarity_weights:
-        entries: List[RarityEntry] = []
+        cards: List[Tuple[str, int]] = []
         for label, model in CARD_MODEL_MAP:
-            queryset = model.objects.filter(rarity=rarity_weight.rarity).order_by("id")
-            count = queryset.count()
-            if count:
-                entries.append(RarityEntry(label=label, queryset=queryset, count=count))
-        buckets.append(RarityBucket(rarity=rarity_weight, entries=entries))
-    return buckets
-
-
-def _pick_bucket(buckets: Sequence[RarityBucket]) -> RarityBucket:
-    available = [bucket for bucket in buckets if bucket.total_cards > 0]
-    if not available:
-        raise NoAvailableCardsError("No cards available for the configured rarities.")
-
-    total_weight = sum(float(bucket.rarity.weight) for bucket in available)
-    if total_weight <= 0:
-        raise NoAvailableCardsError("All rarity weights are zero.")
-
-    roll = random.uniform(0, total_weight)
-    cumulative = 0.0
-    for bucket in available:
-        cumulative += float(bucket.rarity.weight)
-        if roll <= cumulative:
-            return bucket
-    return available[-1]
-
-
-def _pick_card_from_bucket(bucket: RarityBucket) -> Tuple[object, str]:
-    total_cards = bucket.total_cards
-    if total_cards <= 0:
-        raise NoAvailableCardsError(
-            f"No cards available for rarity {bucket.rarity.rarity.name}."
+            card_ids = (
+                model.objects.filter(rarity=rarity_weight.rarity)
+                .order_by("id")
+                .values_list("id", flat=True)
+            )
+            cards.extend((label, card_id) for card_id in card_ids)
+        if cards:
+            pools.append(
+                RarityPool(
+                    rarity_id=rarity_weight.rarity_id,
+                    rarity_name=rarity_weight.rarity.name,
+                    weight=float(rarity_weight.weight),
+                    cards=tuple(cards),
+                )
+            )
+    return PackRollPlan(pack_id=pack.pk, cards_per_pack=pack.cards_per_pack, pools=tuple(pools))
+
+
+def claim_prerolled_pack(pack: Pack, attempts: int = 3) -> Optional[List[RolledCard]]:
+    """
+    Takes the oldest pre-rolled contents of ``pack`` out of the pool. Rows
+    locked by concurrent purchases are skipped (``SKIP LOCKED``), so buyers
+    of the same pack do not queue behind one row. On backends without row
+    locks the row is claimed by deleting it: only the caller whose DELETE
+    affected the row owns it. Must run inside the purchase transaction so a
+    failed purchase puts the row back.
+    """
+
+    for _ in range(attempts):
+        row = (
+            PrerolledPack.objects.select_for_update(skip_locked=True)
+            .filter(pack=pack)
+            .order_by("id")
+            .values("id", "cards")
+            .first()
         )
+        if row is None:
+            return None
+        deleted, _ = PrerolledPack.objects.filter(pk=row["id"]).delete()
+        if deleted:
+            return [RolledCard.from_json(card) for card in row["cards"]]
+    return None
 
-    target_index = random.randrange(total_cards)
-    for entry in bucket.entries:
-        if target_index < entry.count:
-            card = entry.queryset.all()[target_index]
-            return card, entry.label
-        target_index -= entry.count
 
-    # Should never reach here
-    raise NoAvailableCardsError(
-        f"Failed to select a card for rarity {bucket.rarity.rarity.name}."
-    )
+def _load_cards(rolled: List[RolledCard]) -> Optional[List[OpenedCard]]:
+    ids_by_type: Dict[str, set] = defaultdict(set)
+    for entry in rolled:
+        ids_by_type[entry.card_type].add(entry.card_id)
+
+    loaded = {
+        card_type: CARD_MODELS_BY_LABEL[card_type].objects.in_bulk(ids)
+        for card_type, ids in ids_by_type.items()
+    }
+
+    opened_cards: List[OpenedCard] = []
+    for entry in rolled:
+        card = loaded[entry.card_type].get(entry.card_id)
+        if card is None:
+            return None
+        opened_cards.append(
+            OpenedCard(card=card, rarity_name=entry.rarity_name, card_type=entry.card_type)
+        )
+    return opened_cards
+
+
+def _draw_cards(pack: Pack) -> Tuple[List[OpenedCard], List[RolledCard]]:
+    rolled = claim_prerolled_pack(pack)
+    if rolled is not None:
+        opened_cards = _load_cards(rolled)
+        if opened_cards is not None:
+            return opened_cards, rolled
+        # A card of the pre-rolled contents was deleted: roll live instead.
+
+    plan = build_roll_plan(pack)
+    if not plan.pools:
+        raise NoAvailableCardsError(
+            "Nessuna carta disponibile per le rarità configurate per questo pack."
+        )
+    rolled = roll_pack(plan)
+    opened_cards = _load_cards(rolled)
+    if opened_cards is None:
+        raise NoAvailableCardsError("Failed to load the selected cards.")
+    return opened_cards, rolled
 
 
 @transaction.atomic
 def open_pack_for_user(user, pack: Pack) -> Tuple[PackPurchase, List[OpenedCard], int]:
     """
     Performs all the operations required to open a pack:
+    - Claims pre-rolled contents, or randomly selects the cards based on
+      rarity weights when the pool is empty
     - Checks user credits
     - Deducts the pack price
-    - Randomly selects the cards based on rarity weights
     - Adds the cards to the user's collection
     - Persists an audit log of the purchase
+    The cards are drawn before the balance is charged, so the user row is
+    only locked for the conditional UPDATE of the credits ledger and the
+    inserts.
     Returns a tuple containing the purchase record, the list of drawn cards
     (as OpenedCard instances), and the user's updated credit balance.
     """
 
-    UserModel = get_user_model()
-    locked_user = UserModel.objects.select_for_update().get(pk=user.pk)
+    opened_cards, rolled = _draw_cards(pack)
 
-    if locked_user.money < pack.price:
+    try:
+        remaining_credits = change_balance(
+            user.pk,
+            -pack.price,
+            CreditTransaction.Reason.PACK_PURCHASE,
+            reference=f"pack:{pack.pk}",
+        )
+    except CreditError:
         raise InsufficientCreditsError("Crediti insufficienti per completare l'acquisto.")
 
-    locked_user.money = F("money") - pack.price
-    locked_user.save(update_fields=["money"])
-    locked_user.refresh_from_db(fields=["money"])
-
     collection, _ = UserCollection.objects.select_for_update().get_or_create(
-        user=locked_user
+        user=user
     )
 
-    buckets = _build_rarity_buckets(pack)
-    if not any(bucket.total_cards > 0 for bucket in buckets):
-        raise NoAvailableCardsError(
-            "Nessuna carta disponibile per le rarità configurate per questo pack."
-        )
-
     purchase = PackPurchase.objects.create(
-        user=locked_user,
+        user=user,
         pack=pack,
         cost=pack.price,
         cards_count=pack.cards_per_pack,
     )
 
-    opened_cards: List[OpenedCard] = []
-
-    for _ in range(pack.cards_per_pack):
-        bucket = _pick_bucket(buckets)
-        card, card_label = _pick_card_from_bucket(bucket)
-
-        if card_label == "player":
-            collection.player_cards.add(card)
-        elif card_label == "goalkeeper":
-            collection.goalkeeper_cards.add(card)
-        elif card_label == "coach":
-            collection.coach_cards.add(card)
-        else:
-            collection.bonus_malus_cards.add(card)
-
-        PackPurchaseCard.objects.create(
-            purchase=purchase,
-            content_type=ContentType.objects.get_for_model(card),
-            object_id=card.pk,
-            rarity=bucket.rarity.rarity,
-        )
-
-        opened_cards.append(
-            OpenedCard(
-                card=card,
-                rarity_name=bucket.rarity.rarity.name,
-                card_type=card_label,
+    cards_by_type: Dict[str, List[object]] = defaultdict(list)
+    for opened_card in opened_cards:
+        cards_by_type[opened_card.card_type].append(opened_card.card)
+    for card_type, cards in cards_by_type.items():
+        getattr(collection, COLLECTION_RELATIONS[card_type]).add(*cards)
+
+    PackPurchaseCard.objects.bulk_create(
+        [
+            PackPurchaseCard(
+                purchase=purchase,
+                content_type=ContentType.objects.get_for_model(opened_card.card),
+                object_id=opened_card.card.pk,
+                rarity_id=entry.rarity_id,
             )
-        )
+            for opened_card, entry in zip(opened_cards, rolled)
+        ]
+    )
+    invalidate_user_bitsets([user.pk])
 
-    return purchase, opened_cards, locked_user.money
+    return purchase, opened_cards, remaining_credits
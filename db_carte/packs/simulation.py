@@ -0,0 +1,135 @@
+"""
+Vectorized Monte Carlo simulation of pack openings.
+
+The simulator draws from the same ``PackRollPlan`` snapshot used to open packs
+(see ``packs.services.build_roll_plan``), so it always reflects the configured
+``PackRarityWeight`` percentages and the current catalog. NumPy is an optional
+dependency; without it ``simulate_pack`` raises ``SimulationUnavailableError``.
+"""
+
+from __future__ import annotations
+
+import math
+from typing import Any, Dict, Optional
+
+from .rolling import PackRollPlan
+from .services import PackError
+
+try:  # pragma: no cover - optional dependency
+    import numpy as np
+except ImportError:  # pragma: no cover - optional dependency
+    np = None
+
+
+MAX_DRAWS_PER_CHUNK = 2_000_000
+MAX_DUPLICATE_TRIALS = 20_000
+
+
+class SimulationUnavailableError(PackError):
+    """Raised when NumPy is not installed or the pack cannot be simulated."""
+
+
+def _draw(rng, plan: PackRollPlan, probabilities, offsets, sizes, count: int):
+    pool_indices = rng.choice(len(plan.pools), size=count, p=probabilities)
+    within_pool = (rng.random(count) * sizes[pool_indices]).astype(np.int64)
+    return pool_indices, offsets[pool_indices] + within_pool
+
+
+def expected_draws_to_complete(plan: PackRollPlan) -> float:
+    """
+    Expected number of single draws needed to own every card of the plan
+    (coupon collector with unequal probabilities). Uses the Poissonized form
+    E[T] = integral of 1 - prod_i(1 - exp(-p_i t)) dt; cards of the same
+    rarity share p_i, so the product has one factor per rarity.
+    """
+
+    total_weight = plan.total_weight
+    per_card = np.array([pool.weight / total_weight / len(pool.cards) for pool in plan.pools])
+    counts = np.array([len(pool.cards) for pool in plan.pools], dtype=np.float64)
+
+    # Past t_max every card is owned with probability > 1 - 1e-12.
+    t_max = (math.log(counts.sum()) + 30.0) / per_card.min()
+    grid = np.concatenate(([0.0], np.geomspace(1e-3, t_max, 200_000)))
+    log_all_owned = (counts[:, None] * np.log1p(-np.exp(-np.outer(per_card, grid[1:])))).sum(axis=0)
+    missing_probability = np.concatenate(([1.0], -np.expm1(log_all_owned)))
+    trapezoid = getattr(np, "trapezoid", None) or np.trapz  # renamed in NumPy 2.0
+    return float(trapezoid(missing_probability, grid))
+
+
+def simulate_pack(
+    plan: PackRollPlan,
+    price: int,
+    openings: int,
+    seed: Optional[int] = None,
+    packs_per_player: int = 10,
+) -> Dict[str, Any]:
+    if np is None:
+        raise SimulationUnavailableError("NumPy is required to run pack simulations.")
+    if not plan.pools:
+        raise SimulationUnavailableError("This pack has no cards for its configured rarities.")
+
+    rng = np.random.default_rng(seed)
+    total_weight = plan.total_weight
+    probabilities = np.array([pool.weight / total_weight for pool in plan.pools])
+    sizes = np.array([len(pool.cards) for pool in plan.pools], dtype=np.int64)
+    offsets = np.concatenate(([0], np.cumsum(sizes)[:-1]))
+    card_keys = [card for pool in plan.pools for card in pool.cards]
+
+    rarity_hits = np.zeros(len(plan.pools), dtype=np.int64)
+    card_hits = np.zeros(len(card_keys), dtype=np.int64)
+
+    total_draws = openings * plan.cards_per_pack
+    remaining = total_draws
+    while remaining > 0:
+        count = min(remaining, MAX_DRAWS_PER_CHUNK)
+        pool_indices, card_indices = _draw(rng, plan, probabilities, offsets, sizes, count)
+        rarity_hits += np.bincount(pool_indices, minlength=len(plan.pools))
+        card_hits += np.bincount(card_indices, minlength=len(card_keys))
+        remaining -= count
+
+    # Duplicate rate for a player opening ``packs_per_player`` packs: share of
+    # the drawn cards that the same player had already pulled.
+    draws_per_player = packs_per_player * plan.cards_per_pack
+    trials = max(1, min(MAX_DUPLICATE_TRIALS, openings // max(1, packs_per_player)))
+    # Players are simulated in chunks of at most MAX_DRAWS_PER_CHUNK draws too.
+    trials_per_chunk = max(1, MAX_DRAWS_PER_CHUNK // draws_per_player)
+    unique_cards = 0
+    for start in range(0, trials, trials_per_chunk):
+        chunk_trials = min(trials_per_chunk, trials - start)
+        _, player_draws = _draw(rng, plan, probabilities, offsets, sizes, chunk_trials * draws_per_player)
+        player_draws = np.sort(player_draws.reshape(chunk_trials, draws_per_player), axis=1)
+        unique_cards += chunk_trials + int((np.diff(player_draws, axis=1) != 0).sum())
+    duplicate_rate = float(1.0 - unique_cards / (trials * draws_per_player))
+
+    expected_draws = expected_draws_to_complete(plan)
+    expected_packs = expected_draws / plan.cards_per_pack
+
+    card_order = np.argsort(-card_hits, kind="stable")
+    return {
+        "pack_id": plan.pack_id,
+        "openings": openings,
+        "cards_drawn": total_draws,
+        "rarities": [
+            {
+                "rarity": pool.rarity_name,
+                "configured_rate": float(probabilities[index]),
+                "observed_rate": float(rarity_hits[index] / total_draws),
+                "cards": len(pool.cards),
+            }
+            for index, pool in enumerate(plan.pools)
+        ],
+        "cards": [
+            {
+                "type": card_keys[index][0],
+                "id": card_keys[index][1],
+                "hits": int(card_hits[index]),
+                "observed_rate": float(card_hits[index] / total_draws),
+            }
+            for index in card_order
+        ],
+        "set_size": len(card_keys),
+        "expected_packs_to_complete": expected_packs,
+        "expected_credit_cost_to_complete": expected_packs * price,
+        "packs_per_player": packs_per_player,
+        "duplicate_rate": duplicate_rate,
+    }
@@ -0,0 +1,53 @@
+"""Small model factories shared by the test suites."""
+
+from decimal import Decimal
+from itertools import count
+from typing import List
+
+from django.contrib.auth import get_user_model
+
+from cards.models import CardRarity, PlayerCard
+from packs.models import Pack, PackRarityWeight
+
+_sequence = count(1)
+
+
+def make_user(**fields):
+    number = next(_sequence)
+    fields.setdefault("username", f"user{number}")
+    fields.setdefault("email", f"user{number}@example.com")
+    return get_user_model().objects.create_user(password="x", **fields)
+
+
+def make_rarity(name: str = "common") -> CardRarity:
+    rarity, _ = CardRarity.objects.get_or_create(name=name)
+    return rarity
+
+
+def make_player_cards(total: int, rarity: CardRarity = None, **fields) -> List[PlayerCard]:
+    rarity = rarity or make_rarity()
+    return PlayerCard.objects.bulk_create(
+        [
+            PlayerCard(
+                name=f"Player {next(_sequence)}",
+                attack=50,
+                defense=50,
+                image="player_images/test.png",
+                rarity=rarity,
+                **fields,
+            )
+            for _ in range(total)
+        ]
+    )
+
+
+def make_pack(rarity: CardRarity = None, price: int = 20, cards_per_pack: int = 3) -> Pack:
+    number = next(_sequence)
+    pack = Pack.objects.create(
+        name=f"Test Pack {number}",
+        slug=f"test-pack-{number}",
+        price=price,
+        cards_per_pack=cards_per_pack,
+    )
+    PackRarityWeight.objects.create(pack=pack, rarity=rarity or make_rarity(), weight=Decimal("100"))
+    return pack
@@ -0,0 +1,75 @@
+from datetime import timedelta
+
+from django.contrib.contenttypes.models import ContentType
+from django.db.models import Sum
+from django.test import TestCase
+from django.utils import timezone
+
+from cards.models import PlayerCard
+from packs.archive import archive_purchases, restore_purchases
+from packs.models import ArchivedPackPurchase, CardHolding, PackPurchase, PackPurchaseCard
+from packs.ownership import card_quantities
+from packs.rollups import update_rollups
+
+from .factories import make_pack, make_rarity, make_user
+
+
+class ArchiveTests(TestCase):
+    def setUp(self):
+        self.rarity = make_rarity()
+        self.pack = make_pack(rarity=self.rarity)
+        self.user = make_user()
+        self.content_type = ContentType.objects.get_for_model(PlayerCard)
+
+    def open_pack(self, object_ids):
+        purchase = PackPurchase.objects.create(
+            user=self.user, pack=self.pack, cost=self.pack.price, cards_count=len(object_ids)
+        )
+        PackPurchaseCard.objects.bulk_create(
+            [
+                PackPurchaseCard(
+                    purchase=purchase, content_type=self.content_type, object_id=object_id, rarity=self.rarity
+                )
+                for object_id in object_ids
+            ]
+        )
+        return purchase
+
+    def quantities(self):
+        return card_quantities(self.user, self.content_type, [1, 2, 3])
+
+    def archive(self, **kwargs):
+        return archive_purchases(before=timezone.now() + timedelta(seconds=1), **kwargs)
+
+    def test_round_trip_keeps_ownership_ids_and_timestamps(self):
+        first = self.open_pack([1, 2])
+        second = self.open_pack([2, 3])
+        update_rollups(settle_seconds=0)
+        card_ids = set(PackPurchaseCard.objects.values_list("id", flat=True))
+
+        self.assertEqual(self.archive(batch_size=1), 2)
+
+        self.assertFalse(PackPurchase.objects.exists())
+        self.assertEqual(dict(CardHolding.objects.values_list("object_id", "quantity")), {1: 1, 2: 2, 3: 1})
+        self.assertEqual(self.quantities(), {1: 1, 2: 2, 3: 1})
+
+        self.assertEqual(restore_purchases(batch_size=1), 2)
+
+        self.assertFalse(ArchivedPackPurchase.objects.exists())
+        self.assertFalse(CardHolding.objects.exists())
+        self.assertEqual(self.quantities(), {1: 1, 2: 2, 3: 1})
+        self.assertEqual(set(PackPurchaseCard.objects.values_list("id", flat=True)), card_ids)
+        self.assertEqual(
+            dict(PackPurchase.objects.values_list("id", "created_at")),
+            {first.pk: first.created_at, second.pk: second.created_at},
+        )
+
+    def test_only_archives_purchases_folded_into_the_rollups(self):
+        self.open_pack([1, 2])
+        update_rollups(settle_seconds=0)
+        self.open_pack([3])
+
+        self.archive()
+
+        self.assertEqual(list(PackPurchaseCard.objects.values_list("object_id", flat=True)), [3])
+        self.assertEqual(CardHolding.objects.aggregate(total=Sum("quantity"))["total"], 2)
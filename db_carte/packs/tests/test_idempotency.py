@@ -0,0 +1,70 @@
+from datetime import timedelta
+
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from packs.idempotency import IDEMPOTENCY_HEADER, purge_expired_keys
+from packs.models import PackPurchase, PackPurchaseIdempotencyKey
+
+from .factories import make_pack, make_player_cards, make_user
+
+
+class PackPurchaseIdempotencyTests(TestCase):
+    def setUp(self):
+        make_player_cards(5)
+        self.pack = make_pack(price=20)
+        self.other_pack = make_pack(price=20)
+        self.user = make_user()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def purchase(self, pack=None, key=None):
+        headers = {IDEMPOTENCY_HEADER: key} if key is not None else {}
+        return self.client.post(f"/api/packs/{(pack or self.pack).slug}/purchase/", headers=headers)
+
+    def test_retry_with_same_key_replays_the_first_response(self):
+        first = self.purchase(key="abc")
+        second = self.purchase(key="abc")
+
+        self.assertEqual(first.status_code, 201)
+        self.assertEqual(second.status_code, 201)
+        self.assertEqual(second["Idempotent-Replayed"], "true")
+        self.assertEqual(second.json(), first.json())
+        self.assertEqual(PackPurchase.objects.filter(user=self.user).count(), 1)
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.money, 500 - 20)
+
+    def test_same_key_for_another_request_is_rejected(self):
+        self.purchase(key="abc")
+        response = self.purchase(pack=self.other_pack, key="abc")
+
+        self.assertEqual(response.status_code, 422)
+        self.assertEqual(PackPurchase.objects.filter(user=self.user).count(), 1)
+
+    def test_requests_without_key_are_not_deduplicated(self):
+        self.purchase()
+        self.purchase()
+
+        self.assertEqual(PackPurchase.objects.filter(user=self.user).count(), 2)
+
+    def test_invalid_key_is_rejected(self):
+        self.assertEqual(self.purchase(key="x" * 300).status_code, 422)
+
+    def test_expired_key_can_be_reused(self):
+        self.purchase(key="abc")
+        PackPurchaseIdempotencyKey.objects.update(expires_at=timezone.now() - timedelta(seconds=1))
+
+        response = self.purchase(key="abc")
+
+        self.assertEqual(response.status_code, 201)
+        self.assertFalse(response.has_header("Idempotent-Replayed"))
+        self.assertEqual(PackPurchase.objects.filter(user=self.user).count(), 2)
+
+    def test_purge_removes_only_expired_keys(self):
+        self.purchase(key="old")
+        PackPurchaseIdempotencyKey.objects.update(expires_at=timezone.now() - timedelta(seconds=1))
+        self.purchase(key="new")
+
+        self.assertEqual(purge_expired_keys(), 1)
+        self.assertEqual(list(PackPurchaseIdempotencyKey.objects.values_list("key", flat=True)), ["new"])
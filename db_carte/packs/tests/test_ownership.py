@@ -0,0 +1,59 @@
+from django.contrib.contenttypes.models import ContentType
+from django.core.cache import cache
+from django.test import TestCase
+
+from cards.models import PlayerCard
+from packs.bitsets import get_card_index, user_bitsets
+from packs.models import CardHolding, PackPurchase, PackPurchaseCard
+from packs.ownership import adjust_holdings, card_quantities, owned_card_quantities
+
+from .factories import make_pack, make_player_cards, make_rarity, make_user
+
+
+class AdjustHoldingsTests(TestCase):
+    def setUp(self):
+        self.user = make_user()
+        self.other = make_user()
+        self.content_type = ContentType.objects.get_for_model(PlayerCard)
+
+    def key(self, object_id, user=None):
+        return ((user or self.user).pk, self.content_type.pk, object_id)
+
+    def test_applies_signed_deltas_per_user_and_skips_zero(self):
+        adjust_holdings({self.key(1): 2, self.key(1, self.other): 1})
+        adjust_holdings({self.key(1): -1, self.key(1, self.other): 1, self.key(2): 0})
+
+        self.assertEqual(
+            dict(CardHolding.objects.values_list("user_id", "quantity")),
+            {self.user.pk: 1, self.other.pk: 2},
+        )
+        self.assertFalse(CardHolding.objects.filter(object_id=2).exists())
+
+    def test_drops_the_cached_ownership_bitmaps_on_commit(self):
+        cache.clear()
+        card = make_player_cards(1)[0]
+        key = (self.content_type.pk, card.pk)
+        self.assertFalse(user_bitsets(self.user.pk).owns(get_card_index(), key))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            adjust_holdings({self.key(card.pk): 1})
+
+        self.assertTrue(user_bitsets(self.user.pk).owns(get_card_index(), key))
+
+    def test_quantities_add_hot_rows_and_holdings(self):
+        rarity = make_rarity()
+        purchase = PackPurchase.objects.create(user=self.user, pack=make_pack(rarity=rarity), cost=0, cards_count=2)
+        PackPurchaseCard.objects.bulk_create(
+            [
+                PackPurchaseCard(purchase=purchase, content_type=self.content_type, object_id=object_id, rarity=rarity)
+                for object_id in (1, 2)
+            ]
+        )
+        # Card 2 was traded away, card 3 received.
+        adjust_holdings({self.key(2): -1, self.key(3): 1})
+
+        self.assertEqual(card_quantities(self.user, self.content_type, [1, 2, 3]), {1: 1, 3: 1})
+        self.assertEqual(
+            owned_card_quantities([self.user.pk], [(self.content_type.pk, 2), (self.content_type.pk, 3)]),
+            {self.user.pk: {(self.content_type.pk, 3): 1}},
+        )
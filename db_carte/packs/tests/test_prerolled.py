@@ -0,0 +1,50 @@
+from django.db import transaction
+from django.test import TestCase
+
+from packs.models import PrerolledPack
+from packs.rolling import roll_pack
+from packs.services import build_roll_plan, claim_prerolled_pack, open_pack_for_user
+
+from .factories import make_pack, make_player_cards, make_user
+
+
+class PrerolledPoolTests(TestCase):
+    def setUp(self):
+        make_player_cards(5)
+        self.pack = make_pack(cards_per_pack=3)
+
+    def fill(self, total):
+        plan = build_roll_plan(self.pack)
+        PrerolledPack.objects.bulk_create(
+            [
+                PrerolledPack(pack=self.pack, cards=[card.to_json() for card in roll_pack(plan)])
+                for _ in range(total)
+            ]
+        )
+
+    def test_claims_the_oldest_row_once(self):
+        self.fill(2)
+        first, second = PrerolledPack.objects.order_by("id")
+        with transaction.atomic():
+            claimed = claim_prerolled_pack(self.pack)
+
+        self.assertEqual([card.to_json() for card in claimed], first.cards)
+        self.assertEqual(list(PrerolledPack.objects.values_list("id", flat=True)), [second.pk])
+
+    def test_purchase_uses_the_pool(self):
+        self.fill(1)
+        purchase, opened, _ = open_pack_for_user(make_user(), self.pack)
+
+        self.assertEqual(len(opened), 3)
+        self.assertEqual(purchase.cards_count, 3)
+        self.assertFalse(PrerolledPack.objects.exists())
+
+    def test_saving_the_pack_discards_its_pool(self):
+        self.fill(2)
+        self.pack.cards_per_pack = 5
+        self.pack.save()
+
+        self.assertFalse(PrerolledPack.objects.filter(pack=self.pack).exists())
+        purchase, opened, _ = open_pack_for_user(make_user(), self.pack)
+        self.assertEqual(len(opened), purchase.cards_count)
+        self.assertEqual(purchase.cards_count, 5)
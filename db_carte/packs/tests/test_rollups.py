@@ -0,0 +1,63 @@
+from django.contrib.contenttypes.models import ContentType
+from django.db.models import Sum
+from django.test import TestCase
+
+from cards.models import PlayerCard
+from packs.models import DailyCardMint, DailyPackSales, DailyRarityDrop, Pack, PackPurchase, PackPurchaseCard
+from packs.rollups import EXCHANGE_TRANSFER_PACK_SLUG, default_range, economy_report, update_rollups
+
+from .factories import make_pack, make_rarity, make_user
+
+
+class EconomyRollupTests(TestCase):
+    def setUp(self):
+        self.rarity = make_rarity()
+        self.pack = make_pack(rarity=self.rarity)
+        self.user = make_user()
+        self.content_type = ContentType.objects.get_for_model(PlayerCard)
+
+    def open_pack(self, object_ids, pack=None):
+        pack = pack or self.pack
+        purchase = PackPurchase.objects.create(user=self.user, pack=pack, cost=pack.price, cards_count=len(object_ids))
+        PackPurchaseCard.objects.bulk_create(
+            [
+                PackPurchaseCard(
+                    purchase=purchase, content_type=self.content_type, object_id=object_id, rarity=self.rarity
+                )
+                for object_id in object_ids
+            ]
+        )
+
+    def test_folds_sales_drops_and_mints_incrementally(self):
+        self.open_pack([1, 2, 3])
+        update_rollups(settle_seconds=0)
+        self.open_pack([3, 4])
+        update_rollups(settle_seconds=0)
+        # A rerun without new rows changes nothing.
+        update_rollups(settle_seconds=0)
+
+        sales = DailyPackSales.objects.get()
+        self.assertEqual(
+            (sales.purchases, sales.credits_spent, sales.cards_minted), (2, 2 * self.pack.price, 5)
+        )
+        self.assertEqual(DailyRarityDrop.objects.get().count, 5)
+        self.assertEqual(dict(DailyCardMint.objects.values_list("object_id", "count")), {1: 1, 2: 1, 3: 2, 4: 1})
+        self.assertEqual(DailyCardMint.objects.aggregate(total=Sum("count"))["total"], 5)
+
+    def test_skips_legacy_exchange_transfers(self):
+        transfers = Pack.objects.create(
+            name="Exchange Transfer", slug=EXCHANGE_TRANSFER_PACK_SLUG, price=0, cards_per_pack=1, is_active=False
+        )
+        self.open_pack([1, 2])
+        self.open_pack([3], pack=transfers)
+        update_rollups(settle_seconds=0)
+
+        self.assertEqual(list(DailyPackSales.objects.values_list("pack_id", flat=True)), [self.pack.pk])
+        self.assertEqual(list(DailyRarityDrop.objects.values_list("pack_id", "count")), [(self.pack.pk, 2)])
+        self.assertEqual(sorted(DailyCardMint.objects.values_list("object_id", flat=True)), [1, 2])
+
+        # Rows folded before transfers were skipped stay out of the report.
+        DailyPackSales.objects.create(pack=transfers, day=default_range()[1], purchases=1)
+        report = economy_report(*default_range())
+        self.assertEqual(report["totals"]["purchases"], 1)
+        self.assertEqual([row["slug"] for row in report["packs"]], [self.pack.slug])
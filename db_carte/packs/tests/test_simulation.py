@@ -0,0 +1,38 @@
+from unittest import mock
+
+from django.test import TestCase
+
+from packs import simulation
+from packs.services import build_roll_plan
+
+from .factories import make_pack, make_player_cards
+
+
+class SimulatePackTests(TestCase):
+    def plan(self, cards):
+        make_player_cards(cards)
+        return build_roll_plan(make_pack(cards_per_pack=3))
+
+    def test_every_draw_is_chunked(self):
+        plan = self.plan(5)
+        real_draw = simulation._draw
+        counts = []
+
+        def draw(*args):
+            counts.append(args[-1])
+            return real_draw(*args)
+
+        with mock.patch.object(simulation, "MAX_DRAWS_PER_CHUNK", 60), mock.patch.object(simulation, "_draw", draw):
+            result = simulation.simulate_pack(plan, price=20, openings=1000, seed=1, packs_per_player=4)
+
+        # 3000 opening draws, then 250 players of 12 draws: 5 per chunk.
+        self.assertLessEqual(max(counts), 60)
+        self.assertEqual(sum(counts), 3000 + 250 * 12)
+        self.assertTrue(0 < result["duplicate_rate"] < 1)
+
+    def test_duplicate_rate_of_a_single_card_set(self):
+        with mock.patch.object(simulation, "MAX_DRAWS_PER_CHUNK", 7):
+            result = simulation.simulate_pack(self.plan(1), price=20, openings=40, seed=1, packs_per_player=2)
+
+        # Every draw after a player's first one is a duplicate.
+        self.assertAlmostEqual(result["duplicate_rate"], 1 - 1 / 6)
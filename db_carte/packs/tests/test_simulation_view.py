@@ -0,0 +1,29 @@
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from packs.views import PackSimulationView
+
+from .factories import make_pack, make_player_cards, make_user
+
+
+class PackSimulationViewTests(TestCase):
+    def setUp(self):
+        make_player_cards(3)
+        self.pack = make_pack()
+        self.client = APIClient()
+        self.client.force_authenticate(make_user(is_staff=True))
+
+    def simulate(self, **params):
+        return self.client.get(f"/api/packs/{self.pack.slug}/simulate/", params)
+
+    def test_rejects_out_of_range_parameters(self):
+        for params in (
+            {"openings": 0},
+            {"openings": PackSimulationView.MAX_OPENINGS + 1},
+            {"packs_per_player": 0},
+            {"packs_per_player": PackSimulationView.MAX_PACKS_PER_PLAYER + 1},
+        ):
+            response = self.simulate(**params)
+            self.assertEqual(response.status_code, 400, params)
+            self.assertIn("openings", response.json()["detail"])
+            self.assertIn("packs_per_player", response.json()["detail"])
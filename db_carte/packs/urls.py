@@ -1,10 +1,20 @@
 from django.urls import path
 
-from .views import PackListView, PackPurchaseView, UserCollectionView
+from .views import (
+    CollectionProgressView,
+    PackEconomyView,
+    PackListView,
+    PackPurchaseView,
+    PackSimulationView,
+    UserCollectionView,
+)
 
 
 urlpatterns = [
     path("", PackListView.as_view(), name="pack-list"),
     path("<slug:slug>/purchase/", PackPurchaseView.as_view(), name="pack-purchase"),
+    path("<slug:slug>/simulate/", PackSimulationView.as_view(), name="pack-simulate"),
     path("collection/", UserCollectionView.as_view(), name="user-collection"),
+    path("collection/progress/", CollectionProgressView.as_view(), name="user-collection-progress"),
+    path("stats/economy/", PackEconomyView.as_view(), name="pack-economy"),
 ]
@@ -1,11 +1,28 @@
+from datetime import date
+
 from django.contrib.contenttypes.models import ContentType
-from django.db.models import Count
+from django.db import IntegrityError, transaction
 from django.shortcuts import get_object_or_404
+from django.utils.decorators import method_decorator
+from django.views.decorators.http import condition
 from rest_framework import permissions, status
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
-from .models import Pack, PackPurchaseCard
+from db_carte.renderers import NegotiatedRenderersMixin
+from db_carte.versioning import PACKS, versioned_etag
+
+from .bitsets import collection_progress
+from .idempotency import (
+    IDEMPOTENCY_HEADER,
+    IdempotencyKeyError,
+    find_stored_response,
+    request_fingerprint,
+    store_response,
+    validate_key,
+)
+from .models import Pack
+from .ownership import card_quantities
 from .serializers import (
     PackSerializer,
     serialize_collection_card,
@@ -14,14 +31,19 @@ from .serializers import (
 from .services import (
     InsufficientCreditsError,
     NoAvailableCardsError,
+    build_roll_plan,
     open_pack_for_user,
 )
+from .rollups import default_range, economy_report
+from .simulation import SimulationUnavailableError, simulate_pack
 from cards.models import BonusMalusCard, CoachCard, GoalkeeperCard, PlayerCard, UserCollection
+from users.write_buffer import flush_user
 
 
 class PackListView(APIView):
     permission_classes = [permissions.AllowAny]
 
+    @method_decorator(condition(etag_func=versioned_etag(PACKS)))
     def get(self, request):
         packs = Pack.objects.filter(is_active=True).order_by("price", "id")
         serializer = PackSerializer(packs, many=True)
@@ -34,20 +56,56 @@ class PackPurchaseView(APIView):
     def post(self, request, slug: str):
         pack = get_object_or_404(Pack, slug=slug, is_active=True)
 
+        idempotency_key = request.headers.get(IDEMPOTENCY_HEADER)
+        fingerprint = request_fingerprint("pack-purchase", pack.slug)
+        if idempotency_key is not None:
+            try:
+                idempotency_key = validate_key(idempotency_key)
+                stored = find_stored_response(request.user, idempotency_key, fingerprint)
+            except IdempotencyKeyError as exc:
+                return Response({"detail": str(exc)}, status=status.HTTP_422_UNPROCESSABLE_ENTITY)
+            if stored is not None:
+                return self._replay(stored)
+
+        # Buffered quiz rewards count towards the price; write them before charging.
+        flush_user(request.user.pk)
         try:
-            purchase, opened_cards, remaining_credits = open_pack_for_user(
-                user=request.user,
-                pack=pack,
-            )
+            with transaction.atomic():
+                purchase, opened_cards, remaining_credits = open_pack_for_user(
+                    user=request.user,
+                    pack=pack,
+                )
+                payload = self._build_payload(request, pack, purchase, opened_cards, remaining_credits)
+                if idempotency_key is not None:
+                    # Same transaction as the purchase: a concurrent retry with the
+                    # same key fails on the unique index and rolls its purchase back.
+                    store_response(
+                        request.user,
+                        idempotency_key,
+                        fingerprint,
+                        status.HTTP_201_CREATED,
+                        payload,
+                    )
         except InsufficientCreditsError as exc:
             return Response({"detail": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
         except NoAvailableCardsError as exc:
             return Response({"detail": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+        except IntegrityError:
+            if idempotency_key is None:
+                raise
+            stored = find_stored_response(request.user, idempotency_key, fingerprint)
+            if stored is None:
+                raise
+            return self._replay(stored)
 
         # Keep the in-memory user object aligned with the new balance.
         request.user.money = remaining_credits
 
-        payload = {
+        return Response(payload, status=status.HTTP_201_CREATED)
+
+    @staticmethod
+    def _build_payload(request, pack, purchase, opened_cards, remaining_credits):
+        return {
             "pack": PackSerializer(pack).data,
             "credits": remaining_credits,
             "purchase": {
@@ -60,10 +118,82 @@ class PackPurchaseView(APIView):
             ],
         }
 
-        return Response(payload, status=status.HTTP_201_CREATED)
+    @staticmethod
+    def _replay(stored):
+        response = Response(stored.response_payload, status=stored.response_status)
+        response["Idempotent-Replayed"] = "true"
+        return response
 
 
-class UserCollectionView(APIView):
+class PackSimulationView(APIView):
+    permission_classes = [permissions.IsAdminUser]
+
+    MAX_OPENINGS = 5_000_000
+    MAX_PACKS_PER_PLAYER = 1_000
+
+    def get(self, request, slug: str):
+        pack = get_object_or_404(Pack, slug=slug)
+        try:
+            openings = int(request.query_params.get("openings", 1_000_000))
+            packs_per_player = int(request.query_params.get("packs_per_player", 10))
+        except (TypeError, ValueError):
+            return Response(
+                {"detail": "openings and packs_per_player must be integers."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        if not 1 <= openings <= self.MAX_OPENINGS or not 1 <= packs_per_player <= self.MAX_PACKS_PER_PLAYER:
+            return Response(
+                {
+                    "detail": (
+                        f"openings must be between 1 and {self.MAX_OPENINGS} and "
+                        f"packs_per_player between 1 and {self.MAX_PACKS_PER_PLAYER}."
+                    )
+                },
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        try:
+            report = simulate_pack(
+                build_roll_plan(pack),
+                price=pack.price,
+                openings=openings,
+                packs_per_player=packs_per_player,
+            )
+        except SimulationUnavailableError as exc:
+            return Response({"detail": str(exc)}, status=status.HTTP_503_SERVICE_UNAVAILABLE)
+        return Response(report, status=status.HTTP_200_OK)
+
+
+class PackEconomyView(APIView):
+    """Daily sales, credit and mint figures, read from the economy rollups."""
+
+    permission_classes = [permissions.IsAdminUser]
+
+    def get(self, request):
+        start, end = default_range()
+        try:
+            if request.query_params.get("from"):
+                start = date.fromisoformat(request.query_params["from"])
+            if request.query_params.get("to"):
+                end = date.fromisoformat(request.query_params["to"])
+        except ValueError:
+            return Response(
+                {"detail": "from and to must be dates in YYYY-MM-DD format."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        if start > end:
+            return Response(
+                {"detail": "from must not be after to."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        pack = None
+        if request.query_params.get("pack"):
+            pack = get_object_or_404(Pack, slug=request.query_params["pack"])
+        return Response(economy_report(start, end, pack), status=status.HTTP_200_OK)
+
+
+class UserCollectionView(NegotiatedRenderersMixin, APIView):
     permission_classes = [permissions.IsAuthenticated]
 
     def get(self, request):
@@ -75,19 +205,7 @@ class UserCollectionView(APIView):
         bonus_cards = list(collection.bonus_malus_cards.select_related("rarity").all())
 
         def build_counts(model, ids):
-            if not ids:
-                return {}
-            content_type = ContentType.objects.get_for_model(model)
-            aggregated = (
-                PackPurchaseCard.objects.filter(
-                    purchase__user=request.user,
-                    content_type=content_type,
-                    object_id__in=ids,
-                )
-                .values("object_id")
-                .annotate(total=Count("id"))
-            )
-            return {row["object_id"]: row["total"] for row in aggregated}
+            return card_quantities(request.user, ContentType.objects.get_for_model(model), ids)
 
         player_counts = build_counts(PlayerCard, [card.pk for card in player_cards])
         goalkeeper_counts = build_counts(GoalkeeperCard, [card.pk for card in goalkeeper_cards])
@@ -131,4 +249,15 @@ class UserCollectionView(APIView):
             ],
         }
 
-        return Response(payload, status=status.HTTP_200_OK)
+        return Response(self.layout(request, payload), status=status.HTTP_200_OK)
+
+
+class CollectionProgressView(APIView):
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request):
+        season = request.query_params.get("season") or None
+        return Response(
+            {"season": season, "progress": collection_progress(request.user.pk, season)},
+            status=status.HTTP_200_OK,
+        )
@@ -1,5 +1,8 @@
 from django.contrib import admin
 
+from db_carte.fulltext import FullTextSearchAdminMixin
+
+from .fulltext import QUIZ_QUESTION_INDEX
 from .models import QuizTheme, QuizQuestion, QuizAnswer
 
 
@@ -13,10 +16,11 @@ class QuizAnswerInline(admin.TabularInline):
 
 
 @admin.register(QuizQuestion)
-class QuizQuestionAdmin(admin.ModelAdmin):
+class QuizQuestionAdmin(FullTextSearchAdminMixin, admin.ModelAdmin):
     list_display = ("text", "theme")
     list_filter = ("theme",)
-    search_fields = ("text",)
+    search_fields = ("text", "explanation")
+    fulltext_index = QUIZ_QUESTION_INDEX
     inlines = [QuizAnswerInline]
 
 
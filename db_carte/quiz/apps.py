@@ -4,3 +4,14 @@ from django.apps import AppConfig
 class QuizConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "quiz"
+
+    def ready(self):
+        from db_carte.versioning import QUIZ, connect_version_signals
+
+        from .models import QuizAnswer, QuizQuestion, QuizTheme
+
+        connect_version_signals(QUIZ, QuizTheme, QuizQuestion, QuizAnswer)
+
+        from .fulltext import QUIZ_QUESTION_INDEX
+
+        QUIZ_QUESTION_INDEX.connect(QuizQuestion)
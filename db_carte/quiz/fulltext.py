@@ -0,0 +1,7 @@
+from db_carte.fulltext import FullTextIndex
+
+QUIZ_QUESTION_INDEX = FullTextIndex(
+    table="quiz_quizquestion_fts",
+    source_table="quiz_quizquestion",
+    columns=("text", "explanation"),
+)
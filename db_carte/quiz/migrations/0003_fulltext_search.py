@@ -0,0 +1,22 @@
+from django.db import migrations
+
+from quiz.fulltext import QUIZ_QUESTION_INDEX
+
+
+def create_fulltext_table(apps, schema_editor):
+    QUIZ_QUESTION_INDEX.create(schema_editor)
+
+
+def drop_fulltext_table(apps, schema_editor):
+    QUIZ_QUESTION_INDEX.drop(schema_editor)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("quiz", "0002_seed_top_scorer_theme"),
+    ]
+
+    operations = [
+        migrations.RunPython(create_fulltext_table, drop_fulltext_table),
+    ]
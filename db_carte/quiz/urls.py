@@ -5,4 +5,5 @@ from . import views
 urlpatterns = [
     path("themes/", views.quiz_theme_list, name="quiz_theme_list"),
     path("themes/<slug:slug>/", views.questions_by_theme, name="quiz_questions_by_theme"),
+    path("questions/search/", views.search_questions, name="quiz_question_search"),
 ]
@@ -1,12 +1,18 @@
 from django.db.models import Count, Prefetch
 from django.http import JsonResponse
 from django.shortcuts import get_object_or_404
-from django.views.decorators.http import require_GET
+from django.views.decorators.http import condition, require_GET
 
+from db_carte.versioning import QUIZ, versioned_etag
+
+from .fulltext import QUIZ_QUESTION_INDEX
 from .models import QuizTheme, QuizQuestion, QuizAnswer
 
+quiz_etag = versioned_etag(QUIZ)
+
 
 @require_GET
+@condition(etag_func=quiz_etag)
 def quiz_theme_list(_request):
     themes = (
         QuizTheme.objects.annotate(question_count=Count("questions"))
@@ -25,6 +31,7 @@ def quiz_theme_list(_request):
 
 
 @require_GET
+@condition(etag_func=quiz_etag)
 def questions_by_theme(_request, slug: str):
     theme = get_object_or_404(
         QuizTheme.objects.prefetch_related(
@@ -65,3 +72,29 @@ def questions_by_theme(_request, slug: str):
             "questions": questions_payload,
         }
     )
+
+
+@require_GET
+@condition(etag_func=quiz_etag)
+def search_questions(request):
+    query = (request.GET.get("q") or "").strip()
+    if not query:
+        return JsonResponse({"error": "Provide a search query with 'q'."}, status=400)
+    try:
+        limit = min(max(int(request.GET.get("limit", 20)), 1), 100)
+    except (TypeError, ValueError):
+        return JsonResponse({"error": "'limit' must be an integer."}, status=400)
+
+    questions = QUIZ_QUESTION_INDEX.search(
+        QuizQuestion.objects.select_related("theme"), query, limit
+    )
+    data = [
+        {
+            "id": question.id,
+            "text": question.text,
+            "explanation": question.explanation,
+            "theme": question.theme.slug,
+        }
+        for question in questions
+    ]
+    return JsonResponse({"questions": data})
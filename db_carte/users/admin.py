@@ -1,6 +1,6 @@
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin
-from .models import CustomUser  # Importa il modello utente personalizzato
+from .models import CreditTransaction, CustomUser  # Importa il modello utente personalizzato
 
 class CustomUserAdmin(UserAdmin):
     model = CustomUser
@@ -11,3 +11,11 @@ class CustomUserAdmin(UserAdmin):
     
 
 admin.site.register(CustomUser, CustomUserAdmin)
+
+
+@admin.register(CreditTransaction)
+class CreditTransactionAdmin(admin.ModelAdmin):
+    list_display = ("user", "amount", "balance_after", "reason", "reference", "created_at")
+    list_filter = ("reason",)
+    search_fields = ("user__username", "reference")
+    readonly_fields = ("user", "amount", "balance_after", "reason", "reference", "created_at")
@@ -0,0 +1,252 @@
+"""
+Credits ledger.
+
+Balances live in ``CustomUser.money`` and every change is a single
+conditional UPDATE (``money = money + amount`` guarded against going
+negative) followed by an INSERT into ``CreditTransaction``, in one
+transaction. On PostgreSQL and SQLite the UPDATE also returns the new
+balance (``UPDATE ... RETURNING``); elsewhere it is read back inside the
+same transaction, while the row is still locked by the write. Concurrent
+rewards and purchases therefore never lose an update and never hold a lock
+longer than the change itself.
+
+``snapshot_balances`` checkpoints the ledger per user and
+``reconcile_balances`` compares the balances with the last checkpoint plus
+the transactions written since, optionally appending correcting entries.
+"""
+
+from __future__ import annotations
+
+from datetime import timedelta
+from typing import Dict, List, Optional
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Case, F, Max, OuterRef, Subquery, Sum, Value, When
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from .models import CreditBalanceSnapshot, CreditTransaction, CustomUser
+
+DEFAULT_BATCH_SIZE = 1000
+
+
+class CreditError(Exception):
+    """Base exception for credit changes."""
+
+
+class InsufficientCreditsError(CreditError):
+    """Raised when a change would make the balance negative."""
+
+
+def _supports_update_returning() -> bool:
+    if connection.vendor == "postgresql":
+        return True
+    # SQLite gained RETURNING in 3.35, the same release Django checks for INSERTs.
+    return connection.vendor == "sqlite" and connection.features.can_return_columns_from_insert
+
+
+def _add_to_balance(user_id: int, amount: int) -> Optional[int]:
+    if _supports_update_returning():
+        quote = connection.ops.quote_name
+        table = quote(CustomUser._meta.db_table)
+        money = quote(CustomUser._meta.get_field("money").column)
+        pk = quote(CustomUser._meta.pk.column)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"UPDATE {table} SET {money} = {money} + %s "
+                f"WHERE {pk} = %s AND {money} + %s >= 0 RETURNING {money}",
+                [amount, user_id, amount],
+            )
+            row = cursor.fetchone()
+        return row[0] if row else None
+
+    updated = CustomUser.objects.filter(pk=user_id, money__gte=-amount).update(money=F("money") + amount)
+    if not updated:
+        return None
+    return CustomUser.objects.filter(pk=user_id).values_list("money", flat=True).get()
+
+
+def change_balance(user_id: int, amount: int, reason: str, reference: str = "") -> int:
+    """
+    Adds ``amount`` (negative to charge) to the user's balance and records it
+    in the ledger. Returns the new balance; raises ``InsufficientCreditsError``
+    if the balance would go negative.
+    """
+
+    with transaction.atomic():
+        balance = _add_to_balance(user_id, amount)
+        if balance is None:
+            raise InsufficientCreditsError("Crediti insufficienti.")
+        CreditTransaction.objects.create(
+            user_id=user_id,
+            amount=amount,
+            balance_after=balance,
+            reason=reason,
+            reference=reference,
+        )
+    return balance
+
+
+def add_to_balances(amounts: Dict[int, int], reason: str, reference: str = "") -> Dict[int, int]:
+    """
+    Adds non-negative ``amounts`` (``{user_id: amount}``) to many balances
+    with one UPDATE and one ledger INSERT. Returns the new balances of the
+    users that still exist.
+    """
+
+    amounts = {user_id: amount for user_id, amount in amounts.items() if amount}
+    if any(amount < 0 for amount in amounts.values()):
+        raise CreditError("Batched credit changes cannot be negative.")
+    if not amounts:
+        return {}
+    with transaction.atomic():
+        CustomUser.objects.filter(pk__in=amounts).update(
+            money=F("money")
+            + Case(
+                *[When(pk=user_id, then=Value(amount)) for user_id, amount in amounts.items()],
+                default=Value(0),
+            )
+        )
+        # The rows are locked by the UPDATE until commit.
+        balances = dict(CustomUser.objects.filter(pk__in=amounts).values_list("pk", "money"))
+        CreditTransaction.objects.bulk_create(
+            [
+                CreditTransaction(
+                    user_id=user_id,
+                    amount=amounts[user_id],
+                    balance_after=balance,
+                    reason=reason,
+                    reference=reference,
+                )
+                for user_id, balance in balances.items()
+            ],
+            batch_size=500,
+        )
+    return balances
+
+
+def set_balance(user_id: int, value: int, reason: str = CreditTransaction.Reason.ADJUSTMENT) -> int:
+    """Sets the balance to ``value``, recording the difference in the ledger."""
+
+    if value < 0:
+        raise InsufficientCreditsError("Crediti insufficienti.")
+    with transaction.atomic():
+        current = CustomUser.objects.select_for_update().filter(pk=user_id).values_list("money", flat=True).get()
+        if value != current:
+            CustomUser.objects.filter(pk=user_id).update(money=value)
+            CreditTransaction.objects.create(
+                user_id=user_id,
+                amount=value - current,
+                balance_after=value,
+                reason=reason,
+            )
+    return value
+
+
+def connect_user_signals() -> None:
+    from django.db.models.signals import post_save
+
+    def _opening_balance(sender, instance, created, raw=False, **kwargs):
+        if created and not raw:
+            CreditTransaction.objects.create(
+                user=instance,
+                amount=instance.money,
+                balance_after=instance.money,
+                reason=CreditTransaction.Reason.OPENING,
+            )
+
+    post_save.connect(_opening_balance, sender=CustomUser, weak=False, dispatch_uid="credits-opening-balance")
+
+
+def _ledger_since_checkpoint(up_to: Optional[int] = None):
+    """Expression summing the outer user's transactions after their checkpoint."""
+
+    recent = CreditTransaction.objects.filter(
+        user=OuterRef("pk"),
+        id__gt=Coalesce(OuterRef("credit_snapshot__last_transaction_id"), Value(0)),
+    )
+    if up_to is not None:
+        recent = recent.filter(id__lte=up_to)
+    total = recent.order_by().values("user").annotate(total=Sum("amount")).values("total")
+    return Coalesce(Subquery(total), Value(0))
+
+
+def _ledger_balances(up_to: Optional[int] = None):
+    return CustomUser.objects.annotate(
+        ledger_balance=Coalesce(F("credit_snapshot__balance"), Value(0)) + _ledger_since_checkpoint(up_to),
+    )
+
+
+def snapshot_balances(batch_size: int = DEFAULT_BATCH_SIZE) -> int:
+    """
+    Advances every user's ledger checkpoint to the transactions older than
+    ``CREDITS_SNAPSHOT_LAG_SECONDS``; the lag keeps a transaction whose id was
+    allocated but not yet committed from being skipped. Returns how many
+    checkpoints were written.
+    """
+
+    cutoff = timezone.now() - timedelta(seconds=settings.CREDITS_SNAPSHOT_LAG_SECONDS)
+    high_water = CreditTransaction.objects.filter(created_at__lt=cutoff).aggregate(last=Max("id"))["last"]
+    if high_water is None:
+        return 0
+
+    written = 0
+    last_user_id = 0
+    while True:
+        rows = list(
+            _ledger_balances(up_to=high_water)
+            .filter(pk__gt=last_user_id)
+            .order_by("pk")
+            .values_list("pk", "ledger_balance")[:batch_size]
+        )
+        if not rows:
+            return written
+        last_user_id = rows[-1][0]
+        CreditBalanceSnapshot.objects.bulk_create(
+            [
+                CreditBalanceSnapshot(user_id=user_id, balance=balance, last_transaction_id=high_water)
+                for user_id, balance in rows
+            ],
+            update_conflicts=True,
+            unique_fields=["user"],
+            update_fields=["balance", "last_transaction_id", "taken_at"],
+        )
+        written += len(rows)
+
+
+def reconcile_balances(fix: bool = False) -> List[Dict[str, int]]:
+    """
+    Users whose balance differs from their ledger (last checkpoint plus the
+    transactions since). With ``fix`` the balance is taken as correct and a
+    ``RECONCILIATION`` entry for the difference is appended to the ledger.
+    """
+
+    mismatches = [
+        {"user_id": user_id, "balance": balance, "ledger_balance": ledger_balance}
+        for user_id, balance, ledger_balance in _ledger_balances()
+        .exclude(money=F("ledger_balance"))
+        .order_by("pk")
+        .values_list("pk", "money", "ledger_balance")
+    ]
+    if fix:
+        for mismatch in mismatches:
+            with transaction.atomic():
+                # Lock the user so no balance change slips in between.
+                list(CustomUser.objects.select_for_update().filter(pk=mismatch["user_id"]).values_list("pk"))
+                current = (
+                    _ledger_balances()
+                    .filter(pk=mismatch["user_id"])
+                    .values_list("money", "ledger_balance")
+                    .first()
+                )
+                if current is None or current[0] == current[1]:
+                    continue
+                balance, ledger_balance = current
+                CreditTransaction.objects.create(
+                    user_id=mismatch["user_id"],
+                    amount=balance - ledger_balance,
+                    balance_after=balance,
+                    reason=CreditTransaction.Reason.RECONCILIATION,
+                )
+    return mismatches
@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+
+from users.credits import reconcile_balances
+
+
+class Command(BaseCommand):
+    help = "Compares user credit balances with the credits ledger."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--fix",
+            action="store_true",
+            help="Append reconciliation entries so the ledger matches the current balances.",
+        )
+
+    def handle(self, *args, **options):
+        mismatches = reconcile_balances(fix=options["fix"])
+        for mismatch in mismatches:
+            self.stdout.write(
+                f"user {mismatch['user_id']}: balance {mismatch['balance']}, ledger {mismatch['ledger_balance']}"
+            )
+        action = "fixed" if options["fix"] else "found"
+        style = self.style.SUCCESS if options["fix"] or not mismatches else self.style.WARNING
+        self.stdout.write(style(f"{len(mismatches)} mismatched balances {action}."))
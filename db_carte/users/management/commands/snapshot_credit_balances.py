@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from users.credits import DEFAULT_BATCH_SIZE, snapshot_balances
+
+
+class Command(BaseCommand):
+    help = "Checkpoints every user's credits ledger so reconciliation only reads newer transactions."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        written = snapshot_balances(batch_size=options["batch_size"])
+        self.stdout.write(self.style.SUCCESS(f"Wrote {written} credit balance snapshots."))
@@ -0,0 +1,53 @@
+# Generated by Django 5.1.1 on 2026-10-19 02:50
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def open_balances(apps, schema_editor):
+    CustomUser = apps.get_model('users', 'CustomUser')
+    CreditTransaction = apps.get_model('users', 'CreditTransaction')
+    CreditTransaction.objects.bulk_create(
+        [
+            CreditTransaction(user_id=user_id, amount=money, balance_after=money, reason='opening')
+            for user_id, money in CustomUser.objects.values_list('pk', 'money')
+        ],
+        batch_size=500,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0003_alter_customuser_achievement_claims_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CreditBalanceSnapshot',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='credit_snapshot', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('balance', models.BigIntegerField(default=0)),
+                ('last_transaction_id', models.BigIntegerField(default=0)),
+                ('taken_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='CreditTransaction',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('amount', models.IntegerField()),
+                ('balance_after', models.IntegerField()),
+                ('reason', models.CharField(choices=[('opening', 'Opening balance'), ('reward', 'Reward'), ('adjustment', 'Adjustment'), ('pack_purchase', 'Pack purchase'), ('reconciliation', 'Reconciliation')], max_length=20)),
+                ('reference', models.CharField(blank=True, max_length=64)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='credit_transactions', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ('-id',),
+                'indexes': [models.Index(fields=['user', 'id'], name='users_credit_user_idx')],
+            },
+        ),
+        migrations.RunPython(open_balances, migrations.RunPython.noop),
+    ]
@@ -20,3 +20,55 @@ class CustomUser(AbstractUser):
 
     def __str__(self):
         return self.username
+
+
+class CreditTransaction(models.Model):
+    """
+    Append-only ledger of credit changes. Every change to ``CustomUser.money``
+    goes through ``users.credits`` and writes one row here in the same
+    transaction, so the sum of a user's rows always equals their balance.
+    """
+
+    class Reason(models.TextChoices):
+        OPENING = "opening", "Opening balance"
+        REWARD = "reward", "Reward"
+        ADJUSTMENT = "adjustment", "Adjustment"
+        PACK_PURCHASE = "pack_purchase", "Pack purchase"
+        RECONCILIATION = "reconciliation", "Reconciliation"
+
+    user = models.ForeignKey(CustomUser, on_delete=models.CASCADE, related_name="credit_transactions")
+    amount = models.IntegerField()
+    balance_after = models.IntegerField()
+    reason = models.CharField(max_length=20, choices=Reason.choices)
+    reference = models.CharField(max_length=64, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ("-id",)
+        indexes = [
+            models.Index(fields=["user", "id"], name="users_credit_user_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.user_id}: {self.amount:+d} ({self.reason})"
+
+
+class CreditBalanceSnapshot(models.Model):
+    """
+    Checkpoint of a user's ledger: ``balance`` is the sum of their
+    transactions up to ``last_transaction_id``. Reconciliation only has to
+    add the rows written since.
+    """
+
+    user = models.OneToOneField(
+        CustomUser,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="credit_snapshot",
+    )
+    balance = models.BigIntegerField(default=0)
+    last_transaction_id = models.BigIntegerField(default=0)
+    taken_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.user_id}: {self.balance} @ {self.last_transaction_id}"
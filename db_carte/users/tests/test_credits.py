@@ -0,0 +1,99 @@
+from datetime import timedelta
+
+from django.test import TestCase
+from django.utils import timezone
+
+from packs.tests.factories import make_user
+from users.credits import (
+    CreditError,
+    InsufficientCreditsError,
+    add_to_balances,
+    change_balance,
+    reconcile_balances,
+    set_balance,
+    snapshot_balances,
+)
+from users.models import CreditBalanceSnapshot, CreditTransaction, CustomUser
+
+Reason = CreditTransaction.Reason
+
+
+class LedgerTests(TestCase):
+    def setUp(self):
+        self.user = make_user(money=100)
+
+    def ledger(self, user=None):
+        return list(
+            CreditTransaction.objects.filter(user=user or self.user)
+            .order_by("id")
+            .values_list("reason", "amount", "balance_after")
+        )
+
+    def test_user_creation_opens_the_ledger(self):
+        self.assertEqual(self.ledger(), [(Reason.OPENING, 100, 100)])
+
+    def test_changes_are_recorded_with_the_new_balance(self):
+        self.assertEqual(change_balance(self.user.pk, 20, Reason.REWARD), 120)
+        self.assertEqual(change_balance(self.user.pk, -50, Reason.PACK_PURCHASE, reference="pack"), 70)
+        self.assertEqual(set_balance(self.user.pk, 10), 10)
+
+        self.assertEqual(
+            self.ledger()[1:],
+            [(Reason.REWARD, 20, 120), (Reason.PACK_PURCHASE, -50, 70), (Reason.ADJUSTMENT, -60, 10)],
+        )
+
+    def test_overdraft_changes_nothing(self):
+        with self.assertRaises(InsufficientCreditsError):
+            change_balance(self.user.pk, -101, Reason.PACK_PURCHASE)
+
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.money, 100)
+        self.assertEqual(len(self.ledger()), 1)
+
+    def test_batched_rewards(self):
+        other = make_user(money=0)
+
+        balances = add_to_balances({self.user.pk: 5, other.pk: 7}, Reason.REWARD)
+
+        self.assertEqual(balances, {self.user.pk: 105, other.pk: 7})
+        self.assertEqual(self.ledger(other)[-1], (Reason.REWARD, 7, 7))
+        with self.assertRaises(CreditError):
+            add_to_balances({self.user.pk: -1}, Reason.REWARD)
+
+
+class ReconciliationTests(TestCase):
+    def setUp(self):
+        self.user = make_user(money=100)
+        self.other = make_user(money=50)
+        change_balance(self.user.pk, 25, Reason.REWARD)
+
+    def test_ledger_and_balances_agree(self):
+        self.assertEqual(reconcile_balances(), [])
+
+    def test_reports_and_fixes_drift(self):
+        # A write that bypassed users.credits.
+        CustomUser.objects.filter(pk=self.user.pk).update(money=200)
+
+        self.assertEqual(reconcile_balances(), [{"user_id": self.user.pk, "balance": 200, "ledger_balance": 125}])
+        reconcile_balances(fix=True)
+
+        entry = CreditTransaction.objects.filter(user=self.user).latest("id")
+        self.assertEqual((entry.reason, entry.amount, entry.balance_after), (Reason.RECONCILIATION, 75, 200))
+        self.assertEqual(reconcile_balances(), [])
+
+    def test_snapshot_checkpoints_settled_rows_only(self):
+        CreditTransaction.objects.update(created_at=timezone.now() - timedelta(hours=1))
+        settled = CreditTransaction.objects.latest("id").pk
+        change_balance(self.user.pk, 5, Reason.REWARD)
+
+        self.assertEqual(snapshot_balances(batch_size=1), 2)
+
+        snapshots = {
+            snapshot.user_id: (snapshot.balance, snapshot.last_transaction_id)
+            for snapshot in CreditBalanceSnapshot.objects.all()
+        }
+        self.assertEqual(snapshots, {self.user.pk: (125, settled), self.other.pk: (50, settled)})
+        # Checkpoint plus the rows written since still matches every balance.
+        self.assertEqual(reconcile_balances(), [])
+        CustomUser.objects.filter(pk=self.other.pk).update(money=0)
+        self.assertEqual(reconcile_balances(), [{"user_id": self.other.pk, "balance": 0, "ledger_balance": 50}])
@@ -0,0 +1,113 @@
+import threading
+from unittest import mock
+
+from django.db import OperationalError, connection
+from django.test import TestCase
+
+from packs.tests.factories import make_user
+from users.models import CreditTransaction, CustomUser
+from users.write_buffer import WriteBuffer
+
+
+class WriteBufferTests(TestCase):
+    def setUp(self):
+        self.user = make_user(money=100)
+        # Not started: the tests flush by hand.
+        self.buffer = WriteBuffer(flush_seconds=60, max_pending=1000)
+
+    def test_flush_writes_coalesced_updates(self):
+        self.buffer.add_credits(self.user.pk, 5)
+        self.buffer.add_credits(self.user.pk, 7)
+        self.buffer.set_achievements(self.user.pk, {"answers": 1}, [])
+        self.buffer.set_achievements(self.user.pk, {"answers": 2}, ["first"])
+
+        self.assertEqual(self.buffer.flush(), 1)
+
+        user = CustomUser.objects.get(pk=self.user.pk)
+        self.assertEqual((user.money, user.achievement_stats, user.achievement_claims), (112, {"answers": 2}, ["first"]))
+        self.assertEqual(
+            list(CreditTransaction.objects.filter(reason=CreditTransaction.Reason.REWARD).values_list("amount", flat=True)),
+            [12],
+        )
+        self.assertEqual(self.buffer.credits(self.user.pk), 0)
+
+    def test_failed_flush_puts_the_values_back(self):
+        self.buffer.add_credits(self.user.pk, 5)
+        self.buffer.set_achievements(self.user.pk, {"answers": 1}, [])
+
+        def locked(*args, **kwargs):
+            # Updates arriving while the flush runs must survive too.
+            self.buffer.add_credits(self.user.pk, 3)
+            self.buffer.set_achievements(self.user.pk, {"answers": 2}, [])
+            raise OperationalError("database is locked")
+
+        with mock.patch("users.write_buffer.add_to_balances", side_effect=locked):
+            with self.assertRaises(OperationalError):
+                self.buffer.flush()
+
+        self.assertEqual(self.buffer.credits(self.user.pk), 8)
+        self.assertEqual(self.buffer.achievements(self.user.pk), ({"answers": 2}, []))
+        self.assertEqual(CustomUser.objects.get(pk=self.user.pk).money, 100)
+
+        self.buffer.flush()
+        self.assertEqual(CustomUser.objects.get(pk=self.user.pk).money, 108)
+        self.assertEqual(self.buffer.credits(self.user.pk), 0)
+
+    def test_values_being_flushed_stay_visible_until_commit(self):
+        self.buffer.add_credits(self.user.pk, 5)
+        self.buffer.set_achievements(self.user.pk, {"answers": 1}, [])
+        seen = []
+
+        def record(*args, **kwargs):
+            seen.append((self.buffer.credits(self.user.pk), self.buffer.achievements(self.user.pk)))
+
+        with mock.patch("users.write_buffer.add_to_balances", side_effect=record):
+            self.buffer.flush()
+
+        self.assertEqual(seen, [(5, ({"answers": 1}, []))])
+        self.assertEqual((self.buffer.credits(self.user.pk), self.buffer.achievements(self.user.pk)), (0, None))
+
+    def test_flush_of_a_user_waits_for_a_running_flush(self):
+        self.buffer.add_credits(self.user.pk, 5)
+        entered, release = threading.Event(), threading.Event()
+
+        def slow(*args, **kwargs):
+            entered.set()
+            release.wait(5)
+
+        def in_thread(func):
+            def run():
+                try:
+                    func()
+                finally:
+                    connection.close()
+
+            thread = threading.Thread(target=run)
+            thread.start()
+            return thread
+
+        with mock.patch("users.write_buffer.add_to_balances", side_effect=slow):
+            background = in_thread(self.buffer.flush)
+            self.assertTrue(entered.wait(5))
+            user_flush = in_thread(lambda: self.buffer.flush([self.user.pk]))
+            user_flush.join(0.2)
+            self.assertTrue(user_flush.is_alive())
+            self.assertEqual(self.buffer.credits(self.user.pk), 5)
+
+            release.set()
+            background.join(5)
+            user_flush.join(5)
+
+        self.assertFalse(user_flush.is_alive())
+        self.assertEqual(self.buffer.credits(self.user.pk), 0)
+
+    def test_flush_of_one_user_leaves_the_others_buffered(self):
+        other = make_user(money=0)
+        self.buffer.add_credits(self.user.pk, 5)
+        self.buffer.add_credits(other.pk, 9)
+
+        self.buffer.flush([self.user.pk])
+
+        self.assertEqual(CustomUser.objects.get(pk=self.user.pk).money, 105)
+        self.assertEqual(CustomUser.objects.get(pk=other.pk).money, 0)
+        self.assertEqual(self.buffer.credits(other.pk), 9)
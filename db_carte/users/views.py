@@ -3,7 +3,10 @@ from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
+from .credits import InsufficientCreditsError, change_balance, set_balance
+from .models import CreditTransaction
 from .serializers import RegisterSerializer
+from .write_buffer import buffered_achievements, buffered_credits, flush_user, get_write_buffer
 
 DEFAULT_ACHIEVEMENT_STATS = {
     "totalAnswers": 0,
@@ -48,7 +51,7 @@ class UserCreditsView(APIView):
     def get(self, request):
         return Response(
             {
-                "credits": request.user.money,
+                "credits": buffered_credits(request.user),
                 "username": request.user.username,
             },
             status=status.HTTP_200_OK,
@@ -74,23 +77,41 @@ class UserCreditsView(APIView):
         try:
             if delta is not None:
                 delta = int(delta)
-                new_total = user.money + delta
             else:
-                new_total = int(value)
+                value = int(value)
         except (TypeError, ValueError):
             return Response(
                 {"detail": "Credits values must be integers."},
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
-        if new_total < 0:
+        buffer = get_write_buffer()
+        if buffer is not None and delta is not None and delta >= 0:
+            # Rewards are coalesced and written in batches; a killed process
+            # loses the ones not flushed yet (see USER_WRITE_BUFFER_ENABLED).
+            buffer.add_credits(user.pk, delta)
+            return Response(
+                {
+                    "credits": buffered_credits(user),
+                    "username": user.username,
+                },
+                status=status.HTTP_200_OK,
+            )
+
+        # Spending or overwriting credits must see every buffered reward.
+        flush_user(user.pk)
+        try:
+            if delta is not None:
+                new_total = change_balance(user.pk, delta, CreditTransaction.Reason.REWARD)
+            else:
+                new_total = set_balance(user.pk, value)
+        except InsufficientCreditsError:
             return Response(
                 {"detail": "Credits cannot be negative."},
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
         user.money = new_total
-        user.save(update_fields=["money"])
 
         return Response(
             {
@@ -105,8 +126,9 @@ class AchievementProgressView(APIView):
     permission_classes = [IsAuthenticated]
 
     def get(self, request):
-        stats = _normalize_stats(request.user.achievement_stats)
-        claims = _normalize_claims(request.user.achievement_claims)
+        current_stats, current_claims = buffered_achievements(request.user)
+        stats = _normalize_stats(current_stats)
+        claims = _normalize_claims(current_claims)
         return Response(
             {
                 "stats": stats,
@@ -121,16 +143,21 @@ class AchievementProgressView(APIView):
         incoming_stats = request.data.get("stats")
         incoming_claims = request.data.get("claimedAchievementIds")
 
-        stats_source = incoming_stats if isinstance(incoming_stats, dict) else request.user.achievement_stats
-        claims_source = incoming_claims if isinstance(incoming_claims, list) else request.user.achievement_claims
+        current_stats, current_claims = buffered_achievements(request.user)
+        stats_source = incoming_stats if isinstance(incoming_stats, dict) else current_stats
+        claims_source = incoming_claims if isinstance(incoming_claims, list) else current_claims
 
         stats = _normalize_stats(stats_source)
         claims = _normalize_claims(claims_source)
 
         user = request.user
-        user.achievement_stats = stats
-        user.achievement_claims = claims
-        user.save(update_fields=["achievement_stats", "achievement_claims"])
+        buffer = get_write_buffer()
+        if buffer is not None:
+            buffer.set_achievements(user.pk, stats, claims)
+        else:
+            user.achievement_stats = stats
+            user.achievement_claims = claims
+            user.save(update_fields=["achievement_stats", "achievement_claims"])
 
         return Response(
             {
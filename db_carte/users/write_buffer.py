@@ -0,0 +1,206 @@
+"""
+Write coalescing for high-frequency user updates.
+
+Quiz play sends a credit reward per answer and rewrites the achievement
+progress after each one. Instead of an UPDATE of ``CustomUser`` per request,
+``WriteBuffer`` keeps per-user totals in process memory:
+
+- credit rewards are summed per user and applied with one batched UPDATE
+  (plus one ledger row per user, see ``users.credits.add_to_balances``);
+- achievement progress keeps only the latest value per user and is written
+  with one ``bulk_update``.
+
+A daemon thread flushes every ``USER_WRITE_BUFFER_FLUSH_SECONDS``, earlier
+once ``USER_WRITE_BUFFER_MAX_PENDING`` updates are waiting, and once more at
+interpreter exit. Reads add the buffered values of the current process
+(``credits``/``achievements``), including those a running flush has taken
+but not committed yet, and anything that spends or overwrites credits calls
+``flush_user`` first, which waits for a running flush, so balances are never
+checked against stale totals. Other processes see buffered rewards after at most one flush
+interval.
+
+A failed flush (e.g. SQLite's "database is locked" while another process
+writes) puts its values back in the buffer for the next one. Nothing is
+persisted before a flush, though: a process killed without running its exit
+hooks loses up to one flush interval of updates (see the settings).
+"""
+
+from __future__ import annotations
+
+import atexit
+import logging
+import threading
+from collections import defaultdict
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from django.conf import settings
+from django.db import OperationalError, connection, transaction
+
+from .credits import add_to_balances
+from .models import CreditTransaction, CustomUser
+
+logger = logging.getLogger(__name__)
+
+Achievements = Tuple[Dict[str, int], List[str]]  # (stats, claimed achievement ids)
+
+
+class WriteBuffer:
+    def __init__(self, flush_seconds: float, max_pending: int):
+        self.flush_seconds = flush_seconds
+        self.max_pending = max_pending
+        self._lock = threading.Lock()
+        # Held for a whole flush, so ``flush_user`` waits for a running one.
+        self._flush_lock = threading.Lock()
+        self._credits: Dict[int, int] = defaultdict(int)
+        self._achievements: Dict[int, Achievements] = {}
+        # Values taken by the running flush, still counted until it commits.
+        self._inflight_credits: Dict[int, int] = {}
+        self._inflight_achievements: Dict[int, Achievements] = {}
+        self._pending = 0
+        self._wake = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(target=self._run, name="user-write-buffer", daemon=True)
+            self._thread.start()
+        atexit.register(self.flush)
+
+    def _run(self) -> None:
+        while True:
+            self._wake.wait(self.flush_seconds)
+            self._wake.clear()
+            try:
+                self.flush()
+            except OperationalError:
+                # The values are back in the buffer and go out with the next flush.
+                logger.warning("Flushing the user write buffer failed; retrying later", exc_info=True)
+            except Exception:
+                logger.exception("Flushing the user write buffer failed")
+            finally:
+                connection.close()
+
+    def _added(self) -> None:
+        self._pending += 1
+        if self._pending >= self.max_pending:
+            self._wake.set()
+
+    def add_credits(self, user_id: int, amount: int) -> None:
+        if amount < 0:
+            raise ValueError("Only credit rewards can be buffered.")
+        with self._lock:
+            self._credits[user_id] += amount
+            self._added()
+
+    def set_achievements(self, user_id: int, stats: Dict[str, int], claims: List[str]) -> None:
+        with self._lock:
+            self._achievements[user_id] = (stats, claims)
+            self._added()
+
+    def credits(self, user_id: int) -> int:
+        with self._lock:
+            return self._credits.get(user_id, 0) + self._inflight_credits.get(user_id, 0)
+
+    def achievements(self, user_id: int) -> Optional[Achievements]:
+        with self._lock:
+            pending = self._achievements.get(user_id)
+            return pending if pending is not None else self._inflight_achievements.get(user_id)
+
+    def _take(self, user_ids: Optional[Iterable[int]]) -> Tuple[Dict[int, int], Dict[int, Achievements]]:
+        with self._lock:
+            if user_ids is None:
+                credits, achievements = dict(self._credits), self._achievements
+                self._credits, self._achievements, self._pending = defaultdict(int), {}, 0
+            else:
+                credits = {user_id: self._credits.pop(user_id) for user_id in user_ids if user_id in self._credits}
+                achievements = {
+                    user_id: self._achievements.pop(user_id) for user_id in user_ids if user_id in self._achievements
+                }
+            self._inflight_credits, self._inflight_achievements = credits, achievements
+            return credits, achievements
+
+    def _committed(self) -> None:
+        with self._lock:
+            self._inflight_credits, self._inflight_achievements = {}, {}
+
+    def _restore(self, credits: Dict[int, int], achievements: Dict[int, Achievements]) -> None:
+        with self._lock:
+            self._inflight_credits, self._inflight_achievements = {}, {}
+            for user_id, amount in credits.items():
+                self._credits[user_id] += amount
+            for user_id, values in achievements.items():
+                # A newer rewrite that arrived meanwhile wins.
+                self._achievements.setdefault(user_id, values)
+
+    def flush(self, user_ids: Optional[Iterable[int]] = None) -> int:
+        """
+        Writes the buffered updates (of ``user_ids`` only, if given); returns
+        how many users. Waits for a flush already running in another thread,
+        so once it returns the given users' earlier updates are committed.
+        """
+
+        with self._flush_lock:
+            return self._flush(user_ids)
+
+    def _flush(self, user_ids: Optional[Iterable[int]]) -> int:
+        credits, achievements = self._take(user_ids)
+        if not credits and not achievements:
+            return 0
+        try:
+            with transaction.atomic():
+                add_to_balances(credits, CreditTransaction.Reason.REWARD, reference="buffered")
+                CustomUser.objects.bulk_update(
+                    [
+                        CustomUser(pk=user_id, achievement_stats=stats, achievement_claims=claims)
+                        for user_id, (stats, claims) in achievements.items()
+                    ],
+                    ["achievement_stats", "achievement_claims"],
+                    batch_size=500,
+                )
+        except Exception:
+            self._restore(credits, achievements)
+            raise
+        self._committed()
+        return len(credits.keys() | achievements.keys())
+
+
+_buffer: Optional[WriteBuffer] = None
+_buffer_lock = threading.Lock()
+
+
+def get_write_buffer() -> Optional[WriteBuffer]:
+    """The process-wide buffer, started on first use; None when buffering is disabled."""
+
+    global _buffer
+    if not settings.USER_WRITE_BUFFER_ENABLED:
+        return None
+    if _buffer is None:
+        with _buffer_lock:
+            if _buffer is None:
+                buffer = WriteBuffer(
+                    flush_seconds=settings.USER_WRITE_BUFFER_FLUSH_SECONDS,
+                    max_pending=settings.USER_WRITE_BUFFER_MAX_PENDING,
+                )
+                buffer.start()
+                _buffer = buffer
+    return _buffer
+
+
+def buffered_credits(user) -> int:
+    buffer = get_write_buffer()
+    return user.money + (buffer.credits(user.pk) if buffer else 0)
+
+
+def buffered_achievements(user) -> Tuple[Any, Any]:
+    buffer = get_write_buffer()
+    pending = buffer.achievements(user.pk) if buffer else None
+    return pending if pending is not None else (user.achievement_stats, user.achievement_claims)
+
+
+def flush_user(user_id: int) -> None:
+    """Writes ``user_id``'s buffered updates; call before spending or overwriting credits."""
+
+    if _buffer is not None:
+        _buffer.flush([user_id])